@@ -0,0 +1,57 @@
+"""
+Records the fixture responses of the stub server to a cassette, then replays them offline:
+the request rate of NSApi over the cassette without latency, and of a fan-out with simulated latency.
+
+Usage: python -m benchmarks.bench_cassette [stations] [latency in ms] [jitter in ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.stub_server import StubServer
+from nsapi.modules.cassette import Cassette
+from nsapi.nsapi import NSApi
+
+
+def rate(f, calls: int):
+    started = time.perf_counter()
+    f()
+    elapsed = time.perf_counter() - started
+
+    return calls / elapsed, elapsed
+
+
+def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    jitter = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.005
+
+    codes = ["S{}".format(i) for i in range(stations)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cassette.db")
+
+        with StubServer(compress=True):
+            cassette = Cassette(path, mode="record")
+            api = NSApi("user", "password", coalesce=False, records=True, cassette=cassette)
+            per_second, elapsed = rate(lambda: list(api.get_departures_many(codes, 8)), stations)
+            decoded, stored = cassette.sizes()
+            print("recorded {} responses in {:.3f} s, {:.1f} KiB stored as {:.1f} KiB".format(len(cassette), elapsed, decoded / 1024, stored / 1024))
+
+        cassette = Cassette(path)
+        api = NSApi("user", "password", coalesce=False, records=True, cassette=cassette)
+        list(api.get_departures_many(codes, 8))
+
+        per_second, elapsed = rate(lambda: [api.get_departures(code) for code in codes], stations)
+        print("{:36} {:10.1f} requests/s".format("replay, serial, no latency", per_second))
+
+        cassette.latency = latency
+        cassette.jitter = jitter
+        for max_concurrency in (1, 8, 32):
+            per_second, elapsed = rate(lambda: list(api.get_departures_many(codes, max_concurrency)), stations)
+            print("{:36} {:10.1f} requests/s".format("replay, {:.0f}±{:.0f} ms, concurrency {}".format(latency * 1e3, jitter * 1e3, max_concurrency), per_second))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares batched StationLocator queries with a linear haversine scan per point.
+
+Usage: python -m benchmarks.bench_geo [stations] [points]
+"""
+import math
+import random
+import sys
+import time
+
+from benchmarks.fixtures import stations_xml
+from nsapi.modules.geo import EARTH_RADIUS_KM, StationLocator
+from nsapi.modules.parsing import backends
+from nsapi.modules.stations import _build_station
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    stations = {}
+    for station_o in backends["lxml"]([stations_xml(count)], "Station"):
+        station = _build_station(station_o)
+        stations[station["code"]] = station
+    coordinates = [(code, float(station["lat"]), float(station["lon"])) for code, station in stations.items()]
+
+    locator = StationLocator(stations)
+    rng = random.Random(0)
+    lat = [rng.uniform(50.75, 53.55) for _ in range(points)]
+    lon = [rng.uniform(3.35, 7.2) for _ in range(points)]
+
+    start = time.perf_counter()
+    linear = [min(coordinates, key=lambda c: _haversine(la, lo, c[1], c[2]))[0] for la, lo in zip(lat, lon)]
+    linear_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes, _ = locator.nearest_many(lat, lon, 5)
+    batch_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    within = locator.within_many(lat, lon, 10.0)
+    within_elapsed = time.perf_counter() - start
+
+    assert linear == codes[:, 0].tolist()
+    print("linear haversine nearest: {:10.0f} points/s".format(points / linear_elapsed))
+    print("batched nearest 5:        {:10.0f} points/s".format(points / batch_elapsed))
+    print("batched within 10 km:     {:10.0f} points/s ({:.1f} stations/point)".format(points / within_elapsed, sum(map(len, within)) / points))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures the import time of the package in fresh interpreters, with the slowest modules from python -X importtime.
+
+Usage: python -m benchmarks.bench_import [rounds]
+"""
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = (
+    "import nsapi",
+    "from nsapi import NSApi",
+    "from nsapi.modules.station_cache import StationCache",
+    "from nsapi.modules.departures import parse_departures",
+)
+
+
+def importtime(statement: str):
+    """
+    Imports in a fresh interpreter.
+
+    :param statement: The import statement.
+    :return: The total microseconds, and a list of (cumulative microseconds, module) tuples of every module imported.
+    :rtype: tuple
+    """
+
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True).stderr
+
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        _, cumulative, module = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), module[1:]))
+
+    # Nested imports are indented, and already counted in the cumulative time of the top-level ones.
+    total = sum(cumulative for cumulative, module in modules if not module.startswith(" "))
+    return total, [(cumulative, module.strip()) for cumulative, module in modules]
+
+
+def import_times(rounds: int = 7):
+    """
+    Measures every statement in STATEMENTS.
+
+    :param rounds: The amount of fresh interpreters per statement.
+    :return: A dictionary of statement to a list of seconds, excluding the interpreter's own startup imports.
+    :rtype: dict
+    """
+
+    baseline = [importtime("pass")[0] for _ in range(rounds)]
+    startup = statistics.median(baseline)
+
+    return {statement: [max(0, importtime(statement)[0] - startup) / 1e6 for _ in range(rounds)] for statement in STATEMENTS}
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+
+    for statement, timings in import_times(rounds).items():
+        print("{:55} {:8.1f} ms".format(statement, statistics.median(timings) * 1e3))
+
+    print("\nSlowest modules of 'from nsapi import NSApi':")
+    _, modules = importtime("from nsapi import NSApi")
+    for cumulative, module in sorted(modules, reverse=True)[:15]:
+        print("{:10.1f} ms  {}".format(cumulative / 1e3, module))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures the parse throughput of a batch of large responses in the calling thread, in threads,
+and in a ParsePool with a growing amount of worker processes.
+
+Usage: python -m benchmarks.bench_parse_pool [bodies] [scale]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import stations_xml, travel_recommendations_xml
+from nsapi.modules.parse_pool import ParsePool
+from nsapi.modules.stations import parse_stations
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+
+
+def worker_counts():
+    cores = os.cpu_count() or 1
+
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+
+    return counts
+
+
+def serial(jobs: list):
+    for parse_f, body in jobs:
+        parse_f([body], None, True)
+
+
+def threaded(jobs: list, threads: int):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(parse_f, [body], None, True) for parse_f, body in jobs]:
+            future.result()
+
+
+def pooled(jobs: list, pool: ParsePool):
+    for future in [pool.submit(parse_f, [body], None, True) for parse_f, body in jobs]:
+        future.result()
+
+
+def main():
+    bodies = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    scale = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    data = [(parse_stations, stations_xml(600 * scale)), (parse_travel_recommendations, travel_recommendations_xml(15 * scale))]
+    jobs = [data[i % len(data)] for i in range(bodies)]
+    size = sum(len(body) for _, body in jobs)
+
+    def timed(f):
+        started = time.perf_counter()
+        f()
+        return time.perf_counter() - started
+
+    def report(name: str, elapsed: float):
+        print("{:24} {:8.3f} s {:8.1f} MB/s {:6.2f}x".format(name, elapsed, size / elapsed / 1e6, baseline / elapsed))
+
+    print("{} bodies, {:.1f} MB, {} cores".format(bodies, size / 1e6, os.cpu_count()))
+
+    # The first round imports the parser backends.
+    serial(jobs[:len(data)])
+    baseline = timed(lambda: serial(jobs))
+    report("serial", baseline)
+
+    report("threads ({})".format(os.cpu_count()), timed(lambda: threaded(jobs, os.cpu_count() or 1)))
+
+    for workers in worker_counts():
+        with ParsePool(workers=workers, min_size=0) as pool:
+            # Start the workers and import the parsers in them before timing.
+            pooled(jobs[:workers * 2], pool)
+            report("pool ({} workers)".format(workers), timed(lambda: pooled(jobs, pool)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures building the offline timetable from travel advice, and its earliest arrival queries.
+
+Usage: python -m benchmarks.bench_planner [lines] [stops per line]
+"""
+import datetime
+import random
+import sys
+import time
+
+from benchmarks.fixtures import station_names
+from nsapi.modules.planner import Timetable
+from nsapi.modules.records import Stop, TravelAdvice
+
+_zone = datetime.timezone(datetime.timedelta(hours=2))
+
+
+def network(lines: int, stops: int, day: datetime.date = datetime.date(2026, 10, 18)):
+    """
+    Creates the travel advice of a day of trains on random lines between a pool of stations,
+    one trip per line every 15 minutes.
+
+    :return: A list of TravelAdvice records, and the station names.
+    :rtype: tuple
+    """
+
+    rng = random.Random(0)
+    names = station_names(lines * stops // 3)
+    start = datetime.datetime(day.year, day.month, day.day, 6, tzinfo=_zone)
+
+    advices = []
+    for line in range(lines):
+        route = rng.sample(names, stops)
+        offset = rng.randrange(15)
+        for trip in range(18 * 4):
+            departure = start + datetime.timedelta(minutes=offset + trip * 15)
+            part = [Stop(name=name, arrival_time=departure + datetime.timedelta(minutes=i * 4), track=None, track_changed=None) for i, name in enumerate(route)]
+            advices.append(TravelAdvice(
+                transfers=0, optimal=True, status="VOLGENS-PLAN", travel_time_planned=None, travel_time_actual=None,
+                departure_time_planned=part[0].arrival_time, departure_time_actual=part[0].arrival_time,
+                arrival_time_planned=part[-1].arrival_time, arrival_time_actual=part[-1].arrival_time,
+                type="TRAIN", carrier="NS", commute_type="Intercity", ride_id=str(line * 1000 + trip), state="VOLGENS-PLAN",
+                details=[], parts=[part]
+            ))
+
+    return advices, names
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    stops = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+    advices, _ = network(lines, stops)
+
+    # Only stations on a line, the timetable rejects the others.
+    served = sorted({stop.name for advice in advices for stop in advice.parts[0]})
+
+    timetable = Timetable(max_age=3600)
+    started = time.perf_counter()
+    timetable.add(advices)
+    timetable.earliest_arrival(served[0], served[1], advices[0].departure_time_planned)
+    print("{} connections built in {:.1f} ms".format(len(timetable), (time.perf_counter() - started) * 1e3))
+
+    rng = random.Random(1)
+    queries = [(rng.choice(served), rng.choice(served), advices[0].departure_time_planned + datetime.timedelta(minutes=rng.randrange(12 * 60))) for _ in range(500)]
+
+    found = 0
+    started = time.perf_counter()
+    for from_station, to_station, departure in queries:
+        found += timetable.earliest_arrival(from_station, to_station, departure) is not None
+    elapsed = time.perf_counter() - started
+
+    print("{} queries, {} answered, {:.3f} ms/query".format(len(queries), found, elapsed / len(queries) * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the per-carrier cost of the single-pass pricing parser with the
+chained find() lookups it replaced.
+
+Usage: python -m benchmarks.bench_pricing [carriers]
+"""
+import sys
+import time
+
+from benchmarks.fixtures import pricing_xml
+from nsapi.modules.parsing import backends
+from nsapi.modules.pricing import _build_fare
+
+
+def _build_price_chained(price_o):
+    def fare(travel_type, travel_class, discount):
+        return float(price_o.find("ReisType", {"name": travel_type}).find("ReisKlasse", {"klasse": travel_class}).find("Kortingsprijs", {"name": discount})["prijs"])
+
+    return {
+        "carrier": price_o["naam"],
+        "price_units": price_o.find("Tariefeenheden").text,
+        "return": {
+            "first-class": {"full": fare("Retour", "1", "vol tarief"), "20-off": fare("Retour", "1", "20% korting"), "40-off": fare("Retour", "1", "40% korting")},
+            "standard-class": {"full": fare("Retour", "2", "vol tarief"), "20-off": fare("Retour", "2", "20% korting"), "40-off": fare("Retour", "2", "40% korting")},
+        },
+        "one-way": {
+            "first-class": {"full": fare("Enkele reis", "1", "vol tarief"), "20-off": fare("Enkele reis", "1", "20% korting"), "40-off": fare("Enkele reis", "1", "40% korting")},
+            "standard-class": {"full": fare("Enkele reis", "2", "vol tarief"), "20-off": fare("Enkele reis", "2", "20% korting"), "40-off": fare("Enkele reis", "2", "40% korting")},
+        }
+    }
+
+
+def run(build_f, backend: str, data: bytes, carriers: int):
+    start = time.perf_counter()
+    prices = [build_f(price_o) for price_o in backends[backend]([data], "VervoerderKeuze")]
+    elapsed = time.perf_counter() - start
+
+    assert len(prices) == carriers
+    return elapsed / carriers * 1e6, prices
+
+
+def main():
+    carriers = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    data = pricing_xml(carriers)
+
+    for backend in ("soup", "lxml"):
+        before, old = run(_build_price_chained, backend, data, carriers)
+        after, new = run(_build_fare, backend, data, carriers)
+
+        assert old == new
+        print("{:5} chained: {:8.1f} us/carrier  single-pass: {:8.1f} us/carrier  ({:.1f}x)".format(backend, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
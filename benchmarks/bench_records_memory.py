@@ -0,0 +1,38 @@
+"""
+Compares the memory held by parsed results as nested dictionaries and as __slots__ records.
+
+Usage: python -m benchmarks.bench_records_memory [boards]
+"""
+import sys
+import tracemalloc
+
+from benchmarks.fixtures import departures_xml, travel_recommendations_xml
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+
+
+def measure(parse_f, data: bytes, copies: int, records: bool):
+    tracemalloc.start()
+    results = [parse_f([data], records=records) for _ in range(copies)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del results
+    return size
+
+
+def main():
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    for name, parse_f, data in (
+            ("departures", parse_departures, departures_xml(60)),
+            ("travel advice", parse_travel_recommendations, travel_recommendations_xml(15, 2, 8))):
+        as_dicts = measure(parse_f, data, boards, False)
+        as_records = measure(parse_f, data, boards, True)
+        print("{:14} dicts: {:8.1f} KiB  records: {:8.1f} KiB  ({:.0f}% less)".format(
+            name, as_dicts / 1024, as_records / 1024, 100 - as_records / as_dicts * 100
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures StationIndex lookups per second against a full-size station catalogue.
+
+Usage: python -m benchmarks.bench_station_index [stations] [lookups]
+"""
+import random
+import sys
+import time
+
+from benchmarks.fixtures import stations_xml
+from nsapi.modules.parsing import backends
+from nsapi.modules.station_index import StationIndex
+from nsapi.modules.stations import _build_station
+
+
+def measure(name: str, f, queries):
+    start = time.perf_counter()
+    for query in queries:
+        f(query)
+    elapsed = time.perf_counter() - start
+
+    print("{:8} {:10.0f} lookups/s".format(name, len(queries) / elapsed))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    stations = {}
+    for station_o in backends["lxml"]([stations_xml(count)], "Station"):
+        station = _build_station(station_o)
+        stations[station["code"]] = station
+
+    start = time.perf_counter()
+    index = StationIndex(stations)
+    print("built index of {} stations in {:.1f} ms".format(len(index), (time.perf_counter() - start) * 1000))
+
+    rng = random.Random(0)
+    names = [station["name"]["full"] for station in stations.values()]
+    exact = [rng.choice(names) for _ in range(lookups)]
+    prefixes = [name[:rng.randint(2, 6)].lower() for name in exact]
+    typos = []
+    for name in exact:
+        i = rng.randrange(len(name))
+        typos.append(name[:i] + name[i + 1:])
+
+    measure("exact", index.get, exact)
+    measure("prefix", index.prefix, prefixes)
+    measure("fuzzy", index.fuzzy, typos)
+    measure("search", index.search, typos)
+
+
+if __name__ == "__main__":
+    main()
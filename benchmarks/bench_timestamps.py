@@ -0,0 +1,53 @@
+"""
+Microbenchmarks of the shared timestamp parser against the per-module code it replaced.
+
+Usage: python -m benchmarks.bench_timestamps [timestamps]
+"""
+import datetime
+import random
+import sys
+import timeit
+
+from nsapi.modules.timestamps import parse_timestamp, parse_timestamps
+
+
+def _legacy_convert_to_datetime(iso8601_datestr: str):
+    date, time = iso8601_datestr.split("T")
+    time, timezone = time.split("+")
+    tzd, tzh, tzm, tzs = map(int, list(timezone))
+
+    dy, dm, dd = map(int, date.split("-"))
+    th, tm, ts = map(int, time.split(":"))
+    return datetime.datetime(dy, dm, dd, th, tm, ts, tzinfo=datetime.timezone(datetime.timedelta(days=tzd, hours=tzh, minutes=tzm, seconds=tzs)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    rng = random.Random(0)
+    # A day of stop times: many timestamps repeat, like in a page of travel advice.
+    values = ["2026-10-18T{:02d}:{:02d}:00+0200".format(rng.randrange(6, 24), rng.randrange(60)) for _ in range(count)]
+    assert [_legacy_convert_to_datetime(v) for v in values[:100]] == [parse_timestamp(v) for v in values[:100]]
+
+    scenarios = [
+        ("legacy split", lambda: [_legacy_convert_to_datetime(v) for v in values]),
+        ("parse_timestamp (uncached)", lambda: [parse_timestamp.__wrapped__(v) for v in values]),
+        ("parse_timestamp", lambda: [parse_timestamp(v) for v in values]),
+        ("parse_timestamps (batch)", lambda: parse_timestamps(values)),
+    ]
+
+    try:
+        from nsapi.modules.timestamps import to_datetime64
+        import numpy  # noqa: F401
+
+        scenarios.append(("to_datetime64 (numpy)", lambda: to_datetime64(values)))
+    except ImportError:
+        pass
+
+    for name, f in scenarios:
+        best = min(timeit.repeat(f, number=1, repeat=5))
+        print("{:26} {:8.3f} us/timestamp".format(name, best / count * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Generators for synthetic, but realistically shaped, NS API responses.
+"""
+
+
+def _time(day: str, minutes: int):
+    return "{}T{:02d}:{:02d}:00+0200".format(day, (minutes // 60) % 24, minutes % 60)
+
+
+def pricing_xml(carriers: int = 5):
+    out = ['<?xml version="1.0" encoding="UTF-8"?><VervoerderKeuzes>']
+    for c in range(carriers):
+        out.append('<VervoerderKeuze naam="Carrier {}"><Tariefeenheden>{}</Tariefeenheden>'.format(c, 40 + c % 200))
+        for travel_type in ("Enkele reis", "Retour"):
+            out.append('<ReisType name="{}">'.format(travel_type))
+            for travel_class in ("1", "2"):
+                out.append('<ReisKlasse klasse="{}"><Totaal>{}</Totaal>'.format(travel_class, 10 + c % 50))
+                for i, discount in enumerate(("vol tarief", "20% korting", "40% korting")):
+                    out.append('<Kortingsprijs name="{}" prijs="{:.2f}"/>'.format(discount, 25.0 - i * 5 + c % 7))
+                out.append("</ReisKlasse>")
+            out.append("</ReisType>")
+        out.append("</VervoerderKeuze>")
+    out.append("</VervoerderKeuzes>")
+
+    return "".join(out).encode("utf-8")
+
+
+_place_parts = ["Amster", "Rotter", "Utr", "Gro", "Zwo", "Leeu", "Ein", "Hil", "Apel", "Arn", "Dor", "Bre", "Ven", "Roer", "Haar", "Alk", "Hoo", "Goud", "Delf", "Lei", "Ens", "Den", "Ass", "Mep", "Sne", "Hee", "Tiel", "Oss", "Weert", "Sit"]
+_place_suffixes = ["dam", "ingen", "echt", "hoven", "sum", "lem", "hem", "ouwe", "drecht", "lo", "chede", "veen", "terp", "waarden", "burg", "rode"]
+_station_suffixes = ["", " Centraal", " Zuid", " Noord", " West", " Oost", " Airport", " Strand"]
+
+
+def station_names(count: int):
+    names = []
+    i = 0
+    while len(names) < count:
+        place = _place_parts[i % len(_place_parts)] + _place_suffixes[(i // len(_place_parts)) % len(_place_suffixes)]
+        suffix = _station_suffixes[(i // (len(_place_parts) * len(_place_suffixes))) % len(_station_suffixes)]
+        if i % 17 == 0:
+            place = place.replace("e", "ë", 1)
+        names.append(place + suffix)
+        i += 1
+
+    return names
+
+
+def stations_xml(count: int = 600):
+    out = ['<?xml version="1.0" encoding="UTF-8"?><Stations>']
+    for i, name in enumerate(station_names(count)):
+        code = "{}{}".format(name[:2].upper(), i)
+        out.append(
+            "<Station><Code>{code}</Code><Type>stoptreinstation</Type>"
+            "<Namen><Kort>{short}</Kort><Middel>{middle}</Middel><Lang>{full}</Lang></Namen>"
+            "<Land>NL</Land><UICCode>{uic}</UICCode><Lat>{lat:.6f}</Lat><Lon>{lon:.6f}</Lon>"
+            "<Synoniemen><Synoniem>{synonym}</Synoniem></Synoniemen></Station>".format(
+                code=code, short=name[:10], middle=name[:16], full=name, uic=8400000 + i,
+                lat=50.75 + (i * 7919 % 1000) / 1000 * 2.8, lon=3.35 + (i * 104729 % 1000) / 1000 * 3.85,
+                synonym=name.upper()
+            )
+        )
+    out.append("</Stations>")
+
+    return "".join(out).encode("utf-8")
+
+
+def departures_xml(trains: int = 60, day: str = "2026-10-18"):
+    out = ['<?xml version="1.0" encoding="UTF-8"?><ActueleVertrekTijden>']
+    for i in range(trains):
+        out.append("<VertrekkendeTrein><RitNummer>{}</RitNummer><VertrekTijd>{}</VertrekTijd>".format(1000 + i, _time(day, 360 + i * 3)))
+        if i % 3 == 0:
+            out.append("<VertrekVertraging>PT{0}M</VertrekVertraging><VertrekVertragingTekst>+{0} min</VertrekVertragingTekst>".format(i % 7 + 1))
+        out.append("<EindBestemming>{}</EindBestemming><TreinSoort>{}</TreinSoort>".format(station_names(20)[i % 20], ("Intercity", "Sprinter", "Intercity direct")[i % 3]))
+        if i % 2:
+            out.append("<RouteTekst>{}, {}</RouteTekst>".format(station_names(20)[(i + 3) % 20], station_names(20)[(i + 5) % 20]))
+        out.append('<Vervoerder>{}</Vervoerder><VertrekSpoor wijziging="{}">{}</VertrekSpoor>'.format(("NS", "Arriva", "Keolis")[i % 3], "true" if i % 4 == 0 else "false", 1 + i % 12))
+        if i % 5 == 0:
+            out.append("<ReisTip>Stopt niet in Amsterdam Muiderpoort</ReisTip>")
+        if i % 6 == 0:
+            out.append("<Opmerkingen><Opmerking> Rijdt vandaag niet </Opmerking></Opmerkingen>")
+        out.append("</VertrekkendeTrein>")
+    out.append("</ActueleVertrekTijden>")
+
+    return "".join(out).encode("utf-8")
+
+
+def travel_recommendations_xml(possibilities: int = 15, parts: int = 2, stops: int = 8, day: str = "2026-10-18"):
+    names = station_names(parts * stops)
+    out = ['<?xml version="1.0" encoding="UTF-8"?><ReisMogelijkheden>']
+    for i in range(possibilities):
+        start = 360 + i * 15
+        duration = parts * stops * 4
+        out.append(
+            "<ReisMogelijkheid><AantalOverstappen>{}</AantalOverstappen><GeplandeReisTijd>{}:{:02d}</GeplandeReisTijd>"
+            "<ActueleReisTijd>{}:{:02d}</ActueleReisTijd><Optimaal>{}</Optimaal>"
+            "<GeplandeVertrekTijd>{}</GeplandeVertrekTijd><ActueleVertrekTijd>{}</ActueleVertrekTijd>"
+            "<GeplandeAankomstTijd>{}</GeplandeAankomstTijd><ActueleAankomstTijd>{}</ActueleAankomstTijd><Status>VOLGENS-PLAN</Status>".format(
+                parts - 1, duration // 60, duration % 60, duration // 60, duration % 60, "true" if i == 0 else "false",
+                _time(day, start), _time(day, start), _time(day, start + duration), _time(day, start + duration)
+            )
+        )
+        for p in range(parts):
+            out.append(
+                '<ReisDeel reisSoort="TRAIN"><Vervoerder>NS</Vervoerder><VervoerType>Intercity</VervoerType><RitNummer>{}</RitNummer>'
+                "<Status>VOLGENS-PLAN</Status><Reisdetails><Reisdetail>Intercity richting {}</Reisdetail></Reisdetails>".format(3000 + i * 10 + p, names[-1])
+            )
+            for s in range(stops):
+                minutes = start + (p * stops + s) * 4
+                out.append("<ReisStop><Naam>{}</Naam><Tijd>{}</Tijd>".format(names[p * stops + s], _time(day, minutes)))
+                if s in (0, stops - 1):
+                    out.append('<Spoor wijziging="{}">{}</Spoor>'.format("true" if (i + s) % 5 == 0 else "false", 1 + (i + s) % 9))
+                out.append("</ReisStop>")
+            out.append("</ReisDeel>")
+        out.append("</ReisMogelijkheid>")
+    out.append("</ReisMogelijkheden>")
+
+    return "".join(out).encode("utf-8")
+
+
+def disruptions_xml(unplanned: int = 40, planned: int = 120, day: str = "2026-10-18"):
+    names = station_names(40)
+    out = ['<?xml version="1.0" encoding="UTF-8"?><Storingen><Ongepland>']
+    for i in range(unplanned):
+        out.append(
+            "<Storing><id>prio-{}</id><Traject>{} - {}</Traject><Reden>{}</Reden>"
+            "<Bericht>Tussen {} en {} rijden minder treinen.</Bericht><Datum>{}</Datum></Storing>".format(
+                13000 + i, names[i % 40], names[(i + 7) % 40], ("seinstoring", "defecte trein", "aanrijding", "wisselstoring")[i % 4],
+                names[i % 40], names[(i + 7) % 40], _time(day, 300 + i * 11)
+            )
+        )
+    out.append("</Ongepland><Gepland>")
+    for i in range(planned):
+        out.append(
+            "<Storing><id>{}</id><Traject>{} - {}</Traject><Periode>zaterdag {} en zondag {} oktober</Periode>"
+            "<Advies>Reis via {}. Houd rekening met 30 minuten extra reistijd.</Advies>"
+            "<Bericht>Door werkzaamheden rijden er geen treinen.</Bericht></Storing>".format(
+                2026000 + i, names[i % 40], names[(i + 3) % 40], 10 + i % 20, 11 + i % 20, names[(i + 11) % 40]
+            )
+        )
+    out.append("</Gepland></Storingen>")
+
+    return "".join(out).encode("utf-8")
+
+
+def responses(scale: int = 1):
+    """
+    Gets a response body for every endpoint in urlmap.
+
+    :param scale: Multiplies the amount of records in every response.
+    :return: A dictionary of endpoint name to body.
+    :rtype: dict
+    """
+
+    return {
+        "departures": departures_xml(60 * scale),
+        "stations": stations_xml(600 * scale),
+        "disruptions": disruptions_xml(40 * scale, 120 * scale),
+        "pricing": pricing_xml(5 * scale),
+        "travel-recommendations": travel_recommendations_xml(15 * scale, 2, 8),
+    }
@@ -0,0 +1,128 @@
+"""
+A local HTTP server that stands in for the NS API, serving the fixture responses with a configurable latency.
+
+Usage: python -m benchmarks.stub_server [port] [latency in ms]
+"""
+import gzip
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import responses
+from nsapi.modules.urls import urlmap
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count()
+
+        body = stub.bodies.get(urlsplit(self.path).path.rstrip("/"))
+        if body is None:
+            self.send_error(404)
+            return
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        if stub.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = stub.compressed(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    def __init__(self, bodies: dict = None, latency: float = 0.0, compress: bool = False, port: int = 0):
+        """
+        Serves a body per endpoint on the path of that endpoint, like /ns-api-avt.
+
+        :param bodies: A dictionary of endpoint name to body, the fixtures.responses() if None.
+        :param latency: Seconds to wait before every response.
+        :param compress: Gzip the responses when the client accepts it.
+        :param port: The port to listen on, a free one if 0.
+        """
+
+        bodies = bodies if bodies is not None else responses()
+        self.bodies = {urlsplit(urlmap[endpoint]).path: body for endpoint, body in bodies.items()}
+        self.latency = latency
+        self.compress = compress
+        self.requests = 0
+
+        self._gzipped = {}
+        self._lock = threading.Lock()
+        self._original_urlmap = None
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}".format(self.server.server_port)
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def compressed(self, body: bytes):
+        with self._lock:
+            if body not in self._gzipped:
+                self._gzipped[body] = gzip.compress(body)
+
+            return self._gzipped[body]
+
+    def start(self):
+        """
+        Starts serving, and points urlmap at this server until stop().
+
+        :return: The server.
+        :rtype: StubServer
+        """
+
+        self._thread.start()
+
+        self._original_urlmap = dict(urlmap)
+        for endpoint, url in self._original_urlmap.items():
+            urlmap[endpoint] = self.url + urlsplit(url).path
+
+        return self
+
+    def stop(self):
+        if self._original_urlmap is not None:
+            urlmap.update(self._original_urlmap)
+            self._original_urlmap = None
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.0
+
+    stub = StubServer(latency=latency, compress=True, port=port)
+    print("Serving the NS API fixtures on {}".format(stub.url))
+    stub.server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
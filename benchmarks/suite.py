@@ -0,0 +1,232 @@
+"""
+The benchmark suite: parse throughput per endpoint, end-to-end NSApi latency against the stub server,
+concurrent fan-out, peak memory and import time. Every result is lower-is-better (seconds or bytes).
+
+Usage:
+    python -m benchmarks.suite [--scale N] [--latency MS] [--rounds N] [--only PREFIX] [--json FILE]
+    python -m benchmarks.suite --json new.json --compare baseline.json [--tolerance 0.2]
+
+With --compare, the exit status is 1 if a result got worse than the baseline by more than the tolerance.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_import import import_times
+from benchmarks.fixtures import responses
+from benchmarks.stub_server import StubServer
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.disruptions import parse_disruptions
+from nsapi.modules.parsing import backends
+from nsapi.modules.pricing import parse_pricing
+from nsapi.modules.stations import parse_stations
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+from nsapi.nsapi import NSApi
+
+PARSERS = {
+    "departures": parse_departures,
+    "stations": parse_stations,
+    "disruptions": parse_disruptions,
+    "pricing": parse_pricing,
+    "travel-recommendations": parse_travel_recommendations,
+}
+
+CALLS = {
+    "departures": lambda api: api.get_departures("UT"),
+    "stations": lambda api: api.get_stations(),
+    "disruptions": lambda api: api.get_disruptions(True),
+    "pricing": lambda api: api.get_price("UT", "ASD"),
+    "travel-recommendations": lambda api: api.get_travel_recommendations("UT", "ASD"),
+}
+
+
+def _time(f, rounds: int):
+    f()
+
+    timings = []
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            f()
+            timings.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+
+    return timings
+
+
+def _result(name: str, unit: str, values: list, **extra):
+    result = {
+        "name": name,
+        "unit": unit,
+        "value": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "rounds": len(values),
+    }
+    result.update(extra)
+
+    return result
+
+
+def parse_throughput(bodies: dict, rounds: int):
+    for endpoint, parse_f in PARSERS.items():
+        body = bodies[endpoint]
+        for backend in backends:
+            for records in (False, True):
+                timings = _time(lambda: parse_f([body], backend, records), rounds)
+                yield _result(
+                    "parse/{}/{}/{}".format(endpoint, backend, "records" if records else "dicts"), "s", timings,
+                    bytes=len(body), mb_per_s=len(body) / statistics.median(timings) / 1e6
+                )
+
+
+def memory_peak(bodies: dict):
+    for endpoint, parse_f in PARSERS.items():
+        for records in (False, True):
+            gc.collect()
+            tracemalloc.start()
+            result = parse_f([bodies[endpoint]], None, records)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del result
+
+            yield _result("memory/{}/{}".format(endpoint, "records" if records else "dicts"), "bytes", [peak], retained=retained)
+
+
+def end_to_end(rounds: int, api: NSApi):
+    for endpoint, call in CALLS.items():
+        yield _result("e2e/{}".format(endpoint), "s", _time(lambda: call(api), rounds))
+
+
+def fan_out(api: NSApi, stations: int, rounds: int):
+    codes = ["S{}".format(i) for i in range(stations)]
+
+    def serial():
+        for code in codes:
+            api.get_departures(code)
+
+    def concurrent(max_concurrency):
+        return lambda: list(api.get_departures_many(codes, max_concurrency))
+
+    yield _result("fanout/{}/serial".format(stations), "s", _time(serial, rounds))
+    for max_concurrency in (4, 8, 16):
+        yield _result("fanout/{}/concurrency-{}".format(stations, max_concurrency), "s", _time(concurrent(max_concurrency), rounds))
+
+
+def import_time(rounds: int):
+    for statement, timings in import_times(rounds).items():
+        yield _result("import/{}".format(statement), "s", timings)
+
+
+def run(scale: int = 1, latency: float = 0.0, rounds: int = 20, only: str = ""):
+    """
+    Runs the suite.
+
+    :param scale: Multiplies the amount of records in every fixture.
+    :param latency: Seconds the stub server waits before every response.
+    :param rounds: The amount of timed rounds per benchmark.
+    :param only: Only run the benchmarks whose name starts with this.
+    :return: A dictionary with the environment and the results.
+    :rtype: dict
+    """
+
+    bodies = responses(scale)
+    results = []
+
+    def add(group):
+        for result in group:
+            if result["name"].startswith(only):
+                results.append(result)
+                print("{:50} {:>12.6g} {}".format(result["name"], result["value"], result["unit"]), file=sys.stderr)
+
+    def selected(*groups):
+        return any(only.startswith(group) or group.startswith(only) for group in groups)
+
+    if selected("parse"):
+        add(parse_throughput(bodies, rounds))
+    if selected("memory"):
+        add(memory_peak(bodies))
+    if selected("import"):
+        add(import_time(max(3, rounds // 4)))
+
+    if selected("e2e", "fanout"):
+        with StubServer(bodies, latency=latency):
+            # Coalescing would hide the cost of the fan-out, so every request goes upstream.
+            api = NSApi("user", "password", coalesce=False)
+            add(end_to_end(rounds, api))
+            add(fan_out(api, 32, max(3, rounds // 4)))
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "latency": latency,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float):
+    """
+    Finds the results that got worse than the baseline.
+
+    :param current: The output of run().
+    :param baseline: An earlier output of run().
+    :param tolerance: The allowed relative increase, 0.2 for 20%.
+    :return: A list of (name, baseline value, current value) tuples.
+    :rtype: list
+    """
+
+    before = {result["name"]: result["value"] for result in baseline["results"]}
+
+    regressions = []
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old and result["value"] > old * (1 + tolerance):
+            regressions.append((result["name"], old, result["value"]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the nsapi benchmark suite.")
+    parser.add_argument("--scale", type=int, default=1, help="multiplies the amount of records in every fixture")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds the stub server waits before every response")
+    parser.add_argument("--rounds", type=int, default=20, help="timed rounds per benchmark")
+    parser.add_argument("--only", default="", help="only run the benchmarks whose name starts with this")
+    parser.add_argument("--json", help="write the results to this file, - for stdout")
+    parser.add_argument("--compare", help="a baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression, 0.2 for 20%%")
+    args = parser.parse_args()
+
+    output = run(args.scale, args.latency / 1000, args.rounds, args.only)
+
+    if args.json == "-":
+        json.dump(output, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(output, json.load(f), args.tolerance)
+
+        for name, old, new in regressions:
+            print("REGRESSION {}: {:.6g} -> {:.6g} (+{:.0f}%)".format(name, old, new, (new / old - 1) * 100), file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,11 @@
-from .nsapi import NSApi
+def __getattr__(name):
+    # NSApi is imported on first use, so "import nsapi" does not load requests and the parsers.
+    if name == "NSApi":
+        from .nsapi import NSApi
+
+        return NSApi
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+__all__ = ["NSApi"]
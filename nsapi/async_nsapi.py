@@ -0,0 +1,375 @@
+import asyncio
+import contextvars
+import datetime
+import functools
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+
+from nsapi.modules.cassette import Cassette, CassetteEntry, cassette_key
+from nsapi.modules.departures import departures_options, parse_departures
+from nsapi.modules.disruptions import disruptions_options, parse_disruptions
+from nsapi.modules.exceptions import CassetteMissException
+from nsapi.modules.instrumentation import current, measure
+from nsapi.modules.login import AuthState
+from nsapi.modules.pricing import parse_pricing, pricing_options
+from nsapi.modules.scheduler import Scheduler
+from nsapi.modules.singleflight import SingleFlight
+from nsapi.modules.station_cache import StationCache
+from nsapi.modules.stations import parse_stations
+from nsapi.modules.transport import TransportConfig
+from nsapi.modules.travel_recommendations import parse_travel_recommendations, travel_recommendations_options
+from nsapi.modules.urls import conditional_headers, endpoint_url, urlmap
+
+if TYPE_CHECKING:
+    from nsapi.modules.parse_pool import ParsePool
+
+
+class AsyncSchedulingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, scheduler: Scheduler, transport: httpx.AsyncBaseTransport = None):
+        """
+        An httpx transport that sends every request through a Scheduler, see SchedulingAdapter.
+
+        :param scheduler: The scheduler.
+        :param transport: The transport to send with, a default AsyncHTTPTransport if None.
+        """
+
+        self.scheduler = scheduler
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request):
+        attempt = 0
+        while True:
+            breaker, trial = await self.scheduler.before_async(str(request.url))
+
+            try:
+                r = await self.transport.handle_async_request(request)
+            except (httpx.TransportError, httpx.TimeoutException):
+                delay = self.scheduler.after(breaker, attempt)
+                if delay is None:
+                    raise
+            except BaseException:
+                # Like a cancelled task or a cassette miss.
+                self.scheduler.abort(breaker, trial)
+                raise
+            else:
+                delay = self.scheduler.after(breaker, attempt, r.status_code, r.headers.get("Retry-After"))
+                if delay is None:
+                    return r
+
+                await r.aclose()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette, transport: httpx.AsyncBaseTransport = None):
+        """
+        An httpx transport that records responses to a Cassette and replays them from it, see CassetteAdapter.
+
+        :param cassette: The cassette.
+        :param transport: The transport to send with when recording, a default AsyncHTTPTransport if None.
+        """
+
+        self.cassette = cassette
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+
+    @staticmethod
+    def _response(request: httpx.Request, entry: CassetteEntry):
+        extensions = {"reason_phrase": entry.reason.encode("ascii", "replace")} if entry.reason else {}
+        return httpx.Response(entry.status_code, headers=entry.headers, content=entry.body, request=request, extensions=extensions)
+
+    async def handle_async_request(self, request: httpx.Request):
+        key = cassette_key(str(request.url))
+        loop = asyncio.get_running_loop()
+
+        if self.cassette.replays:
+            # Reading and decompressing from the archive blocks, so only responses in memory are replayed on the event loop.
+            entry = self.cassette.loaded(key)
+            if entry is None:
+                entry = await loop.run_in_executor(None, self.cassette.get, key)
+            if entry is not None:
+                delay = self.cassette.delay(entry)
+                if delay:
+                    await asyncio.sleep(delay)
+
+                return self._response(request, entry)
+
+            if not self.cassette.records:
+                raise CassetteMissException("No response was recorded for {}.".format(key))
+
+        started = time.perf_counter()
+        r = await self.transport.handle_async_request(request)
+        try:
+            body = await r.aread()
+        finally:
+            await r.aclose()
+        elapsed = time.perf_counter() - started
+
+        # Writing to the archive blocks, so do it off the event loop.
+        entry = await loop.run_in_executor(None, self.cassette.put, key, r.status_code, r.reason_phrase, r.headers.items(), body, elapsed)
+
+        return self._response(request, entry)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class AsyncNSApi:
+    def __init__(self, username: str, password: str, auth_ttl: float = None, parser: str = None, station_cache: str = None, max_connections: int = 100, max_keepalive_connections: int = 20, executor=None, coalesce: bool = False, records: bool = False, scheduler: Scheduler = None, transport_config: TransportConfig = None, parse_pool: "ParsePool" = None, cassette: Cassette = None, **client_options):
+        """
+        Creates an asyncio NSApi object. Every NSApi method is available as a coroutine.
+
+        All requests share one pooled httpx.AsyncClient. The responses are parsed with
+        the same parsers as NSApi, in an executor so the event loop is not blocked.
+        The credentials are verified on first use. Use as "async with AsyncNSApi(...) as api:",
+        or call aclose() when done.
+
+        :param username: Username for the NS Api.
+        :param password: Password for the NS Api.
+        :param auth_ttl: Seconds a verification stays valid, None for no expiry.
+        :param parser: The XML parser backend, "lxml" (streaming) or "soup". Uses the default backend if None.
+        :param station_cache: A file to keep the station list in between runs (optional).
+        :param max_connections: The maximum amount of open connections.
+        :param max_keepalive_connections: The maximum amount of idle connections kept open.
+        :param executor: The concurrent.futures executor to parse in, the loop's default executor if None.
+        :param coalesce: Let identical concurrent requests share one upstream request and its result.
+            The callers then get the same result object, which should not be modified.
+        :param records: Return compact record objects (see nsapi.modules.records) instead of dictionaries.
+        :param scheduler: A Scheduler to rate limit, retry and circuit-break all requests (optional).
+        :param transport_config: The timeouts, compression and HTTP version to use, the TransportConfig defaults if None.
+            The pool is sized by max_connections and max_keepalive_connections.
+        :param parse_pool: A ParsePool to parse large responses in worker processes instead of the executor (optional).
+        :param cassette: A Cassette to record the responses to, or replay them from (optional).
+        :param client_options: Extra keyword arguments for httpx.AsyncClient, like a transport.
+        """
+
+        self.auth = AuthState(auth_ttl)
+        self.parser = parser
+        self.station_cache = StationCache(station_cache) if station_cache is not None else None
+        self.executor = executor
+        self.inflight = SingleFlight() if coalesce else None
+        self.records = records
+        self.parse_pool = parse_pool
+
+        self.transport_config = transport_config if transport_config is not None else TransportConfig()
+        for key, value in self.transport_config.httpx_options().items():
+            client_options.setdefault(key, value)
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+
+        self.cassette = cassette
+        self.scheduler = scheduler
+        if cassette is not None or scheduler is not None:
+            transport = client_options.get("transport")
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(http2=client_options["http2"], limits=limits)
+
+            if cassette is not None:
+                transport = AsyncCassetteTransport(cassette, transport)
+            if scheduler is not None:
+                transport = AsyncSchedulingTransport(scheduler, transport)
+
+            client_options["transport"] = transport
+
+        self.client = httpx.AsyncClient(
+            auth=httpx.BasicAuth(username, password),
+            limits=limits,
+            event_hooks={"request": [self._request_hook], "response": [self._response_hook]},
+            **client_options
+        )
+
+        self._auth_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request_hook(self, request: httpx.Request):
+        request.extensions["nsapi_started"] = time.perf_counter()
+
+    async def _response_hook(self, r: httpx.Response):
+        # The response hook runs as soon as the headers arrived.
+        started = r.request.extensions.get("nsapi_started")
+        if started is not None:
+            r.request.extensions["nsapi_ttfb"] = time.perf_counter() - started
+
+        # A rejected verification is recorded by _check_logged_in instead.
+        if r.status_code in (401, 403) and not r.request.extensions.get("nsapi_verify"):
+            self.auth.reject(r.status_code)
+
+    async def _check_logged_in(self):
+        """
+        Throws an exception if the object is not logged in.
+        Uses the cached verification if there is one.
+
+        :return: Nothing.
+        """
+
+        if self.auth.cached():
+            return
+
+        async with self._auth_lock:
+            # Another task may have verified while we were waiting.
+            if self.auth.cached():
+                return
+
+            r = await self.client.get(urlmap["departures"], extensions={"nsapi_verify": True})
+            self.auth.record(r.status_code == 200)
+
+    async def _parse(self, parse_f, content: bytes, records: bool = None):
+        if records is None:
+            records = self.records
+
+        if self.parse_pool is not None and len(content) >= self.parse_pool.min_size:
+            started = time.perf_counter()
+            result = await asyncio.wrap_future(self.parse_pool.submit(parse_f, [content], self.parser, records))
+
+            m = current()
+            if m is not None:
+                m.parse += time.perf_counter() - started
+
+            return result
+
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the context, so the parser sees the measurement of this call.
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, parse_f, [content], self.parser, records))
+
+    async def _get(self, endpoint: str, options: dict, parse_f):
+        url = endpoint_url(endpoint, options)
+
+        async def fetch():
+            await self._check_logged_in()
+
+            with measure(endpoint) as m:
+                r = await self.client.get(url)
+                self.transport_config.metrics.record(url, r.status_code, r.request.extensions.get("nsapi_ttfb", 0.0), r.num_bytes_downloaded, len(r.content), r.headers.get("Content-Encoding"))
+                if m is not None:
+                    m.response(r)
+
+                result = await self._parse(parse_f, r.content)
+                if m is not None:
+                    m.finish(result)
+
+                return result
+
+        if self.inflight is None:
+            return await fetch()
+
+        return await self.inflight.do_async(url, fetch)
+
+    async def get_departures(self, station: str):
+        """
+        Gets the departures from a station, see NSApi.get_departures.
+
+        :param station: The station of which to get the departures.
+        :return: A dictionary with train information.
+        :rtype: dict
+        """
+
+        return await self._get("departures", departures_options(station), parse_departures)
+
+    async def get_departures_many(self, stations, max_concurrency: int = 8):
+        """
+        Gets the departures from many stations concurrently, see NSApi.get_departures_many.
+
+        :param stations: An iterable of station codes.
+        :param max_concurrency: The maximum amount of requests in flight at the same time.
+        :return: An async generator of (station, departures, exception) tuples. Either departures or exception is None.
+        """
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(station):
+            async with semaphore:
+                try:
+                    return station, await self.get_departures(station), None
+                except Exception as e:
+                    return station, None, e
+
+        tasks = [asyncio.ensure_future(fetch(station)) for station in stations]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_stations(self, refresh: bool = False):
+        """
+        Gets all the stations, see NSApi.get_stations.
+
+        :param refresh: Download the station list even if the cached one is fresh.
+        :return: A dictionary with station information.
+        :rtype: dict
+        """
+
+        if self.station_cache is not None and not refresh:
+            catalogue = self.station_cache.fresh()
+            if catalogue is not None:
+                return catalogue
+
+        await self._check_logged_in()
+
+        if self.station_cache is None:
+            r = await self.client.get(endpoint_url("stations"))
+            return await self._parse(parse_stations, r.content)
+
+        # Revalidates a stale catalogue like StationCache.get, with the request on the event loop.
+        r = await self.client.get(endpoint_url("stations"), headers=conditional_headers(*self.station_cache.validators(refresh)))
+        if r.status_code == 304:
+            stations = None
+        else:
+            # The catalogue is built from dictionaries.
+            stations = await self._parse(parse_stations, r.content, records=False)
+
+        # Writing the catalogue file blocks, so do it off the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.station_cache.update, stations, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+    async def get_disruptions(self, actual: bool, station: str = None, unplanned: bool = None):
+        """
+        Gets all the disruptions, see NSApi.get_disruptions.
+
+        :param actual: Only get disruptions that are going on at this time if True.
+        :param station: Get disruptions that affect this station.
+        :param unplanned: Whether to show unplanned disruptions too.
+        :return: A dictionary with disruption information.
+        """
+
+        return await self._get("disruptions", disruptions_options(actual, station, unplanned), parse_disruptions)
+
+    async def get_price(self, from_station, to_station, via_station=None, date=None):
+        """
+        Gets all the fares for one station to another, see NSApi.get_price.
+
+        :param from_station: The station code of the departure station.
+        :param to_station: The station code of the arrival station.
+        :param via_station: A station in between these (optional).
+        :param date: The date of departure (optional).
+        :return: A dictionary with pricing information.
+        """
+
+        return await self._get("pricing", pricing_options(from_station, to_station, via_station, date), parse_pricing)
+
+    async def get_travel_recommendations(self, from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None):
+        """
+        Get travel recommendations from one station to another, see NSApi.get_travel_recommendations.
+
+        :return: A list with travel recommendations.
+        :rtype: list
+        """
+
+        options = travel_recommendations_options(from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card)
+        return await self._get("travel-recommendations", options, parse_travel_recommendations)
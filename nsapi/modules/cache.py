@@ -0,0 +1,253 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+DEFAULT_TTLS = {
+    "departures": 30,
+    "disruptions": 60,
+    "pricing": 24 * 3600,
+    "travel-recommendations": 60,
+    "stations": 7 * 24 * 3600,
+}
+
+
+def cache_key(endpoint: str, options: dict = None):
+    """
+    Creates a cache key from an endpoint and the options handed to create_get_request.
+    The options are sorted and stringified, so equal requests get equal keys.
+
+    :param endpoint: The name of the endpoint in urlmap.
+    :param options: A dictionary of GET options (optional).
+    :return: The key.
+    :rtype: str
+    """
+
+    if not options:
+        return endpoint
+
+    return "{}?{}".format(endpoint, urlencode(sorted((str(k), str(v)) for k, v in options.items())))
+
+
+def sqlite_connection(local: threading.local, path: str):
+    """
+    Gets the calling thread's connection to an SQLite file, opening it in WAL mode the first time.
+    SQLite connections can not be shared between threads, so every thread has its own.
+
+    :param local: The threading.local to keep the connections in, one per file.
+    :param path: The path of the database file.
+    :return: The connection.
+    :rtype: sqlite3.Connection
+    """
+
+    db = getattr(local, "db", None)
+    if db is None:
+        db = sqlite3.connect(path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        local.db = db
+
+    return db
+
+
+class Cache:
+    def __init__(self, ttls: dict = None):
+        """
+        The base class of response caches. Caches store parsed results per endpoint and options.
+        Subclasses implement _get, _set and clear.
+
+        Cached results are shared between callers and should be treated as read-only.
+
+        :param ttls: Seconds a result stays valid, per endpoint. Endpoints that are missing use DEFAULT_TTLS.
+        """
+
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _get(self, key: str):
+        """
+        :return: A tuple (found, value).
+        :rtype: tuple
+        """
+
+        raise NotImplementedError
+
+    def _set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def fetch(self, endpoint: str, options: dict, fetch_f):
+        """
+        Gets a result from the cache, or calls fetch_f and caches its result.
+
+        :param endpoint: The name of the endpoint in urlmap.
+        :param options: The options handed to create_get_request.
+        :param fetch_f: A function without arguments that fetches the result.
+        :return: The result.
+        """
+
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return fetch_f()
+
+        key = cache_key(endpoint, options)
+        found, value = self._get(key)
+        if found:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = fetch_f()
+        self._set(key, value, ttl)
+
+        return value
+
+
+class MemoryCache(Cache):
+    def __init__(self, max_entries: int = 1024, ttls: dict = None):
+        """
+        An in-process LRU cache, bounded by the amount of results.
+        Results are kept as they are, so storing one costs no serialization.
+
+        :param max_entries: The maximum amount of cached results.
+        :param ttls: Seconds a result stays valid, per endpoint.
+        """
+
+        super().__init__(ttls)
+
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False, None
+
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _set(self, key: str, value, ttl: float):
+        evicted = 0
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(Cache):
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttls: dict = None):
+        """
+        An LRU cache in a local SQLite file, so several processes can share it.
+
+        :param path: The path of the database file.
+        :param max_bytes: The maximum total size of the cached results.
+        :param ttls: Seconds a result stays valid, per endpoint.
+        """
+
+        super().__init__(ttls)
+
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, expires REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL, value BLOB NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _connection(self):
+        return sqlite_connection(self._local, self.path)
+
+    def _get(self, key: str):
+        now = time.time()
+
+        with self._connection() as db:
+            row = db.execute("SELECT expires, value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False, None
+
+            expires, value = row
+            if expires < now:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return False, None
+
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+
+        return True, pickle.loads(value)
+
+    def _set(self, key: str, value, ttl: float):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        now = time.time()
+        evicted = 0
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, expires, accessed, size, value) VALUES (?, ?, ?, ?, ?)",
+                (key, now + ttl, now, len(data), data)
+            )
+
+            total, = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if total > self.max_bytes:
+                # Expired entries go first, then the least recently used ones.
+                evicted += db.execute("DELETE FROM entries WHERE expires < ?", (now,)).rowcount
+                total, = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+
+                for old_key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes:
+                        break
+
+                    db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    total -= size
+                    evicted += 1
+
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM entries")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
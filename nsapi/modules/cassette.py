@@ -0,0 +1,278 @@
+import io
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from nsapi.modules.cache import cache_key, sqlite_connection
+from nsapi.modules.exceptions import CassetteMissException
+from nsapi.modules.transport import TransportAdapter
+from nsapi.modules.urls import urlmap
+
+MODES = ("replay", "record", "once")
+
+# The body is stored decoded, so the headers describing its encoding on the wire are not replayed.
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def cassette_key(url: str):
+    """
+    Creates the key of a request url: the endpoint name with the sorted GET options, like cache_key.
+    The key does not depend on the host, so responses recorded from one server replay for another.
+
+    :param url: The url, as formed by endpoint_url.
+    :return: The key.
+    :rtype: str
+    """
+
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/")
+
+    endpoint = path
+    for name, endpoint_base in urlmap.items():
+        if urlsplit(endpoint_base).path == path:
+            endpoint = name
+            break
+
+    return cache_key(endpoint, dict(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+class CassetteEntry:
+    __slots__ = ("status_code", "reason", "headers", "body", "elapsed")
+
+    def __init__(self, status_code: int, reason: str, headers: list, body: bytes, elapsed: float):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay", latency: float = 0.0, jitter: float = 0.0, recorded_latency: bool = False, compression_level: int = 6):
+        """
+        An archive of responses in a local SQLite file, to record real responses once and replay them offline,
+        for deterministic runs and load tests. Responses are stored zlib-compressed, indexed by cassette_key.
+        Replayed responses are kept in memory after their first use.
+
+        :param path: The path of the archive file.
+        :param mode: "replay" to only replay, raising CassetteMissException for requests that were not recorded,
+            "record" to send every request and store its response, or "once" to replay what was recorded and record the rest.
+        :param latency: Seconds to wait before every replayed response.
+        :param jitter: The maximum amount of seconds the wait randomly differs from latency, in both directions.
+        :param recorded_latency: Add the time the response originally took to the wait.
+        :param compression_level: The zlib level to store the bodies with.
+        """
+
+        if mode not in MODES:
+            raise ValueError("Unknown cassette mode: {}".format(mode))
+
+        self.path = os.path.abspath(path)
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.recorded_latency = recorded_latency
+        self.compression_level = compression_level
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "recorded": 0
+        }
+
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, status_code INTEGER NOT NULL, reason TEXT, headers TEXT NOT NULL, "
+                "body BLOB NOT NULL, size INTEGER NOT NULL, elapsed REAL NOT NULL, recorded REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        return sqlite_connection(self._local, self.path)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    @property
+    def replays(self):
+        return self.mode != "record"
+
+    @property
+    def records(self):
+        return self.mode != "replay"
+
+    def loaded(self, key: str):
+        """
+        Gets a recorded response that is in memory already, without reading the archive.
+
+        :param key: The key, see cassette_key.
+        :return: The entry, or None if it was not used or recorded by this cassette yet.
+        :rtype: CassetteEntry
+        """
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._count("hits")
+
+        return entry
+
+    def get(self, key: str):
+        """
+        Gets a recorded response, reading it from the archive the first time.
+
+        :param key: The key, see cassette_key.
+        :return: The entry, or None if it was not recorded.
+        :rtype: CassetteEntry
+        """
+
+        entry = self.loaded(key)
+        if entry is not None:
+            return entry
+
+        row = self._connection().execute("SELECT status_code, reason, headers, body, elapsed FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        status_code, reason, headers, body, elapsed = row
+        entry = CassetteEntry(status_code, reason, json.loads(headers), zlib.decompress(body), elapsed)
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+
+        self._count("hits")
+        return entry
+
+    def put(self, key: str, status_code: int, reason: str, headers, body: bytes, elapsed: float = 0.0):
+        """
+        Records a response, replacing an earlier one with the same key.
+
+        :param key: The key, see cassette_key.
+        :param status_code: The status code.
+        :param reason: The reason phrase.
+        :param headers: The headers, as (name, value) pairs.
+        :param body: The decoded body.
+        :param elapsed: Seconds the response took.
+        :return: The entry.
+        :rtype: CassetteEntry
+        """
+
+        headers = [[name, value] for name, value in headers if name.lower() not in _WIRE_HEADERS]
+        entry = CassetteEntry(status_code, reason, headers, body, elapsed)
+
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, status_code, reason, headers, body, size, elapsed, recorded) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, status_code, reason, json.dumps(headers), zlib.compress(body, self.compression_level), len(body), elapsed, time.time())
+            )
+
+        with self._lock:
+            self._entries[key] = entry
+        self._count("recorded")
+
+        return entry
+
+    def delay(self, entry: CassetteEntry):
+        """
+        Gets the seconds to wait before replaying a response.
+
+        :param entry: The entry.
+        :return: The seconds.
+        :rtype: float
+        """
+
+        delay = self.latency
+        if self.recorded_latency:
+            delay += entry.elapsed
+        if self.jitter:
+            delay += random.uniform(-self.jitter, self.jitter)
+
+        return max(0.0, delay)
+
+    def sizes(self):
+        """
+        Gets the total size of the recorded bodies.
+
+        :return: A tuple of the decoded and the stored (compressed) bytes.
+        :rtype: tuple
+        """
+
+        return self._connection().execute("SELECT COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+
+    def keys(self):
+        return [key for key, in self._connection().execute("SELECT key FROM responses ORDER BY key")]
+
+    def clear(self):
+        with self._connection() as db:
+            db.execute("DELETE FROM responses")
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class CassetteAdapter(BaseAdapter):
+    def __init__(self, cassette: Cassette, adapter: BaseAdapter = None):
+        """
+        A requests transport adapter that records responses to a Cassette and replays them from it.
+        Mount it on a session: session.mount("https://", CassetteAdapter(cassette)).
+
+        :param cassette: The cassette.
+        :param adapter: The adapter to send with when recording, a default TransportAdapter if None.
+        """
+
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter if adapter is not None else TransportAdapter()
+
+    def _response(self, request, entry: CassetteEntry):
+        r = requests.Response()
+        r.status_code = entry.status_code
+        r.reason = entry.reason
+        r.headers = CaseInsensitiveDict(entry.headers)
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.url = request.url
+        r.request = request
+        r.connection = self
+        r.raw = io.BytesIO(entry.body)
+
+        return r
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = cassette_key(request.url)
+
+        if self.cassette.replays:
+            entry = self.cassette.get(key)
+            if entry is not None:
+                delay = self.cassette.delay(entry)
+                if delay:
+                    time.sleep(delay)
+
+                return self._response(request, entry)
+
+            if not self.cassette.records:
+                raise CassetteMissException("No response was recorded for {}.".format(key))
+
+        started = time.perf_counter()
+        r = self.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        body = r.content
+        entry = self.cassette.put(key, r.status_code, r.reason, r.headers.items(), body, time.perf_counter() - started)
+
+        return self._response(request, entry)
+
+    def close(self):
+        self.adapter.close()
@@ -0,0 +1,249 @@
+import re
+from array import array
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from nsapi.modules.departures import departures_options
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.timestamps import to_datetime64
+from nsapi.modules.urls import endpoint_url
+
+if TYPE_CHECKING:
+    from requests import Session
+
+_duration = re.compile(r"^P(?:T(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?)?$")
+
+
+def _delay_minutes(text: str):
+    if not text:
+        return 0
+
+    match = _duration.match(text)
+    if match is None:
+        return 0
+
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+class _Categories:
+    __slots__ = ("index", "codes")
+
+    def __init__(self):
+        self.index = {}
+        self.codes = array("i")
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.index)
+
+        self.codes.append(code)
+
+    def categories(self):
+        return list(self.index)
+
+
+class Columns:
+    """
+    A struct-of-arrays result. Every field is a NumPy array of the same length.
+    Fields listed in categorical are int32 codes into self.categories[field], -1 for missing values.
+    """
+
+    fields = ()
+    categorical = ()
+
+    def __init__(self, arrays: dict, categories: dict):
+        self.arrays = arrays
+        self.categories = categories
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["arrays"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def decoded(self, field: str):
+        """
+        Gets a categorical field as an array of values.
+
+        :param field: The name of the field.
+        :return: An object array of the values.
+        :rtype: numpy.ndarray
+        """
+
+        values = np.array(self.categories[field] + [None], dtype=object)
+        return values[self.arrays[field]]
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Concatenates results, for example all departure boards of a day. Categories are merged.
+
+        :param parts: An iterable of results of this type.
+        :return: One result.
+        """
+
+        parts = list(parts)
+        arrays = {}
+        categories = {}
+
+        for field in cls.fields:
+            if field not in cls.categorical:
+                arrays[field] = np.concatenate([part.arrays[field] for part in parts])
+                continue
+
+            merged = {}
+            codes = []
+            for part in parts:
+                # The trailing -1 keeps missing values missing.
+                remap = np.array([merged.setdefault(value, len(merged)) for value in part.categories[field]] + [-1], dtype=np.int32)
+                codes.append(remap[part.arrays[field]])
+
+            arrays[field] = np.concatenate(codes) if codes else np.empty(0, dtype=np.int32)
+            categories[field] = list(merged)
+
+        return cls(arrays, categories)
+
+    def to_pandas(self):
+        """
+        Converts the result to a pandas DataFrame. Numeric arrays are not copied where pandas allows it.
+
+        :return: A DataFrame with categorical columns for the categorical fields.
+        :rtype: pandas.DataFrame
+        """
+
+        import pandas as pd
+
+        data = {}
+        for field in self.fields:
+            if field in self.categorical:
+                data[field] = pd.Categorical.from_codes(self.arrays[field], self.categories[field])
+            else:
+                data[field] = self.arrays[field]
+
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """
+        Converts the result to a pyarrow Table, with dictionary arrays for the categorical fields.
+
+        :return: The table.
+        :rtype: pyarrow.Table
+        """
+
+        import pyarrow as pa
+
+        columns = []
+        for field in self.fields:
+            if field in self.categorical:
+                codes = self.arrays[field]
+                columns.append(pa.DictionaryArray.from_arrays(codes, pa.array(self.categories[field], type=pa.string()), mask=codes < 0))
+            elif self.arrays[field].dtype == object:
+                columns.append(pa.array(self.arrays[field], type=pa.string()))
+            else:
+                columns.append(pa.array(self.arrays[field]))
+
+        return pa.Table.from_arrays(columns, names=list(self.fields))
+
+
+class DepartureColumns(Columns):
+    fields = ("journey", "departure_time", "delay_minutes", "destination", "train_type", "carrier", "platform", "platform_changed")
+    categorical = ("destination", "train_type", "carrier", "platform")
+
+
+class StopColumns(Columns):
+    fields = ("possibility", "part", "name", "arrival_time", "track", "track_changed")
+    categorical = ("name", "track")
+
+
+def _text(element, name: str):
+    child = element.find(name)
+    if child is not None:
+        return child.text
+
+
+def parse_departures_columns(r, parser: str = None):
+    journeys = []
+    times = []
+    delays = array("i")
+    platform_changed = array("b")
+    categories = {field: _Categories() for field in DepartureColumns.categorical}
+
+    for train_o in iter_elements(r, "VertrekkendeTrein", parser):
+        platform_o = train_o.find("VertrekSpoor")
+
+        journeys.append(train_o.find("RitNummer").text)
+        times.append(train_o.find("VertrekTijd").text)
+        delays.append(_delay_minutes(_text(train_o, "VertrekVertraging")))
+        categories["destination"].append(train_o.find("EindBestemming").text)
+        categories["train_type"].append(train_o.find("TreinSoort").text)
+        categories["carrier"].append(train_o.find("Vervoerder").text)
+        categories["platform"].append(platform_o.text)
+        platform_changed.append(platform_o["wijziging"] == "true")
+
+    arrays = {
+        "journey": np.array(journeys, dtype=object),
+        "departure_time": to_datetime64(times),
+        "delay_minutes": np.frombuffer(delays, dtype=np.int32) if delays else np.empty(0, dtype=np.int32),
+        "platform_changed": np.frombuffer(platform_changed, dtype=np.int8).astype(bool) if platform_changed else np.empty(0, dtype=bool),
+    }
+    for field, values in categories.items():
+        arrays[field] = np.frombuffer(values.codes, dtype=np.int32) if values.codes else np.empty(0, dtype=np.int32)
+
+    return DepartureColumns(arrays, {field: values.categories() for field, values in categories.items()})
+
+
+def parse_stops_columns(r, parser: str = None):
+    possibilities = array("i")
+    parts = array("i")
+    times = []
+    track_changed = array("b")
+    categories = {field: _Categories() for field in StopColumns.categorical}
+
+    for possibility, possibility_o in enumerate(iter_elements(r, "ReisMogelijkheid", parser)):
+        for part, part_o in enumerate(possibility_o.find_all("ReisDeel")):
+            for stop_o in part_o.find_all("ReisStop"):
+                track_o = stop_o.find("Spoor")
+
+                possibilities.append(possibility)
+                parts.append(part)
+                times.append(stop_o.find("Tijd").text)
+                categories["name"].append(stop_o.find("Naam").text)
+                categories["track"].append(track_o.text if track_o is not None else None)
+                track_changed.append(track_o is not None and track_o.get("wijziging") == "true")
+
+    def ints(values):
+        return np.frombuffer(values, dtype=np.int32) if values else np.empty(0, dtype=np.int32)
+
+    arrays = {
+        "possibility": ints(possibilities),
+        "part": ints(parts),
+        "arrival_time": to_datetime64(times),
+        "track_changed": np.frombuffer(track_changed, dtype=np.int8).astype(bool) if track_changed else np.empty(0, dtype=bool),
+    }
+    for field, values in categories.items():
+        arrays[field] = ints(values.codes)
+
+    return StopColumns(arrays, {field: values.categories() for field, values in categories.items()})
+
+
+@instrumented("departures")
+def get_departures_columns_f(s: "Session", station: str, parser: str = None):
+    with s.get(endpoint_url("departures", departures_options(station)), stream=True) as r:
+        return parse_departures_columns(r, parser)
+
+
+@instrumented("travel-recommendations")
+def get_stops_columns_f(s: "Session", options: dict, parser: str = None):
+    with s.get(endpoint_url("travel-recommendations", options), stream=True) as r:
+        return parse_stops_columns(r, parser)
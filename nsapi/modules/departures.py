@@ -1,9 +1,15 @@
-import datetime
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
-from requests import Session
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.records import Departure
+from nsapi.modules.timestamps import parse_timestamp
+from nsapi.modules.urls import endpoint_url
 
-from nsapi.modules.urls import create_get_request, form_url, urlmap
+if TYPE_CHECKING:
+    from requests import Session
+
+    from nsapi.modules.parse_pool import ParsePool
 
 
 def _get_text_if_exists(tag):
@@ -11,43 +17,43 @@ def _get_text_if_exists(tag):
         return tag.text
 
 
-def get_departures_f(s: Session, station: str):
-    r = s.get(form_url(urlmap["departures"], create_get_request({"station": station})))
-    b = BeautifulSoup(r.content.decode("utf-8", "ignore"), "xml")
+def _build_departure(train_o, records: bool = False):
+    platform_o = train_o.find("VertrekSpoor")
+    build = Departure if records else Departure.build_dict
+
+    return build(
+        journey=train_o.find("RitNummer").text,
+        departure_time=parse_timestamp(train_o.find("VertrekTijd").text),
+        destination=train_o.find("EindBestemming").text,
+        train_type=train_o.find("TreinSoort").text,
+        carrier=train_o.find("Vervoerder").text,
+        route=_get_text_if_exists(train_o.find("RouteTekst")),
+        tip=_get_text_if_exists(train_o.find("ReisTip")),
+        comments=[comment_o.text.strip() for comment_o in train_o.find_all("Opmerking")],
+        platform=platform_o.text,
+        platform_changed=platform_o["wijziging"] == "true",
+        delay_time=_get_text_if_exists(train_o.find("VertrekVertraging")),
+        delay_reason=_get_text_if_exists(train_o.find("VertrekVertragingTekst"))
+    )
 
-    trains = {}
 
-    for train_o in b.find("ActueleVertrekTijden").find_all("VertrekkendeTrein"):
-        train = {
-            "journey": train_o.find("RitNummer").text,
-            "departure_time": train_o.find("VertrekTijd").text,
-            "destination": train_o.find("EindBestemming").text,
-            "train_type": train_o.find("TreinSoort").text,
-            "carrier": train_o.find("Vervoerder").text,
-            "route": _get_text_if_exists(train_o.find("RouteTekst")),
-            "tip": _get_text_if_exists(train_o.find("ReisTip")),
-            "departs_from": {
-                "platform": train_o.find("VertrekSpoor").text,
-                "changed": train_o.find("VertrekSpoor")["wijziging"] == "true"
-            },
-            "delay": {
-                "time": _get_text_if_exists(train_o.find("VertrekVertraging")),
-                "reason": _get_text_if_exists(train_o.find("VertrekVertragingTekst"))
-            }
-        }
-
-        train["comments"] = []
-        for comment_o in train_o.find_all("Opmerking"):
-            train["comments"].append(comment_o.text.strip())
-
-        date, time = train["departure_time"].split("T")
-        time, timezone = time.split("+")
-        tzd, tzh, tzm, tzs = map(int, list(timezone))
-
-        dy, dm, dd = map(int, date.split("-"))
-        th, tm, ts = map(int, time.split(":"))
-        train["departure_time"] = datetime.datetime(dy, dm, dd, th, tm, ts, tzinfo=datetime.timezone(datetime.timedelta(days=tzd, hours=tzh, minutes=tzm, seconds=tzs)))
-
-        trains[train["journey"]] = train
+def departures_options(station: str):
+    return {"station": station}
+
+
+def parse_departures(r, parser: str = None, records: bool = False):
+    trains = {}
+    for train_o in iter_elements(r, "VertrekkendeTrein", parser):
+        departure = _build_departure(train_o, records)
+        trains[departure.journey if records else departure["journey"]] = departure
 
     return trains
+
+
+@instrumented("departures")
+def get_departures_f(s: "Session", station: str, parser: str = None, records: bool = False, pool: "ParsePool" = None):
+    with s.get(endpoint_url("departures", departures_options(station)), stream=True) as r:
+        if pool is not None:
+            return pool.parse(parse_departures, r, parser, records)
+
+        return parse_departures(r, parser, records)
@@ -1,9 +1,15 @@
-import datetime
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
-from requests import Session
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.records import Disruption
+from nsapi.modules.timestamps import parse_timestamp
+from nsapi.modules.urls import conditional_headers, endpoint_url
 
-from nsapi.modules.urls import urlmap, form_url, create_get_request
+if TYPE_CHECKING:
+    from requests import Session
+
+    from nsapi.modules.parse_pool import ParsePool
 
 
 def _get_text_if_exists(tag):
@@ -11,7 +17,22 @@ def _get_text_if_exists(tag):
         return tag.text
 
 
-def get_disruptions_f(s: Session, actual: bool, station: str = None, unplanned: bool = None):
+def _build_disruption(disruption_o, planned: bool, records: bool = False):
+    build = Disruption if records else Disruption.build_dict
+    date = _get_text_if_exists(disruption_o.find("Datum"))
+
+    return build(
+        id=_get_text_if_exists(disruption_o.find("id")),
+        trajectory=_get_text_if_exists(disruption_o.find("Traject")),
+        period=_get_text_if_exists(disruption_o.find("Periode")),
+        reason=_get_text_if_exists(disruption_o.find("Reden")),
+        advice=_get_text_if_exists(disruption_o.find("Advies")),
+        message=_get_text_if_exists(disruption_o.find("Bericht")),
+        date=date if planned else parse_timestamp(date)
+    )
+
+
+def disruptions_options(actual: bool, station: str = None, unplanned: bool = None):
     options = {
         "actual": str(actual).lower(),
     }
@@ -20,43 +41,24 @@ def get_disruptions_f(s: Session, actual: bool, station: str = None, unplanned:
     if unplanned is not None:
         options["unplanned"] = str(unplanned).lower()
 
-    r = s.get(form_url(urlmap["disruptions"], create_get_request(options)))
-    b = BeautifulSoup(r.content.decode("utf-8", "ignore"), 'xml')
+    return options
 
-    expected = {}
-    for disruption_o in b.find("Storingen").find("Gepland").find_all("Storing"):
-        disruption = {
-            "id": _get_text_if_exists(disruption_o.find("id")),
-            "trajectory": _get_text_if_exists(disruption_o.find("Traject")),
-            "period": _get_text_if_exists(disruption_o.find("Periode")),
-            "reason": _get_text_if_exists(disruption_o.find("Reden")),
-            "advice": _get_text_if_exists(disruption_o.find("Advies")),
-            "message": _get_text_if_exists(disruption_o.find("Bericht")),
-            "date": _get_text_if_exists(disruption_o.find("Datum"))
-        }
-
-        expected[disruption["id"]] = disruption
 
+def parse_disruptions(r, parser: str = None, records: bool = False):
+    expected = {}
     unexpected = {}
-    for disruption_o in b.find("Storingen").find("Ongepland").find_all("Storing"):
-        disruption = {
-            "id": _get_text_if_exists(disruption_o.find("id")),
-            "trajectory": _get_text_if_exists(disruption_o.find("Traject")),
-            "period": _get_text_if_exists(disruption_o.find("Periode")),
-            "reason": _get_text_if_exists(disruption_o.find("Reden")),
-            "advice": _get_text_if_exists(disruption_o.find("Advies")),
-            "message": _get_text_if_exists(disruption_o.find("Bericht")),
-            "date": _get_text_if_exists(disruption_o.find("Datum"))
-        }
-        date, time = disruption["date"].split("T")
-        time, timezone = time.split("+")
-        tzd, tzh, tzm, tzs = map(int, list(timezone))
-
-        dy, dm, dd = map(int, date.split("-"))
-        th, tm, ts = map(int, time.split(":"))
-        disruption["date"] = datetime.datetime(dy, dm, dd, th, tm, ts, tzinfo=datetime.timezone(datetime.timedelta(days=tzd, hours=tzh, minutes=tzm, seconds=tzs)))
-
-        unexpected[disruption["id"]] = disruption
+    for disruption_o in iter_elements(r, "Storing", parser):
+        section = disruption_o.parent_name
+        if section not in ("Gepland", "Ongepland"):
+            continue
+
+        disruption = _build_disruption(disruption_o, section == "Gepland", records)
+        disruption_id = disruption.id if records else disruption["id"]
+
+        if section == "Gepland":
+            expected[disruption_id] = disruption
+        else:
+            unexpected[disruption_id] = disruption
 
     disruptions = {
         "expected": expected,
@@ -64,3 +66,29 @@ def get_disruptions_f(s: Session, actual: bool, station: str = None, unplanned:
     }
 
     return disruptions
+
+
+@instrumented("disruptions")
+def get_disruptions_f(s: "Session", actual: bool, station: str = None, unplanned: bool = None, parser: str = None, records: bool = False, pool: "ParsePool" = None):
+    with s.get(endpoint_url("disruptions", disruptions_options(actual, station, unplanned)), stream=True) as r:
+        if pool is not None:
+            return pool.parse(parse_disruptions, r, parser, records)
+
+        return parse_disruptions(r, parser, records)
+
+
+@instrumented("disruptions")
+def get_disruptions_conditional_f(s: "Session", actual: bool, station: str = None, unplanned: bool = None, etag: str = None, last_modified: str = None, parser: str = None, records: bool = False):
+    """
+    Gets the disruptions, unless they did not change since the response with the given validators.
+
+    :return: A tuple of the disruptions (None if not modified), the ETag and the Last-Modified header.
+    :rtype: tuple
+    """
+
+    url = endpoint_url("disruptions", disruptions_options(actual, station, unplanned))
+    with s.get(url, headers=conditional_headers(etag, last_modified), stream=True) as r:
+        if r.status_code == 304:
+            return None, r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+        return parse_disruptions(r, parser, records), r.headers.get("ETag"), r.headers.get("Last-Modified")
@@ -1 +1,3 @@
+from .cassette import CassetteMissException
 from .login import IncorrectAuthException
+from .scheduler import CircuitOpenException
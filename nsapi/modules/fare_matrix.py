@@ -0,0 +1,129 @@
+import numpy as np
+
+from nsapi.modules.records import DISCOUNTS, TRAVEL_CLASSES, TRAVEL_TYPES
+
+FARES = len(TRAVEL_TYPES) * len(TRAVEL_CLASSES) * len(DISCOUNTS)
+
+
+def _unique(codes):
+    return tuple(dict.fromkeys(codes))
+
+
+def fare_requests(origins, destinations, symmetric: bool = True):
+    """
+    Finds the requests needed for a fare matrix, without repeated pairs and pairs of a station with itself.
+
+    :param origins: An iterable of station codes.
+    :param destinations: An iterable of station codes.
+    :param symmetric: Assume a fare is the same in both directions, so only one of them is requested.
+    :return: A list of (from station, to station) tuples.
+    :rtype: list
+    """
+
+    requests = {}
+    for origin in _unique(origins):
+        for destination in _unique(destinations):
+            if origin == destination:
+                continue
+            if symmetric and (destination, origin) in requests:
+                continue
+
+            requests[(origin, destination)] = None
+
+    return list(requests)
+
+
+def cheapest(fares: dict):
+    """
+    Combines the fares of all carrier choices into the cheapest fare of each kind.
+
+    :param fares: The Fare records of a pricing response, as returned by get_pricing_f(records=True).
+    :return: A flat array of fares in FareTable order, NaN where no carrier has the fare.
+    :rtype: np.ndarray
+    """
+
+    if not fares:
+        return np.full(FARES, np.nan)
+
+    return np.fmin.reduce(np.stack([np.frombuffer(fare.table.fares, dtype=np.float64) for fare in fares.values()]))
+
+
+class FareMatrix:
+    def __init__(self, origins, destinations):
+        """
+        The fares between every origin and destination, as one dense array of shape
+        (origins, destinations, fares). Fares that are missing are NaN.
+
+        :param origins: An iterable of station codes, the row labels.
+        :param destinations: An iterable of station codes, the column labels.
+        """
+
+        self.origins = _unique(origins)
+        self.destinations = _unique(destinations)
+        self.fares = np.full((len(self.origins), len(self.destinations), FARES), np.nan)
+
+        self._rows = {code: i for i, code in enumerate(self.origins)}
+        self._columns = {code: i for i, code in enumerate(self.destinations)}
+
+    @property
+    def shape(self):
+        return len(self.origins), len(self.destinations)
+
+    @staticmethod
+    def _index(travel_type: str, travel_class: str, discount: str):
+        t = [key for key, _ in TRAVEL_TYPES].index(travel_type)
+        c = [key for key, _ in TRAVEL_CLASSES].index(travel_class)
+        d = [key for key, _ in DISCOUNTS].index(discount)
+
+        return (t * len(TRAVEL_CLASSES) + c) * len(DISCOUNTS) + d
+
+    def set(self, from_station: str, to_station: str, fares: np.ndarray, symmetric: bool = True):
+        """
+        Fills in the fares of a pair.
+
+        :param from_station: The station code of the departure station.
+        :param to_station: The station code of the arrival station.
+        :param fares: A flat array of fares, see cheapest().
+        :param symmetric: Also fill in the fares of the opposite direction.
+        :return: Nothing.
+        """
+
+        pairs = [(from_station, to_station)]
+        if symmetric:
+            pairs.append((to_station, from_station))
+
+        for origin, destination in pairs:
+            i = self._rows.get(origin)
+            j = self._columns.get(destination)
+            if i is not None and j is not None:
+                self.fares[i, j] = fares
+
+    def matrix(self, travel_type: str = "one-way", travel_class: str = "standard-class", discount: str = "full"):
+        """
+        Gets the matrix of one kind of fare, see records.TRAVEL_TYPES, TRAVEL_CLASSES and DISCOUNTS.
+
+        :return: A (origins, destinations) view of the fares.
+        :rtype: np.ndarray
+        """
+
+        return self.fares[:, :, self._index(travel_type, travel_class, discount)]
+
+    def get(self, from_station: str, to_station: str, travel_type: str = "one-way", travel_class: str = "standard-class", discount: str = "full"):
+        """
+        Gets a single fare.
+
+        :return: The fare, or None if it is missing.
+        :rtype: float
+        """
+
+        fare = self.fares[self._rows[from_station], self._columns[to_station], self._index(travel_type, travel_class, discount)]
+        if not np.isnan(fare):
+            return float(fare)
+
+    @property
+    def missing(self):
+        """
+        The pairs without any fare, as a boolean (origins, destinations) array.
+        """
+
+        return np.isnan(self.fares).all(axis=2)
@@ -0,0 +1,148 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+from nsapi.modules.records import Record
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Bounds the size of the query x station similarity matrix.
+_BLOCK_ELEMENTS = 1 << 22
+
+
+def _unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _to_km(similarity):
+    return np.arccos(np.clip(similarity, -1.0, 1.0)) * EARTH_RADIUS_KM
+
+
+class StationLocator:
+    def __init__(self, stations: Mapping):
+        """
+        Creates a spatial index to find stations near a coordinate.
+
+        Station coordinates are stored as unit vectors, so the cosine of the great-circle
+        distance between a point and every station is one matrix product. Queries for many
+        points are answered in vectorized blocks. Stations without coordinates are skipped.
+
+        :param stations: The stations as returned by NSApi.get_stations().
+        """
+
+        codes = []
+        lat = []
+        lon = []
+        for code, station in stations.items():
+            if isinstance(station, Record):
+                station = station.to_dict()
+
+            try:
+                station_lat, station_lon = float(station["lat"]), float(station["lon"])
+            except (TypeError, ValueError):
+                continue
+
+            codes.append(code)
+            lat.append(station_lat)
+            lon.append(station_lon)
+
+        self.codes = np.array(codes, dtype=object)
+        self.coordinates = np.column_stack([np.array(lat, dtype=np.float64), np.array(lon, dtype=np.float64)])
+        self._vectors = _unit_vectors(lat, lon)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _blocks(self, points):
+        size = max(1, _BLOCK_ELEMENTS // max(1, len(self.codes)))
+        for start in range(0, len(points), size):
+            yield start, points[start:start + size] @ self._vectors.T
+
+    def nearest_many(self, lat, lon, n: int = 1):
+        """
+        Finds the n nearest stations for every point.
+
+        :param lat: The latitudes of the points, in degrees.
+        :param lon: The longitudes of the points, in degrees.
+        :param n: The amount of stations per point.
+        :return: A tuple of a (points, n) array of station codes and a (points, n) array of distances in km, nearest first.
+        :rtype: tuple
+        """
+
+        points = _unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        n = min(n, len(self.codes))
+
+        indices = np.empty((len(points), n), dtype=np.intp)
+        similarity = np.empty((len(points), n), dtype=np.float64)
+        for start, block in self._blocks(points):
+            if n < block.shape[1]:
+                candidates = np.argpartition(-block, n - 1, axis=1)[:, :n]
+            else:
+                candidates = np.broadcast_to(np.arange(block.shape[1]), block.shape)
+
+            values = np.take_along_axis(block, candidates, axis=1)
+            order = np.argsort(-values, axis=1)
+
+            indices[start:start + len(block)] = np.take_along_axis(candidates, order, axis=1)
+            similarity[start:start + len(block)] = np.take_along_axis(values, order, axis=1)
+
+        return self.codes[indices], _to_km(similarity)
+
+    def nearest(self, lat: float, lon: float, n: int = 1):
+        """
+        Finds the n nearest stations to a coordinate.
+
+        :param lat: The latitude in degrees.
+        :param lon: The longitude in degrees.
+        :param n: The amount of stations.
+        :return: A list of (station code, distance in km) tuples, nearest first.
+        :rtype: list
+        """
+
+        codes, distances = self.nearest_many(lat, lon, n)
+        return list(zip(codes[0].tolist(), distances[0].tolist()))
+
+    def within_many(self, lat, lon, radius_km: float):
+        """
+        Finds the stations within a radius of every point.
+
+        :param lat: The latitudes of the points, in degrees.
+        :param lon: The longitudes of the points, in degrees.
+        :param radius_km: The radius in km.
+        :return: A list with, per point, a list of (station code, distance in km) tuples, nearest first.
+        :rtype: list
+        """
+
+        points = _unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon))
+        threshold = np.cos(min(radius_km / EARTH_RADIUS_KM, np.pi))
+
+        results = []
+        for _, block in self._blocks(points):
+            rows, columns = np.nonzero(block >= threshold)
+            distances = _to_km(block[rows, columns])
+
+            order = np.lexsort((distances, rows))
+            rows, columns, distances = rows[order], columns[order], distances[order]
+            splits = np.searchsorted(rows, np.arange(1, len(block)))
+
+            for row_columns, row_distances in zip(np.split(columns, splits), np.split(distances, splits)):
+                results.append(list(zip(self.codes[row_columns].tolist(), row_distances.tolist())))
+
+        return results
+
+    def within(self, lat: float, lon: float, radius_km: float):
+        """
+        Finds the stations within a radius of a coordinate.
+
+        :param lat: The latitude in degrees.
+        :param lon: The longitude in degrees.
+        :param radius_km: The radius in km.
+        :return: A list of (station code, distance in km) tuples, nearest first.
+        :rtype: list
+        """
+
+        return self.within_many(lat, lon, radius_km)[0]
@@ -0,0 +1,335 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+PHASES = ("request", "download", "parse", "build")
+
+# The sections of a disruptions result.
+_SECTIONS = {"unexpected", "expected"}
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_current = contextvars.ContextVar("nsapi_measurement", default=None)
+
+
+def add_sink(sink):
+    """
+    Adds a sink that receives a Measurement after every instrumented call.
+    Nothing is measured while there are no sinks.
+
+    :param sink: A callable taking a Measurement, like a MetricsRegistry or an OpenTelemetrySink.
+    :return: The sink, so it can be used as a decorator.
+    """
+
+    global _sinks
+    with _sinks_lock:
+        _sinks = _sinks + [sink]
+
+    return sink
+
+
+def remove_sink(sink):
+    """
+    Removes a sink added with add_sink.
+
+    :param sink: The sink.
+    :return: Nothing.
+    """
+
+    global _sinks
+    with _sinks_lock:
+        _sinks = [x for x in _sinks if x is not sink]
+
+
+def current():
+    """
+    Gets the Measurement of the call in progress.
+
+    :return: The Measurement, None if the call is not measured.
+    :rtype: Measurement
+    """
+
+    return _current.get()
+
+
+def _count_records(result):
+    if isinstance(result, tuple):
+        result = result[0]
+
+    if isinstance(result, dict) and result.keys() == _SECTIONS:
+        return sum(len(section) for section in result.values())
+
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+class Measurement:
+    __slots__ = ("endpoint", "started", "status_code", "bytes", "elements", "records", "error", "request", "download", "parse", "build", "total", "_start", "_parsing")
+
+    def __init__(self, endpoint: str):
+        """
+        The timings of one instrumented call, split in phases:
+        request (DNS, connect and time to first byte), download (reading and decompressing the body),
+        parse (XML parsing) and build (creating the result from the parsed elements).
+
+        :param endpoint: The name of the endpoint.
+        """
+
+        self.endpoint = endpoint
+        self.started = time.time()
+        self.status_code = None
+        self.bytes = 0
+        self.elements = 0
+        self.records = 0
+        self.error = None
+
+        self.request = 0.0
+        self.download = 0.0
+        self.parse = 0.0
+        self.build = 0.0
+        self.total = 0.0
+
+        self._start = time.perf_counter()
+        self._parsing = False
+
+    def phases(self):
+        return {phase: getattr(self, phase) for phase in PHASES}
+
+    def response(self, r):
+        """
+        Records that the response arrived and parsing starts.
+
+        :param r: The response.
+        :return: Nothing.
+        """
+
+        if not self._parsing:
+            self._parsing = True
+            self.request = time.perf_counter() - self._start
+            self.status_code = getattr(r, "status_code", None)
+
+    def chunks(self, chunks):
+        """
+        Yields the chunks of a body, timing the download.
+
+        :param chunks: An iterable of byte chunks.
+        :return: A generator of byte chunks.
+        """
+
+        chunks = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self.download += time.perf_counter() - started
+
+            if chunk is None:
+                return
+
+            self.bytes += len(chunk)
+            yield chunk
+
+    def elements_of(self, iter_f, chunks, tag: str):
+        """
+        Yields the elements of a body, timing the parser apart from the download.
+
+        :param iter_f: The parser backend.
+        :param chunks: An iterable of byte chunks.
+        :param tag: The tag name of the records.
+        :return: A generator of elements.
+        """
+
+        elements = iter_f(self.chunks(chunks), tag)
+        while True:
+            started = time.perf_counter()
+            downloaded = self.download
+            element = next(elements, None)
+            self.parse += time.perf_counter() - started - (self.download - downloaded)
+
+            if element is None:
+                return
+
+            self.elements += 1
+            yield element
+
+    def finish(self, result=None, error: Exception = None):
+        self.total = time.perf_counter() - self._start
+        if not self._parsing:
+            self.request = self.total
+        self.build = max(0.0, self.total - self.request - self.download - self.parse)
+        self.records = _count_records(result)
+        self.error = type(error).__name__ if error is not None else None
+
+    def __repr__(self):
+        return "Measurement({}, total={:.6f}, {})".format(self.endpoint, self.total, ", ".join("{}={:.6f}".format(k, v) for k, v in self.phases().items()))
+
+
+@contextlib.contextmanager
+def measure(endpoint: str):
+    """
+    Measures the calls in a with block, and sends the Measurement to the sinks afterwards.
+    The result can be set with measurement.finish(result) inside the block.
+
+    :param endpoint: The name of the endpoint.
+    :return: A context manager giving the Measurement, or None if there are no sinks.
+    """
+
+    sinks = _sinks
+    if not sinks:
+        yield None
+        return
+
+    m = Measurement(endpoint)
+    token = _current.set(m)
+    try:
+        yield m
+    except Exception as e:
+        m.finish(error=e)
+        raise
+    finally:
+        _current.reset(token)
+        if not m.total:
+            m.finish()
+
+        for sink in sinks:
+            sink(m)
+
+
+def instrumented(endpoint: str):
+    """
+    Decorates a *_f function so its calls are measured.
+
+    :param endpoint: The name of the endpoint.
+    :return: The decorator.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return f(*args, **kwargs)
+
+            with measure(endpoint) as m:
+                result = f(*args, **kwargs)
+                if m is not None:
+                    m.finish(result)
+
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        """
+        A Prometheus-style registry of histograms per endpoint and phase, and counters of bytes and records.
+        Add it with add_sink(registry) and serve registry.expose() on a /metrics page.
+
+        :param buckets: The upper bounds of the histogram buckets in seconds.
+        """
+
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, key: tuple, value: float):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+
+        counts = histogram[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+
+        histogram[1] += 1
+        histogram[2] += value
+
+    def _increment(self, key: tuple, value: float = 1):
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def __call__(self, m: Measurement):
+        with self._lock:
+            self._observe((m.endpoint, "total"), m.total)
+            for phase, value in m.phases().items():
+                self._observe((m.endpoint, phase), value)
+
+            self._increment(("nsapi_requests_total", m.endpoint, m.error or ""))
+            self._increment(("nsapi_response_bytes_total", m.endpoint, ""), m.bytes)
+            self._increment(("nsapi_records_total", m.endpoint, ""), m.records)
+
+    def expose(self):
+        """
+        Renders the metrics in the Prometheus text format.
+
+        :return: The metrics.
+        :rtype: str
+        """
+
+        lines = ["# TYPE nsapi_phase_seconds histogram"]
+        with self._lock:
+            for (endpoint, phase), (counts, count, total) in sorted(self.histograms.items()):
+                labels = 'endpoint="{}",phase="{}"'.format(endpoint, phase)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append('nsapi_phase_seconds_bucket{{{},le="{}"}} {}'.format(labels, bound, bucket_count))
+                lines.append('nsapi_phase_seconds_bucket{{{},le="+Inf"}} {}'.format(labels, count))
+                lines.append("nsapi_phase_seconds_count{{{}}} {}".format(labels, count))
+                lines.append("nsapi_phase_seconds_sum{{{}}} {}".format(labels, total))
+
+            for name in ("nsapi_requests_total", "nsapi_response_bytes_total", "nsapi_records_total"):
+                lines.append("# TYPE {} counter".format(name))
+                for (counter, endpoint, error), value in sorted(self.counters.items()):
+                    if counter != name:
+                        continue
+
+                    labels = 'endpoint="{}"'.format(endpoint)
+                    if counter == "nsapi_requests_total":
+                        labels += ',error="{}"'.format(error)
+                    lines.append("{}{{{}}} {}".format(name, labels, value))
+
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetrySink:
+    def __init__(self, tracer=None):
+        """
+        Reports every Measurement as an OpenTelemetry span, with a child span per phase.
+        Needs the opentelemetry-api package.
+
+        :param tracer: The tracer to use, the "nsapi" tracer of the global provider if None.
+        """
+
+        from opentelemetry import trace
+
+        self.trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("nsapi")
+
+    def __call__(self, m: Measurement):
+        start = int(m.started * 1e9)
+        span = self.tracer.start_span("nsapi." + m.endpoint, start_time=start, attributes={
+            "nsapi.endpoint": m.endpoint,
+            "nsapi.bytes": m.bytes,
+            "nsapi.elements": m.elements,
+            "nsapi.records": m.records,
+            "http.status_code": m.status_code or 0,
+        })
+
+        if m.error is not None:
+            span.set_attribute("error.type", m.error)
+
+        # The phases are drawn one after the other, though download, parse and build interleave while streaming.
+        context = self.trace.set_span_in_context(span)
+        offset = start
+        for phase, value in m.phases().items():
+            duration = int(value * 1e9)
+            child = self.tracer.start_span("nsapi.{}.{}".format(m.endpoint, phase), context=context, start_time=offset)
+            child.end(end_time=offset + duration)
+            offset += duration
+
+        span.end(end_time=start + int(m.total * 1e9))
@@ -1,5 +1,9 @@
+import threading
+import time
+
 from requests import Session
 
+from nsapi.modules.exceptions import IncorrectAuthException
 from nsapi.modules.urls import urlmap
 
 
@@ -10,3 +14,120 @@ def verify_login(s: Session):
         return True
     else:
         return False
+
+
+class AuthState:
+    def __init__(self, ttl: float = None):
+        """
+        Keeps track of whether a session's credentials have been verified.
+
+        The credentials are verified once and the result is cached. It is only
+        verified again when the cached result is older than the ttl, or when an
+        actual request was rejected with a 401 or 403 status code.
+
+        :param ttl: Seconds a successful verification stays valid, None for no expiry.
+        """
+
+        self.ttl = ttl
+        self.valid = False
+        self.verified_at = None
+        self.stats = {
+            "verifications": 0,
+            "skipped": 0,
+            "rejections": 0
+        }
+
+        self._lock = threading.RLock()
+        self._verifying = threading.local()
+
+    def _expired(self):
+        if not self.valid:
+            return True
+        if self.ttl is None:
+            return False
+
+        return time.monotonic() - self.verified_at > self.ttl
+
+    def cached(self):
+        """
+        Checks whether there is a valid cached verification.
+
+        :return: True if the credentials do not have to be verified.
+        :rtype: bool
+        """
+
+        with self._lock:
+            if self._expired():
+                return False
+
+            self.stats["skipped"] += 1
+            return True
+
+    def record(self, valid: bool):
+        """
+        Records the result of a verification.
+
+        :param valid: Whether the credentials were accepted.
+        :return: Nothing.
+        """
+
+        with self._lock:
+            self.stats["verifications"] += 1
+            self.valid = valid
+            self.verified_at = time.monotonic()
+
+        if not valid:
+            raise IncorrectAuthException("Incorrect username or password!")
+
+    def ensure(self, s: Session):
+        """
+        Throws an exception if the credentials are incorrect.
+        Only contacts the API if there is no valid cached verification.
+
+        :param s: The session holding the credentials.
+        :return: Nothing.
+        """
+
+        with self._lock:
+            if self.cached():
+                return
+
+            # A rejection of the verification itself is a failed verification, not a rejected request.
+            self._verifying.active = True
+            try:
+                valid = verify_login(s)
+            finally:
+                self._verifying.active = False
+
+            self.record(valid)
+
+    def invalidate(self):
+        with self._lock:
+            self.valid = False
+
+    def reject(self, status_code: int):
+        """
+        Invalidates the verification because a request was rejected, and throws an exception.
+
+        :param status_code: The status code of the rejected request.
+        :return: Nothing.
+        """
+
+        with self._lock:
+            self.stats["rejections"] += 1
+            self.valid = False
+
+        raise IncorrectAuthException("Request was rejected with status code {}!".format(status_code))
+
+    def response_hook(self, r, *args, **kwargs):
+        """
+        A requests response hook that invalidates the verification when a request is rejected.
+        Responses to the verification request of ensure() are left to ensure().
+        """
+
+        if r.status_code in (401, 403) and not getattr(self._verifying, "active", False):
+            # reject() raises, so the caller never gets to close a streamed response.
+            r.close()
+            self.reject(r.status_code)
+
+        return r
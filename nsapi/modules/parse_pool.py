@@ -0,0 +1,154 @@
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from nsapi.modules import instrumentation
+from nsapi.modules.parsing import CHUNK_SIZE
+
+
+def _parse_shared(parse_f, name: str, size: int, parser: str, records: bool):
+    # Runs in a worker: the body is fed to the parser in chunks, straight from the shared memory.
+    shm = shared_memory.SharedMemory(name)
+    try:
+        chunks = (bytes(shm.buf[offset:offset + CHUNK_SIZE]) for offset in range(0, size, CHUNK_SIZE))
+        return parse_f(chunks, parser, records)
+    except SyntaxError as e:
+        # The syntax errors of lxml cannot be pickled back to the client, so they are raised as plain SyntaxErrors.
+        raise SyntaxError(e.msg, (e.filename, e.lineno, e.offset, e.text)) from None
+    finally:
+        shm.close()
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def _default_context():
+    # Forking a process that runs threads can copy locks in a held state, so workers are not forked from the client.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+
+    return multiprocessing.get_context("spawn")
+
+
+class ParsePool:
+    def __init__(self, workers: int = None, min_size: int = 256 * 1024, mp_context=None):
+        """
+        Parses responses in worker processes, so parsing large responses is not bound by the GIL.
+        The requests stay on the threads or event loop of the client.
+
+        The body of a response is copied once, into shared memory, and the workers return the parsed result.
+        Use records=True on the client to keep the results that travel back small.
+        Responses smaller than min_size are parsed in the calling thread, where the round trip would cost more than it saves.
+
+        Like any multiprocessing code, the main module of the program must be importable without side effects
+        (use an if __name__ == "__main__" guard). Call close() when done, or use as "with ParsePool() as pool:".
+
+        :param workers: The amount of worker processes, the amount of cores if None.
+        :param min_size: The smallest body in bytes to parse in a worker.
+        :param mp_context: The multiprocessing context to start the workers with, forkserver or spawn if None.
+        """
+
+        self.workers = workers or os.cpu_count() or 1
+        self.min_size = min_size
+        self.mp_context = mp_context if mp_context is not None else _default_context()
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "inline": 0,
+            "pooled": 0,
+            "pooled_bytes": 0
+        }
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context)
+
+            return self._executor
+
+    def submit(self, parse_f, chunks, parser: str = None, records: bool = False):
+        """
+        Parses a body in a worker process.
+
+        :param parse_f: A module level parse function, like parse_departures.
+        :param chunks: The body, as a list of byte chunks.
+        :param parser: The XML parser backend.
+        :param records: Return record objects instead of dictionaries.
+        :return: A future of the parsed result.
+        :rtype: concurrent.futures.Future
+        """
+
+        size = sum(len(chunk) for chunk in chunks)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+        try:
+            offset = 0
+            for chunk in chunks:
+                shm.buf[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+
+            future = self._pool().submit(_parse_shared, parse_f, shm.name, size, parser, records)
+        except BaseException:
+            _release(shm)
+            raise
+
+        with self._lock:
+            self.stats["pooled"] += 1
+            self.stats["pooled_bytes"] += size
+
+        future.add_done_callback(lambda _: _release(shm))
+        return future
+
+    def parse(self, parse_f, r, parser: str = None, records: bool = False):
+        """
+        Downloads a response and parses it, in a worker process if it is large enough.
+
+        :param parse_f: A module level parse function, like parse_departures.
+        :param r: The response, or an iterable of byte chunks.
+        :param parser: The XML parser backend.
+        :param records: Return record objects instead of dictionaries.
+        :return: The parsed result.
+        """
+
+        m = instrumentation.current()
+        if m is not None:
+            m.response(r)
+
+        chunks = r.iter_content(CHUNK_SIZE) if hasattr(r, "iter_content") else r
+        chunks = list(m.chunks(chunks) if m is not None else chunks)
+
+        started = time.perf_counter()
+        if sum(len(chunk) for chunk in chunks) < self.min_size:
+            with self._lock:
+                self.stats["inline"] += 1
+
+            # An empty context, so the body that was just measured is not measured again.
+            result = contextvars.Context().run(parse_f, chunks, parser, records)
+        else:
+            result = self.submit(parse_f, chunks, parser, records).result()
+
+        if m is not None:
+            m.parse += time.perf_counter() - started
+
+        return result
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
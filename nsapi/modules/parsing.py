@@ -0,0 +1,168 @@
+from nsapi.modules import instrumentation
+
+CHUNK_SIZE = 64 * 1024
+
+
+class SoupElement:
+    """
+    Wraps a BeautifulSoup tag so record builders can use it like a StreamElement.
+    """
+
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def name(self):
+        return self._tag.name
+
+    @property
+    def parent_name(self):
+        if self._tag.parent is not None:
+            return self._tag.parent.name
+
+    @property
+    def text(self):
+        return self._tag.text
+
+    def __getitem__(self, attr):
+        return self._tag[attr]
+
+    def get(self, attr, default=None):
+        return self._tag.get(attr, default)
+
+    def find(self, name: str, attrs: dict = None):
+        tag = self._tag.find(name, attrs or {})
+        if tag is not None:
+            return SoupElement(tag)
+
+    def find_all(self, name: str, attrs: dict = None):
+        return [SoupElement(tag) for tag in self._tag.find_all(name, attrs or {})]
+
+
+def _localname(element):
+    # Like etree.QName(element).localname, without importing lxml before it is used.
+    return element.tag.rpartition("}")[2]
+
+
+class StreamElement:
+    """
+    Wraps an lxml element with the subset of the BeautifulSoup interface the record builders use.
+    """
+
+    __slots__ = ("_element",)
+
+    def __init__(self, element):
+        self._element = element
+
+    @property
+    def name(self):
+        return _localname(self._element)
+
+    @property
+    def parent_name(self):
+        parent = self._element.getparent()
+        if parent is not None:
+            return _localname(parent)
+
+    @property
+    def text(self):
+        return "".join(self._element.itertext())
+
+    def __getitem__(self, attr):
+        return self._element.attrib[attr]
+
+    def get(self, attr, default=None):
+        return self._element.get(attr, default)
+
+    def _iter_matching(self, name: str, attrs: dict = None):
+        for element in self._element.iterdescendants(name):
+            if attrs and any(element.get(k) != v for k, v in attrs.items()):
+                continue
+
+            yield element
+
+    def find(self, name: str, attrs: dict = None):
+        for element in self._iter_matching(name, attrs):
+            return StreamElement(element)
+
+    def find_all(self, name: str, attrs: dict = None):
+        return [StreamElement(element) for element in self._iter_matching(name, attrs)]
+
+
+def _iter_soup(chunks, tag: str):
+    from bs4 import BeautifulSoup
+
+    b = BeautifulSoup(b"".join(chunks).decode("utf-8", "ignore"), "xml")
+
+    for element in b.find_all(tag):
+        yield SoupElement(element)
+
+
+def _iter_lxml(chunks, tag: str):
+    from lxml import etree
+
+    parser = etree.XMLPullParser(events=("end",), tag=tag, recover=True)
+
+    def drain():
+        for _, element in parser.read_events():
+            yield StreamElement(element)
+
+            # The record has been built, free it and everything before it.
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+
+    parser.close()
+    yield from drain()
+
+
+backends = {
+    "lxml": _iter_lxml,
+    "soup": _iter_soup,
+}
+default_backend = "lxml"
+
+
+def register_backend(name: str, iter_f):
+    """
+    Registers a parser backend.
+
+    :param name: The name to select the backend with.
+    :param iter_f: A function taking an iterable of byte chunks and a tag name, yielding the matching elements.
+    :return: Nothing.
+    """
+
+    backends[name] = iter_f
+
+
+def iter_elements(r, tag: str, backend: str = None):
+    """
+    Yields every element with the given tag name in a response, as soon as it is closed.
+    Elements are only valid until the next one is requested.
+
+    :param r: The response to parse, preferably requested with stream=True, or an iterable of byte chunks.
+    :param tag: The tag name of the records.
+    :param backend: The name of the parser backend, the default_backend if None.
+    :return: A generator of elements.
+    """
+
+    iter_f = backends[backend or default_backend]
+    m = instrumentation.current()
+    if m is not None:
+        m.response(r)
+
+    if hasattr(r, "iter_content"):
+        r = r.iter_content(CHUNK_SIZE)
+
+    if m is not None:
+        return m.elements_of(iter_f, r, tag)
+
+    return iter_f(r, tag)
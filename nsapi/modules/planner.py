@@ -0,0 +1,262 @@
+import bisect
+import collections
+import datetime
+import threading
+import time
+
+from nsapi.modules.records import Record, Stop
+from nsapi.modules.station_index import normalize
+
+Journey = collections.namedtuple("Journey", ["departure", "arrival", "legs"])
+
+
+def _parts(advice):
+    if isinstance(advice, Record):
+        return advice.parts
+
+    return [[Stop(**stop) for stop in stops] for stops in advice["travel_info"]["parts"]]
+
+
+def _departure(advice):
+    if isinstance(advice, Record):
+        return advice.departure_time_planned
+
+    return advice["departure_time"]["planned"]
+
+
+def _epoch(moment: datetime.datetime):
+    # Naive datetimes are taken as local time, like datetime.timestamp() does.
+    return moment.timestamp()
+
+
+class Timetable:
+    def __init__(self, max_age: float = 900, transfer_time: float = 120, resolve=None):
+        """
+        A local timetable built from the travel advice that was already received,
+        answering earliest arrival queries with the connection scan algorithm.
+
+        Every pair of consecutive stops in a part of an advice is a connection. Connections that were
+        not seen again for max_age seconds are dropped, and so is the coverage of the queries that added them.
+        Adding advice drops them every max_age / 2 seconds, or call expire() yourself.
+
+        Stops only carry station names, so queries by station code need a resolve function.
+        NSApi sets one based on its station list when resolve is None.
+
+        :param max_age: Seconds connections and query coverage stay valid.
+        :param transfer_time: The minimal seconds to change trains.
+        :param resolve: A function from a station name or code to a station code, like StationIndex.get.
+            Stations are matched on their normalized name if None.
+        """
+
+        self.max_age = max_age
+        self.transfer_time = transfer_time
+        self.resolve = resolve
+
+        # (trip, from station, departure) -> [departure, arrival, from station, to station, trip, from stop, to stop, seen]
+        self._connections = {}
+        # (from station, to station) -> [earliest departure, latest departure, seen]
+        self._coverage = {}
+
+        self._sorted = []
+        self._departures = []
+        self._stations = frozenset()
+        self._dirty = False
+        self._next_expire = time.monotonic() + max_age / 2
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "advices": 0,
+            "queries": 0,
+            "expired": 0
+        }
+
+    def __len__(self):
+        return len(self._connections)
+
+    def _station(self, name: str):
+        if self.resolve is not None:
+            code = self.resolve(name)
+            if code is not None:
+                return code
+
+        return normalize(name)
+
+    def add(self, advices, from_station: str = None, to_station: str = None):
+        """
+        Adds the connections of travel advice, as returned by NSApi.get_travel_recommendations.
+
+        :param advices: A list of advice dictionaries or TravelAdvice records.
+        :param from_station: The station the advice was requested from, to record the coverage (optional).
+        :param to_station: The station the advice was requested to, to record the coverage (optional).
+        :return: Nothing.
+        """
+
+        now = time.monotonic()
+        departures = []
+
+        if now >= self._next_expire:
+            self._next_expire = now + self.max_age / 2
+            self.expire()
+
+        # Resolving a name may download the station list, so it is done before taking the lock.
+        advices = [(_departure(advice), _parts(advice)) for advice in advices]
+        stations = {}
+        for _, parts in advices:
+            for stops in parts:
+                for stop in stops:
+                    if stop.name not in stations:
+                        stations[stop.name] = self._station(stop.name)
+
+        coverage = None
+        if from_station is not None and to_station is not None:
+            coverage = (self._station(from_station), self._station(to_station))
+
+        with self._lock:
+            for departure_time, parts in advices:
+                self.stats["advices"] += 1
+                departures.append(_epoch(departure_time))
+
+                for stops in parts:
+                    if len(stops) < 2:
+                        continue
+
+                    # Parts carry no ride number of their own, so a trip is identified by where and when it starts and ends.
+                    trip = (stations[stops[0].name], _epoch(stops[0].arrival_time), stations[stops[-1].name])
+
+                    for stop_from, stop_to in zip(stops, stops[1:]):
+                        station_from = stations[stop_from.name]
+                        departure = _epoch(stop_from.arrival_time)
+                        key = (trip, station_from, departure)
+
+                        connection = self._connections.get(key)
+                        if connection is None:
+                            self._connections[key] = [departure, _epoch(stop_to.arrival_time), station_from, stations[stop_to.name], trip, stop_from, stop_to, now]
+                            self._dirty = True
+                        else:
+                            connection[7] = now
+
+            if coverage is not None and departures:
+                self._coverage[coverage] = [min(departures), max(departures), now]
+
+    def expire(self):
+        """
+        Drops the connections and coverage older than max_age.
+
+        :return: The amount of connections dropped.
+        :rtype: int
+        """
+
+        cutoff = time.monotonic() - self.max_age
+
+        with self._lock:
+            stale = [key for key, connection in self._connections.items() if connection[7] < cutoff]
+            for key in stale:
+                del self._connections[key]
+
+            for key in [key for key, coverage in self._coverage.items() if coverage[2] < cutoff]:
+                del self._coverage[key]
+
+            if stale:
+                self._dirty = True
+                self.stats["expired"] += len(stale)
+
+        return len(stale)
+
+    def covers(self, from_station: str, to_station: str, departure_time: datetime.datetime):
+        """
+        Checks whether advice for this query was received recently, so a local answer can be trusted.
+
+        :param from_station: The station to depart from.
+        :param to_station: The station to arrive at.
+        :param departure_time: The earliest departure.
+        :return: Whether the query is covered.
+        :rtype: bool
+        """
+
+        source = self._station(from_station)
+        target = self._station(to_station)
+        _, _, stations = self._index()
+        if source not in stations or target not in stations:
+            return False
+
+        coverage = self._coverage.get((source, target))
+        if coverage is None or time.monotonic() - coverage[2] > self.max_age:
+            return False
+
+        return coverage[0] <= _epoch(departure_time) <= coverage[1]
+
+    def _index(self):
+        with self._lock:
+            if self._dirty:
+                self._sorted = sorted(self._connections.values(), key=lambda connection: (connection[0], connection[1]))
+                self._departures = [connection[0] for connection in self._sorted]
+                self._stations = frozenset(station for connection in self._sorted for station in connection[2:4])
+                self._dirty = False
+
+            return self._sorted, self._departures, self._stations
+
+    def earliest_arrival(self, from_station: str, to_station: str, departure_time: datetime.datetime):
+        """
+        Finds the journey that arrives first, departing at or after departure_time.
+
+        :param from_station: The station to depart from.
+        :param to_station: The station to arrive at.
+        :param departure_time: The earliest departure.
+        :return: The journey, or None if the timetable has no connection.
+            legs is a list of stop lists, one per train, like the parts of an advice.
+        :rtype: Journey
+        :raises ValueError: If a station has no connections in the timetable, like a code that was not resolved.
+        """
+
+        with self._lock:
+            self.stats["queries"] += 1
+
+        source = self._station(from_station)
+        target = self._station(to_station)
+        connections, departures, stations = self._index()
+
+        for query, station in ((from_station, source), (to_station, target)):
+            if station not in stations:
+                raise ValueError("The timetable has no connections at {}.".format(query))
+
+        cutoff = time.monotonic() - self.max_age
+        arrivals = {source: _epoch(departure_time)}
+        boarded = {}
+        reached_by = {}
+        best = float("inf")
+
+        for i in range(bisect.bisect_left(departures, arrivals[source]), len(connections)):
+            departure, arrival, station_from, station_to, trip, _, _, seen = connections[i]
+            if departure >= best:
+                break
+            if seen < cutoff:
+                continue
+
+            if trip not in boarded:
+                reached = arrivals.get(station_from)
+                if reached is None or reached + (self.transfer_time if station_from != source else 0) > departure:
+                    continue
+
+                boarded[trip] = i
+
+            if arrival < arrivals.get(station_to, float("inf")):
+                arrivals[station_to] = arrival
+                reached_by[station_to] = (boarded[trip], i)
+                if station_to == target:
+                    best = arrival
+
+        if target not in reached_by:
+            return None
+
+        legs = []
+        station = target
+        while station != source:
+            first, last = reached_by[station]
+            trip = connections[first][4]
+            leg = [connections[first][5]]
+            leg.extend(connections[i][6] for i in range(first, last + 1) if connections[i][4] == trip)
+            legs.append(leg)
+            station = connections[first][2]
+
+        legs.reverse()
+        return Journey(legs[0][0].arrival_time, legs[-1][-1].arrival_time, legs)
@@ -1,9 +1,19 @@
 import datetime
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
-from requests import Session
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.records import DISCOUNTS, TRAVEL_CLASSES, TRAVEL_TYPES, Fare, FareTable
+from nsapi.modules.urls import endpoint_url
 
-from nsapi.modules.urls import urlmap, form_url, create_get_request
+if TYPE_CHECKING:
+    from requests import Session
+
+    from nsapi.modules.parse_pool import ParsePool
+
+_type_index = {name: i for i, (_, name) in enumerate(TRAVEL_TYPES)}
+_class_index = {name: i for i, (_, name) in enumerate(TRAVEL_CLASSES)}
+_discount_index = {name: i for i, (_, name) in enumerate(DISCOUNTS)}
 
 
 def _verify_date(date: str):
@@ -23,51 +33,62 @@ def _verify_date(date: str):
         return False
 
 
-def get_pricing_f(s: Session, from_station: str, to_station: str, via_station: str = None, date: str = None):
+def _build_fare_table(price_o):
+    table = FareTable()
+
+    for type_o in price_o.find_all("ReisType"):
+        t = _type_index.get(type_o.get("name"))
+        if t is None:
+            continue
+
+        for class_o in type_o.find_all("ReisKlasse"):
+            c = _class_index.get(class_o.get("klasse"))
+            if c is None:
+                continue
+
+            for discount_o in class_o.find_all("Kortingsprijs"):
+                d = _discount_index.get(discount_o.get("name"))
+                if d is None or discount_o.get("prijs") is None:
+                    continue
+
+                table.set(t, c, d, float(discount_o["prijs"]))
+
+    return table
+
+
+def _build_fare(price_o, records: bool = False):
+    build = Fare if records else Fare.build_dict
+
+    return build(price_o["naam"], price_o.find("Tariefeenheden").text, _build_fare_table(price_o))
+
+
+def pricing_options(from_station: str, to_station: str, via_station: str = None, date: str = None):
     options = {
         "from": from_station,
         "to": to_station
     }
     if via_station is not None:
-        options["via"]: via_station
+        options["via"] = via_station
     if date is not None:
         if _verify_date(date):
             options["dateTime"] = date
 
-    r = s.get(form_url(urlmap["pricing"], create_get_request(options)))
-    b = BeautifulSoup(r.content.decode("utf-8", "ignore"), 'xml')
+    return options
 
+
+def parse_pricing(r, parser: str = None, records: bool = False):
     prices = {}
-    for price_o in b.find_all("VervoerderKeuze"):
-        price = {
-            "carrier": price_o["naam"],
-            "price_units": price_o.find("Tariefeenheden").text,
-            "return": {
-                "first-class": {
-                    "full": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "vol tarief"})["prijs"]),
-                    "20-off": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "20% korting"})["prijs"]),
-                    "40-off": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "40% korting"})["prijs"])
-                },
-                "standard-class": {
-                    "full": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "vol tarief"})["prijs"]),
-                    "20-off": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "20% korting"})["prijs"]),
-                    "40-off": float(price_o.find("ReisType", {"name": "Retour"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "40% korting"})["prijs"])
-                },
-            },
-            "one-way": {
-                "first-class": {
-                    "full": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "vol tarief"})["prijs"]),
-                    "20-off": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "20% korting"})["prijs"]),
-                    "40-off": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "1"}).find("Kortingsprijs", {"name": "40% korting"})["prijs"])
-                },
-                "standard-class": {
-                    "full": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "vol tarief"})["prijs"]),
-                    "20-off": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "20% korting"})["prijs"]),
-                    "40-off": float(price_o.find("ReisType", {"name": "Enkele reis"}).find("ReisKlasse", {"klasse": "2"}).find("Kortingsprijs", {"name": "40% korting"})["prijs"])
-                }
-            }
-        }
-
-        prices[price["carrier"]] = price
+    for price_o in iter_elements(r, "VervoerderKeuze", parser):
+        fare = _build_fare(price_o, records)
+        prices[fare.carrier if records else fare["carrier"]] = fare
 
     return prices
+
+
+@instrumented("pricing")
+def get_pricing_f(s: "Session", from_station: str, to_station: str, via_station: str = None, date: str = None, parser: str = None, records: bool = False, pool: "ParsePool" = None):
+    with s.get(endpoint_url("pricing", pricing_options(from_station, to_station, via_station, date)), stream=True) as r:
+        if pool is not None:
+            return pool.parse(parse_pricing, r, parser, records)
+
+        return parse_pricing(r, parser, records)
@@ -0,0 +1,257 @@
+import math
+from array import array
+
+
+TRAVEL_TYPES = (("return", "Retour"), ("one-way", "Enkele reis"))
+TRAVEL_CLASSES = (("first-class", "1"), ("standard-class", "2"))
+DISCOUNTS = (("full", "vol tarief"), ("20-off", "20% korting"), ("40-off", "40% korting"))
+
+
+class FareTable:
+    """
+    The fares of one carrier as a flat travel type x class x discount array.
+    Fares that are missing from the response are stored as NaN.
+    """
+
+    __slots__ = ("fares",)
+
+    def __init__(self, fares=None):
+        if fares is None:
+            fares = array("d", [math.nan]) * (len(TRAVEL_TYPES) * len(TRAVEL_CLASSES) * len(DISCOUNTS))
+
+        self.fares = fares
+
+    @staticmethod
+    def _index(travel_type: int, travel_class: int, discount: int):
+        return (travel_type * len(TRAVEL_CLASSES) + travel_class) * len(DISCOUNTS) + discount
+
+    def set(self, travel_type: int, travel_class: int, discount: int, fare: float):
+        self.fares[self._index(travel_type, travel_class, discount)] = fare
+
+    def get(self, travel_type: int, travel_class: int, discount: int):
+        """
+        Gets a single fare by index, see TRAVEL_TYPES, TRAVEL_CLASSES and DISCOUNTS.
+
+        :return: The fare, or None if the response did not contain it.
+        :rtype: float
+        """
+
+        fare = self.fares[self._index(travel_type, travel_class, discount)]
+        if not math.isnan(fare):
+            return fare
+
+    def _values(self):
+        # NaN is never equal to itself, so missing fares compare as None.
+        return tuple(None if math.isnan(fare) else fare for fare in self.fares)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def to_dict(self):
+        """
+        Converts the table to the nested dictionary returned by get_pricing_f.
+
+        :return: A dictionary like {"return": {"first-class": {"full": 1.0, ...}, ...}, ...}.
+        :rtype: dict
+        """
+
+        return {
+            type_key: {
+                class_key: {
+                    discount_key: self.get(t, c, d) for d, (discount_key, _) in enumerate(DISCOUNTS)
+                } for c, (class_key, _) in enumerate(TRAVEL_CLASSES)
+            } for t, (type_key, _) in enumerate(TRAVEL_TYPES)
+        }
+
+
+def _frozen(value):
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+
+    return value
+
+
+class Record:
+    """
+    The base class of the compact result objects. Subclasses only define __slots__ and build_dict.
+    Records hash by value, with lists hashed as tuples, so do not change a record while it is in a set or a dictionary key.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self):
+        return hash((type(self),) + tuple(_frozen(getattr(self, name)) for name in self.__slots__))
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self.__slots__))
+
+    @staticmethod
+    def build_dict(**values):
+        """
+        Builds the dictionary form of a record straight from its values, without creating the record.
+        The parsers use it when records are not asked for.
+
+        :return: The dictionary, like to_dict returns.
+        :rtype: dict
+        """
+
+        raise NotImplementedError
+
+    def to_dict(self):
+        values = {name: getattr(self, name) for name in self.__slots__}
+
+        # Lists are copied, so changing the dictionary does not change the record.
+        for name, value in values.items():
+            if isinstance(value, list):
+                values[name] = list(value)
+
+        return self.build_dict(**values)
+
+
+class Departure(Record):
+    __slots__ = ("journey", "departure_time", "destination", "train_type", "carrier", "route", "tip", "comments", "platform", "platform_changed", "delay_time", "delay_reason")
+
+    @staticmethod
+    def build_dict(journey, departure_time, destination, train_type, carrier, route, tip, comments, platform, platform_changed, delay_time, delay_reason):
+        return {
+            "journey": journey,
+            "departure_time": departure_time,
+            "destination": destination,
+            "train_type": train_type,
+            "carrier": carrier,
+            "route": route,
+            "tip": tip,
+            "departs_from": {
+                "platform": platform,
+                "changed": platform_changed
+            },
+            "delay": {
+                "time": delay_time,
+                "reason": delay_reason
+            },
+            "comments": comments
+        }
+
+
+class Station(Record):
+    __slots__ = ("code", "type", "name_short", "name_middle", "name_full", "country", "uic", "lat", "lon", "synonyms")
+
+    @staticmethod
+    def build_dict(code, type, name_short, name_middle, name_full, country, uic, lat, lon, synonyms):
+        return {
+            "code": code,
+            "type": type,
+            "name": {
+                "short": name_short,
+                "middle": name_middle,
+                "full": name_full,
+            },
+            "country": country,
+            "uic": uic,
+            "lat": lat,
+            "lon": lon,
+            "synonyms": synonyms
+        }
+
+
+class Disruption(Record):
+    __slots__ = ("id", "trajectory", "period", "reason", "advice", "message", "date")
+
+    @staticmethod
+    def build_dict(**values):
+        return values
+
+
+class Fare(Record):
+    __slots__ = ("carrier", "price_units", "table")
+
+    def get(self, travel_type: str, travel_class: str, discount: str):
+        """
+        Gets a single fare, like fare.get("one-way", "standard-class", "full").
+
+        :return: The fare, or None if the response did not contain it.
+        :rtype: float
+        """
+
+        return self.table.get(
+            [key for key, _ in TRAVEL_TYPES].index(travel_type),
+            [key for key, _ in TRAVEL_CLASSES].index(travel_class),
+            [key for key, _ in DISCOUNTS].index(discount)
+        )
+
+    @staticmethod
+    def build_dict(carrier, price_units, table):
+        price = {
+            "carrier": carrier,
+            "price_units": price_units,
+        }
+        price.update(table.to_dict())
+
+        return price
+
+
+class Stop(Record):
+    __slots__ = ("name", "arrival_time", "track", "track_changed")
+
+    @staticmethod
+    def build_dict(**values):
+        return values
+
+
+class TravelAdvice(Record):
+    __slots__ = ("transfers", "optimal", "status", "travel_time_planned", "travel_time_actual", "departure_time_planned", "departure_time_actual", "arrival_time_planned", "arrival_time_actual", "type", "carrier", "commute_type", "ride_id", "state", "details", "parts")
+
+    @staticmethod
+    def build_dict(transfers, optimal, status, travel_time_planned, travel_time_actual, departure_time_planned, departure_time_actual, arrival_time_planned, arrival_time_actual, type, carrier, commute_type, ride_id, state, details, parts):
+        # The stops of the parts are dictionaries already.
+        return {
+            "transfers": transfers,
+            "optimal": optimal,
+            "status": status,
+            "travel_time": {
+                "planned": travel_time_planned,
+                "actual": travel_time_actual,
+            },
+            "departure_time": {
+                "planned": departure_time_planned,
+                "actual": departure_time_actual,
+            },
+            "arrival_time": {
+                "planned": arrival_time_planned,
+                "actual": arrival_time_actual,
+            },
+            "travel_info": {
+                "type": type,
+                "carrier": carrier,
+                "commute_type": commute_type,
+                "ride_id": ride_id,
+                "state": state,
+                "details": details,
+                "parts": parts
+            }
+        }
+
+    def to_dict(self):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values["details"] = list(self.details)
+        values["parts"] = [[stop.to_dict() for stop in stops] for stops in self.parts]
+
+        return self.build_dict(**values)
@@ -0,0 +1,454 @@
+import heapq
+import itertools
+import os
+import random
+import struct
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+
+from nsapi.modules.exceptions import CircuitOpenException
+from nsapi.modules.transport import TransportAdapter
+from nsapi.modules.urls import urlmap
+
+DEFAULT_PRIORITIES = {
+    "travel-recommendations": 0,
+    "departures": 1,
+    "disruptions": 2,
+    "pricing": 3,
+    "stations": 9,
+    "generic": 5,
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def endpoint_of(url: str):
+    """
+    Finds the urlmap endpoint a url belongs to.
+
+    :param url: The request url.
+    :return: The name of the endpoint, "generic" if it is not known.
+    :rtype: str
+    """
+
+    path = url.split("?", 1)[0]
+    for endpoint, base in sorted(urlmap.items(), key=lambda item: -len(item[1])):
+        if path == base or path.startswith(base + "/"):
+            return endpoint
+
+    return "generic"
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = None):
+        """
+        A thread-safe token bucket. Waiting callers are served in order of priority.
+
+        :param rate: Tokens added per second.
+        :param burst: The maximum amount of tokens, the rate if None.
+        """
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def _take(self):
+        """
+        Takes a token if there is one.
+
+        :return: 0 if a token was taken, else the seconds until there is one.
+        :rtype: float
+        """
+
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self, priority: int = 0):
+        """
+        Blocks until a token is available and takes it.
+
+        :param priority: Lower values are served first.
+        :return: The seconds spent waiting.
+        :rtype: float
+        """
+
+        started = time.monotonic()
+        ticket = (priority, next(self._counter))
+
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] == ticket:
+                        wait = self._take()
+                        if wait == 0:
+                            return time.monotonic() - started
+                    else:
+                        wait = None
+
+                    self._condition.wait(wait)
+            finally:
+                self._leave(ticket)
+
+    async def acquire_async(self, priority: int = 0):
+        """
+        Like acquire, but sleeps with asyncio instead of blocking a thread.
+
+        :param priority: Lower values are served first.
+        :return: The seconds spent waiting.
+        :rtype: float
+        """
+
+        import asyncio
+
+        started = time.monotonic()
+        ticket = (priority, next(self._counter))
+
+        with self._condition:
+            heapq.heappush(self._waiters, ticket)
+        try:
+            while True:
+                with self._condition:
+                    if self._waiters[0] == ticket:
+                        wait = self._take()
+                        if wait == 0:
+                            return time.monotonic() - started
+                    else:
+                        # Not notified like the threads, so check again once a token may have been taken.
+                        wait = 1 / self.rate
+
+                await asyncio.sleep(wait)
+        finally:
+            with self._condition:
+                self._leave(ticket)
+
+    def _leave(self, ticket):
+        self._waiters.remove(ticket)
+        heapq.heapify(self._waiters)
+        self._condition.notify_all()
+
+
+class FileTokenBucket(TokenBucket):
+    def __init__(self, path: str, rate: float, burst: float = None):
+        """
+        A token bucket shared by all processes using the same file, guarded with an exclusive file lock.
+        Priorities are only honoured within a process.
+
+        :param path: The path of the state file.
+        :param rate: Tokens added per second.
+        :param burst: The maximum amount of tokens, the rate if None.
+        """
+
+        super().__init__(rate, burst)
+        self.path = path
+
+    _state = struct.Struct("<dd")
+
+    def _take(self):
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            data = os.pread(fd, self._state.size, 0)
+            now = time.time()
+            if len(data) == self._state.size:
+                tokens, updated = self._state.unpack(data)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            else:
+                tokens = self.burst
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            os.pwrite(fd, self._state.pack(tokens, now), 0)
+            return wait
+        finally:
+            os.close(fd)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Stops sending requests after consecutive failures, and lets a single trial request
+        through after reset_timeout seconds.
+
+        :param failure_threshold: The amount of consecutive failures that opens the circuit.
+        :param reset_timeout: Seconds the circuit stays open before a trial request.
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+
+        return "open"
+
+    def before(self):
+        """
+        Throws an exception if requests may not be sent.
+
+        :return: Whether the request is the trial of a half-open circuit. Its outcome has to be recorded, or the trial released.
+        :rtype: bool
+        """
+
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+
+        raise CircuitOpenException("Too many failed requests, not sending requests for now.")
+
+    def release(self):
+        """
+        Gives back the trial of a request that ended without an outcome, so the next request becomes the trial.
+
+        :return: Nothing.
+        """
+
+        with self._lock:
+            self._trial = False
+
+    def record(self, success: bool):
+        with self._lock:
+            self._trial = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class Scheduler:
+    def __init__(self, rate: float = 10, burst: float = None, bucket: TokenBucket = None, max_retries: int = 4, backoff_base: float = 0.5, backoff_cap: float = 30, priorities: dict = None, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Schedules upstream requests: rate limiting with priorities, retries with jittered
+        exponential backoff on 429/5xx and connection errors, and a circuit breaker per endpoint.
+        Install it with SchedulingAdapter (requests) or AsyncSchedulingTransport (httpx).
+
+        :param rate: Requests per second, used if no bucket is given.
+        :param burst: The maximum burst of requests, used if no bucket is given.
+        :param bucket: A TokenBucket, for example a FileTokenBucket to share the limit between processes.
+        :param max_retries: The maximum amount of retries per request.
+        :param backoff_base: The backoff of the first retry in seconds, doubled every retry.
+        :param backoff_cap: The maximum backoff in seconds.
+        :param priorities: Priority per endpoint, lower is sooner. Missing endpoints use DEFAULT_PRIORITIES.
+        :param failure_threshold: Consecutive failures of an endpoint that open its circuit.
+        :param reset_timeout: Seconds an open circuit waits before a trial request.
+        """
+
+        self.bucket = bucket if bucket is not None else TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.priorities = dict(DEFAULT_PRIORITIES)
+        self.priorities.update(priorities or {})
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "rejected": 0,
+            "wait_time": 0.0
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, stat: str, amount=1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def breaker(self, endpoint: str):
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+            return breaker
+
+    def backoff(self, attempt: int, retry_after: str = None):
+        """
+        Gets the seconds to wait before a retry: the Retry-After header if given, else full jitter.
+
+        :param attempt: The number of the retry, starting at 0.
+        :param retry_after: The Retry-After header of the response (optional).
+        :return: The seconds to wait.
+        :rtype: float
+        """
+
+        if retry_after is not None:
+            try:
+                return min(self.backoff_cap, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _admit(self, url: str):
+        endpoint = endpoint_of(url)
+        breaker = self.breaker(endpoint)
+        try:
+            trial = breaker.before()
+        except CircuitOpenException:
+            self._count("rejected")
+            raise
+
+        return breaker, trial, self.priorities.get(endpoint, DEFAULT_PRIORITIES["generic"])
+
+    def before(self, url: str):
+        """
+        Waits for permission to send a request.
+
+        :param url: The request url.
+        :return: A tuple of the breaker of the request's endpoint and whether the request is its trial, see abort().
+        :rtype: tuple
+        """
+
+        breaker, trial, priority = self._admit(url)
+        try:
+            self._count("wait_time", self.bucket.acquire(priority))
+        except BaseException:
+            self.abort(breaker, trial)
+            raise
+
+        self._count("requests")
+        return breaker, trial
+
+    async def before_async(self, url: str):
+        """
+        Like before, but waits for a token with asyncio instead of blocking a thread.
+
+        :param url: The request url.
+        :return: A tuple of the breaker of the request's endpoint and whether the request is its trial.
+        :rtype: tuple
+        """
+
+        breaker, trial, priority = self._admit(url)
+        try:
+            self._count("wait_time", await self.bucket.acquire_async(priority))
+        except BaseException:
+            # Like a cancelled task.
+            self.abort(breaker, trial)
+            raise
+
+        self._count("requests")
+        return breaker, trial
+
+    def abort(self, breaker: CircuitBreaker, trial: bool):
+        """
+        Ends a request that got no response and no connection error, like a cancelled one.
+        It says nothing about the endpoint, so only a trial is given back.
+
+        :param breaker: The breaker returned by before().
+        :param trial: Whether the request was the trial, as returned by before().
+        :return: Nothing.
+        """
+
+        if trial:
+            breaker.release()
+
+    def after(self, breaker: CircuitBreaker, attempt: int, status_code: int = None, retry_after: str = None):
+        """
+        Records the outcome of a request and decides whether to retry it.
+
+        :param breaker: The breaker returned by before().
+        :param attempt: The number of the attempt, starting at 0.
+        :param status_code: The status code of the response, None if the connection failed.
+        :param retry_after: The Retry-After header of the response (optional).
+        :return: The seconds to wait before retrying, or None to not retry.
+        :rtype: float
+        """
+
+        failed = status_code is None or status_code in RETRY_STATUS_CODES
+        # Being throttled does not mean the endpoint is down.
+        breaker.record(not failed or status_code == 429)
+
+        if not failed or attempt >= self.max_retries:
+            return None
+
+        if status_code == 429:
+            self._count("throttled")
+        self._count("retries")
+
+        return self.backoff(attempt, retry_after)
+
+
+class SchedulingAdapter(BaseAdapter):
+    def __init__(self, scheduler: Scheduler, adapter: BaseAdapter = None):
+        """
+        A requests transport adapter that sends every request through a Scheduler.
+        Mount it on a session: session.mount("https://", SchedulingAdapter(scheduler)).
+
+        :param scheduler: The scheduler.
+        :param adapter: The adapter to send with, a default TransportAdapter if None.
+        """
+
+        super().__init__()
+        self.scheduler = scheduler
+        self.adapter = adapter if adapter is not None else TransportAdapter()
+
+    def send(self, request, **kwargs):
+        attempt = 0
+        while True:
+            breaker, trial = self.scheduler.before(request.url)
+
+            try:
+                r = self.adapter.send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self.scheduler.after(breaker, attempt)
+                if delay is None:
+                    raise
+            except BaseException:
+                self.scheduler.abort(breaker, trial)
+                raise
+            else:
+                delay = self.scheduler.after(breaker, attempt, r.status_code, r.headers.get("Retry-After"))
+                if delay is None:
+                    return r
+
+                r.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.adapter.close()
@@ -0,0 +1,93 @@
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces identical concurrent calls: while a call for a key is in flight,
+        other callers with the same key wait for it and share its result (or exception).
+
+        stats["calls"] counts the calls that were made, stats["coalesced"] the callers that shared one.
+        """
+
+        self.stats = {
+            "calls": 0,
+            "coalesced": 0
+        }
+
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, f):
+        """
+        Calls f, unless a call for the same key is already in flight.
+
+        :param key: The key identifying identical calls, like the request url.
+        :param f: A function without arguments.
+        :return: The result of f.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.stats["calls"] += 1
+                leader = True
+            else:
+                self.stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = f()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    async def do_async(self, key: str, coro_f):
+        """
+        Awaits coro_f(), unless a call for the same key is already in flight on this event loop.
+
+        :param key: The key identifying identical calls, like the request url.
+        :param coro_f: A function without arguments returning an awaitable.
+        :return: The result of the awaitable.
+        """
+
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(coro_f())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self._count("calls")
+        else:
+            self._count("coalesced")
+
+        # Shield the shared task, so one cancelled caller does not cancel it for the others.
+        return await asyncio.shield(task)
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
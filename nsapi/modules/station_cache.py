@@ -0,0 +1,271 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from requests import Session
+
+MAGIC = b"NSST"
+FORMAT_VERSION = 1
+
+# magic, format version, fetched at, station count, etag length, last-modified length
+_header = struct.Struct("<4sHdIHH")
+_entry = struct.Struct("<II")
+_length = struct.Struct("<H")
+
+
+def _encode_station(station: dict):
+    fields = [
+        station["code"],
+        station["type"],
+        station["name"]["short"],
+        station["name"]["middle"],
+        station["name"]["full"],
+        station["country"],
+        station["uic"],
+        station["lat"],
+        station["lon"],
+    ] + station["synonyms"]
+
+    out = [_length.pack(len(station["synonyms"]))]
+    for field in fields:
+        encoded = (field or "").encode("utf-8")
+        out.append(_length.pack(len(encoded)))
+        out.append(encoded)
+
+    return b"".join(out)
+
+
+def _decode_fields(buf, offset: int, count: int):
+    fields = []
+    for _ in range(count):
+        length, = _length.unpack_from(buf, offset)
+        offset += _length.size
+        fields.append(str(buf[offset:offset + length], "utf-8"))
+        offset += length
+
+    return fields
+
+
+def _decode_station(buf, offset: int):
+    synonyms, = _length.unpack_from(buf, offset)
+    fields = _decode_fields(buf, offset + _length.size, 9 + synonyms)
+
+    return {
+        "code": fields[0],
+        "type": fields[1],
+        "name": {
+            "short": fields[2],
+            "middle": fields[3],
+            "full": fields[4],
+        },
+        "country": fields[5],
+        "uic": fields[6],
+        "lat": fields[7],
+        "lon": fields[8],
+        "synonyms": fields[9:]
+    }
+
+
+def encode_catalogue(stations: Mapping, fetched_at: float, etag: str = None, last_modified: str = None):
+    """
+    Encodes stations into the binary catalogue format.
+
+    :param stations: The stations as returned by get_stations_f.
+    :param fetched_at: The unix time the stations were fetched at.
+    :param etag: The ETag header of the response, if any.
+    :param last_modified: The Last-Modified header of the response, if any.
+    :return: The encoded catalogue.
+    :rtype: bytes
+    """
+
+    etag = (etag or "").encode("utf-8")
+    last_modified = (last_modified or "").encode("utf-8")
+    records = [_encode_station(station) for station in stations.values()]
+
+    offset = _header.size + len(etag) + len(last_modified) + _entry.size * len(records)
+    index = []
+    for record in records:
+        index.append(_entry.pack(offset, len(record)))
+        offset += len(record)
+
+    header = _header.pack(MAGIC, FORMAT_VERSION, fetched_at, len(records), len(etag), len(last_modified))
+    return b"".join([header, etag, last_modified] + index + records)
+
+
+class StationCatalogue(Mapping):
+    """
+    A read-only mapping of station code to station dictionary, backed by an encoded catalogue.
+    Stations are only decoded when they are accessed.
+    """
+
+    def __init__(self, buf):
+        magic, version, self.fetched_at, count, etag_length, last_modified_length = _header.unpack_from(buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a station catalogue of format version {}.".format(FORMAT_VERSION))
+
+        offset = _header.size
+        self.etag = str(buf[offset:offset + etag_length], "utf-8") or None
+        offset += etag_length
+        self.last_modified = str(buf[offset:offset + last_modified_length], "utf-8") or None
+        offset += last_modified_length
+
+        self._buf = buf
+        self._offsets = {}
+        for i in range(count):
+            record_offset, _ = _entry.unpack_from(buf, offset + i * _entry.size)
+            code, = _decode_fields(buf, record_offset + _length.size, 1)
+            self._offsets[code] = record_offset
+
+    def __getitem__(self, code: str):
+        return _decode_station(self._buf, self._offsets[code])
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, code):
+        return code in self._offsets
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class StationCache:
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600):
+        """
+        Keeps the station list in a versioned binary file, so it only has to be downloaded when it is stale.
+
+        The file is memory-mapped when loaded and replaced atomically when refreshed,
+        so processes sharing the file never see a partially written catalogue.
+
+        :param path: The path of the catalogue file.
+        :param ttl: Seconds after which the catalogue is revalidated with the API.
+        """
+
+        self.path = path
+        self.ttl = ttl
+        self.catalogue = None
+
+    def load(self):
+        """
+        Memory-maps the catalogue file.
+
+        :return: The catalogue, or None if the file is missing or not a valid catalogue.
+        :rtype: StationCatalogue
+        """
+
+        try:
+            with open(self.path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            self.catalogue = StationCatalogue(memoryview(buf))
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+        return self.catalogue
+
+    def store(self, stations: Mapping, fetched_at: float = None, etag: str = None, last_modified: str = None):
+        """
+        Atomically replaces the catalogue file and loads it.
+
+        :return: The new catalogue.
+        :rtype: StationCatalogue
+        """
+
+        if fetched_at is None:
+            fetched_at = time.time()
+        data = encode_catalogue(stations, fetched_at, etag, last_modified)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".stations-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return self.load()
+
+    def fresh(self):
+        """
+        Gets the catalogue if it is younger than the ttl, reloading the file if another process refreshed it.
+
+        :return: The catalogue, or None if there is no fresh catalogue.
+        :rtype: StationCatalogue
+        """
+
+        catalogue = self.catalogue
+        if catalogue is None or catalogue.age() >= self.ttl:
+            catalogue = self.load()
+
+        if catalogue is not None and catalogue.age() < self.ttl:
+            return catalogue
+
+    def get(self, s: "Session", parser: str = None, force: bool = False):
+        """
+        Gets the station catalogue, only contacting the API if the cached one is missing or stale.
+        A stale catalogue is revalidated with its ETag and Last-Modified headers.
+
+        :param s: The session to use for the API.
+        :param parser: The XML parser backend.
+        :param force: Download the station list even if the cached one is fresh.
+        :return: The catalogue.
+        :rtype: StationCatalogue
+        """
+
+        if not force:
+            catalogue = self.fresh()
+            if catalogue is not None:
+                return catalogue
+
+        from nsapi.modules.stations import get_stations_conditional_f
+
+        stations, etag, last_modified = get_stations_conditional_f(s, *self.validators(force), parser=parser)
+        return self.update(stations, etag, last_modified)
+
+    def validators(self, force: bool = False):
+        """
+        Gets the validators to revalidate the cached catalogue with.
+
+        :param force: Download the station list even if it was not modified.
+        :return: A tuple of the ETag and the Last-Modified header, Nones if there is nothing to revalidate.
+        :rtype: tuple
+        """
+
+        catalogue = self.catalogue
+        if force or catalogue is None:
+            return None, None
+
+        return catalogue.etag, catalogue.last_modified
+
+    def update(self, stations: Mapping, etag: str = None, last_modified: str = None):
+        """
+        Stores the answer to a request made with validators().
+
+        :param stations: The downloaded stations, or None if the server answered not modified.
+        :param etag: The ETag header of the response.
+        :param last_modified: The Last-Modified header of the response.
+        :return: The new catalogue.
+        :rtype: StationCatalogue
+        """
+
+        if stations is None:
+            # Not modified, only refresh the timestamp.
+            catalogue = self.catalogue
+            return self.store(catalogue, etag=etag or catalogue.etag, last_modified=last_modified or catalogue.last_modified)
+
+        return self.store(stations, etag=etag, last_modified=last_modified)
@@ -0,0 +1,184 @@
+import bisect
+import re
+import unicodedata
+from collections.abc import Mapping
+
+from nsapi.modules.records import Record
+
+_separators = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(name: str):
+    """
+    Normalizes a station name for lookups: lower case, without diacritics and with single spaces.
+
+    :param name: The name to normalize.
+    :return: The normalized name.
+    :rtype: str
+    """
+
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _separators.sub(" ", stripped).strip()
+
+
+def _trigrams(key: str):
+    padded = "  {} ".format(key)
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StationIndex:
+    def __init__(self, stations: Mapping):
+        """
+        Creates an index to resolve user input to station codes.
+
+        Stations can be looked up by code, UIC code, any of their names and synonyms,
+        by prefix and by fuzzy matching. All lookups ignore case and diacritics.
+        The index is immutable once built, so it can be shared between threads.
+
+        :param stations: The stations as returned by NSApi.get_stations().
+        """
+
+        self.stations = stations
+
+        exact = {}
+        keys = set()
+        for code, station in stations.items():
+            if isinstance(station, Record):
+                station = station.to_dict()
+
+            exact[code.casefold()] = code
+            exact[station["uic"]] = code
+
+            names = [station["name"]["short"], station["name"]["middle"], station["name"]["full"]] + station["synonyms"]
+            for name in names:
+                key = normalize(name)
+                if key:
+                    exact.setdefault(key, code)
+                    keys.add((key, code))
+
+        self._exact = exact
+
+        # Sorted (name, code) pairs for prefix search.
+        self._sorted = tuple(sorted(keys))
+        self._sorted_keys = tuple(key for key, _ in self._sorted)
+
+        # Trigram -> indices into self._sorted for fuzzy search.
+        trigrams = {}
+        for i, (key, _) in enumerate(self._sorted):
+            for trigram in _trigrams(key):
+                trigrams.setdefault(trigram, []).append(i)
+
+        self._trigrams = {trigram: tuple(indices) for trigram, indices in trigrams.items()}
+        self._trigram_counts = tuple(len(_trigrams(key)) for key in self._sorted_keys)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def get(self, query: str):
+        """
+        Resolves an exact station code, UIC code, name or synonym.
+
+        :param query: The user input.
+        :return: The station code, or None if nothing matches exactly.
+        :rtype: str
+        """
+
+        code = self._exact.get(query.casefold())
+        if code is None:
+            code = self._exact.get(normalize(query))
+
+        return code
+
+    def station(self, query: str):
+        """
+        Resolves a query like get() and returns the station itself.
+
+        :param query: The user input.
+        :return: The station dictionary, or None if nothing matches exactly.
+        :rtype: dict
+        """
+
+        code = self.get(query)
+        if code is not None:
+            return self.stations[code]
+
+    def prefix(self, query: str, limit: int = 10):
+        """
+        Finds stations with a name or synonym starting with the query.
+
+        :param query: The start of a station name.
+        :param limit: The maximum amount of station codes to return.
+        :return: A list of station codes, in alphabetical order of the matched name.
+        :rtype: list
+        """
+
+        key = normalize(query)
+        codes = []
+
+        i = bisect.bisect_left(self._sorted_keys, key)
+        while i < len(self._sorted) and len(codes) < limit:
+            name, code = self._sorted[i]
+            if not name.startswith(key):
+                break
+
+            if code not in codes:
+                codes.append(code)
+            i += 1
+
+        return codes
+
+    def fuzzy(self, query: str, limit: int = 5, cutoff: float = 0.3):
+        """
+        Finds stations with a name or synonym similar to the query, using trigram similarity.
+
+        :param query: The (misspelled) station name.
+        :param limit: The maximum amount of matches to return.
+        :param cutoff: The minimum similarity between 0 and 1.
+        :return: A list of (station code, similarity) tuples, best match first.
+        :rtype: list
+        """
+
+        query_trigrams = _trigrams(normalize(query))
+
+        shared = {}
+        for trigram in query_trigrams:
+            for i in self._trigrams.get(trigram, ()):
+                shared[i] = shared.get(i, 0) + 1
+
+        best = {}
+        for i, count in shared.items():
+            # Dice coefficient of the two trigram sets.
+            score = 2 * count / (len(query_trigrams) + self._trigram_counts[i])
+            code = self._sorted[i][1]
+            if score >= cutoff and score > best.get(code, 0):
+                best[code] = score
+
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def search(self, query: str, limit: int = 10):
+        """
+        Finds stations for user input: exact matches first, then prefix matches, then fuzzy matches.
+
+        :param query: The user input.
+        :param limit: The maximum amount of station codes to return.
+        :return: A list of station codes.
+        :rtype: list
+        """
+
+        codes = []
+
+        code = self.get(query)
+        if code is not None:
+            codes.append(code)
+
+        for code in self.prefix(query, limit):
+            if code not in codes:
+                codes.append(code)
+
+        if len(codes) < limit:
+            for code, _ in self.fuzzy(query, limit):
+                if code not in codes:
+                    codes.append(code)
+
+        return codes[:limit]
@@ -1,33 +1,63 @@
-from bs4 import BeautifulSoup
-from requests import Session
+from typing import TYPE_CHECKING
 
-from nsapi.modules.urls import urlmap
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.records import Station
+from nsapi.modules.urls import conditional_headers, endpoint_url
 
+if TYPE_CHECKING:
+    from requests import Session
 
-def get_stations_f(s: Session):
-    r = s.get(urlmap["stations"])
-    b = BeautifulSoup(r.content.decode("utf-8", "ignore"), 'xml')
+    from nsapi.modules.parse_pool import ParsePool
 
+
+def _build_station(station_o, records: bool = False):
+    names_o = station_o.find("Namen")
+    build = Station if records else Station.build_dict
+
+    return build(
+        code=station_o.find("Code").text,
+        type=station_o.find("Type").text,
+        name_short=names_o.find("Kort").text,
+        name_middle=names_o.find("Middel").text,
+        name_full=names_o.find("Lang").text,
+        country=station_o.find("Land").text,
+        uic=station_o.find("UICCode").text,
+        lat=station_o.find("Lat").text,
+        lon=station_o.find("Lon").text,
+        synonyms=[synonym_o.text for synonym_o in station_o.find_all("Synoniem")]
+    )
+
+
+def parse_stations(r, parser: str = None, records: bool = False):
     stations = {}
-    for station_o in b.find("Stations").find_all("Station"):
-        station = {
-            "code": station_o.find("Code").text,
-            "type": station_o.find("Type").text,
-            "name": {
-                "short": station_o.find("Namen").find("Kort").text,
-                "middle": station_o.find("Namen").find("Middel").text,
-                "full": station_o.find("Namen").find("Lang").text,
-            },
-            "country": station_o.find("Land").text,
-            "uic": station_o.find("UICCode").text,
-            "lat": station_o.find("Lat").text,
-            "lon": station_o.find("Lon").text,
-            "synonyms": []
-        }
-
-        for synonym_o in station_o.find_all("Synoniem"):
-            station["synonyms"].append(synonym_o.text)
-
-        stations[station["code"]] = station
+    for station_o in iter_elements(r, "Station", parser):
+        station = _build_station(station_o, records)
+        stations[station.code if records else station["code"]] = station
 
     return stations
+
+
+@instrumented("stations")
+def get_stations_f(s: "Session", parser: str = None, records: bool = False, pool: "ParsePool" = None):
+    with s.get(endpoint_url("stations"), stream=True) as r:
+        if pool is not None:
+            return pool.parse(parse_stations, r, parser, records)
+
+        return parse_stations(r, parser, records)
+
+
+@instrumented("stations")
+def get_stations_conditional_f(s: "Session", etag: str = None, last_modified: str = None, parser: str = None):
+    """
+    Gets the stations, unless they did not change since the response with the given validators.
+
+    :return: A tuple of the stations (None if not modified), the ETag and the Last-Modified header.
+    :rtype: tuple
+    """
+
+    with s.get(endpoint_url("stations"), headers=conditional_headers(etag, last_modified), stream=True) as r:
+        if r.status_code == 304:
+            return None, r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+        return parse_stations(r, parser), r.headers.get("ETag"), r.headers.get("Last-Modified")
@@ -0,0 +1,114 @@
+import datetime
+import functools
+
+_timezones = {
+    "": None,
+    "Z": datetime.timezone.utc,
+}
+
+
+def timezone_for(offset: str):
+    """
+    Gets the tzinfo for a UTC offset like "+0200", "-01:30" or "Z". The objects are cached.
+
+    :param offset: The offset as it appears after the time.
+    :return: The timezone, or None if the offset is empty.
+    :rtype: datetime.timezone
+    """
+
+    try:
+        return _timezones[offset]
+    except KeyError:
+        pass
+
+    digits = offset[1:].replace(":", "")
+    if offset[:1] not in ("+", "-") or len(digits) not in (2, 4) or not digits.isdigit():
+        raise ValueError("Invalid UTC offset: {!r}".format(offset))
+
+    minutes = int(digits[:2]) * 60 + int(digits[2:] or 0)
+    if offset[0] == "-":
+        minutes = -minutes
+
+    tz = _timezones[offset] = datetime.timezone(datetime.timedelta(minutes=minutes))
+    return tz
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_timestamp(value: str):
+    """
+    Parses an NS API timestamp like "2026-10-18T10:00:00+0200" into an aware datetime.
+    Seconds are optional, the offset may be +HHMM, -HHMM, +HH:MM or Z.
+    Recent results are cached, since boards and advice repeat the same times.
+
+    :param value: The timestamp.
+    :return: The datetime.
+    :rtype: datetime.datetime
+    """
+
+    if value[16:17] == ":":
+        seconds = int(value[17:19])
+        offset = value[19:]
+    else:
+        seconds = 0
+        offset = value[16:]
+
+    return datetime.datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]), int(value[14:16]), seconds, tzinfo=timezone_for(offset))
+
+
+def parse_timestamps(values):
+    """
+    Parses many timestamps at once. Repeated timestamps are only parsed once and share one datetime.
+
+    :param values: An iterable of timestamps.
+    :return: A list of datetimes.
+    :rtype: list
+    """
+
+    parsed = {}
+    out = []
+    for value in values:
+        dt = parsed.get(value)
+        if dt is None:
+            dt = parsed[value] = parse_timestamp(value)
+
+        out.append(dt)
+
+    return out
+
+
+def to_datetime64(timestamps):
+    """
+    Converts timestamps to UTC datetime64[s] with NumPy, vectorized.
+
+    :param timestamps: A sequence of timestamps in the formats parse_timestamp accepts, like "2026-10-18T10:00:00+0200".
+    :return: An array of UTC times.
+    :rtype: numpy.ndarray
+    """
+
+    import numpy as np
+
+    raw = np.asarray(timestamps, dtype="S25")
+    if len(raw) == 0:
+        return np.empty(0, dtype="datetime64[s]")
+
+    chars = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(len(raw), 25)
+
+    # Without seconds the offset would end up in the local time, so insert ":00" before it.
+    short = chars[:, 16] != ord(":")
+    if short.any():
+        chars = chars.copy()
+        chars[short, 19:] = chars[short, 16:22]
+        chars[short, 16:19] = np.frombuffer(b":00", dtype=np.uint8)
+
+    local = np.ascontiguousarray(chars[:, :19]).view("S19")[:, 0].astype("datetime64[s]")
+
+    # Read the offset straight from the ASCII bytes after the seconds.
+    signs = np.where(chars[:, 19] == ord("-"), -1, 1)
+    has_offset = (chars[:, 19] == ord("+")) | (chars[:, 19] == ord("-"))
+
+    digits = chars[:, 20:25].astype(np.int64) - ord("0")
+    hours = digits[:, 0] * 10 + digits[:, 1]
+    minutes = np.where(chars[:, 22] == ord(":"), digits[:, 3] * 10 + digits[:, 4], digits[:, 2] * 10 + digits[:, 3])
+    offsets = np.where(has_offset, signs * (hours * 60 + minutes), 0)
+
+    return local - offsets.astype("timedelta64[m]")
@@ -0,0 +1,389 @@
+import collections
+import os
+import ssl
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, get_encoding_from_headers, select_proxy
+
+RequestMetrics = collections.namedtuple("RequestMetrics", ["url", "status_code", "ttfb", "wire_bytes", "body_bytes", "content_encoding"])
+
+
+def accept_encoding(compression: bool = True):
+    """
+    Gets the Accept-Encoding header to send.
+
+    :param compression: Ask for compressed responses.
+    :return: gzip and deflate, plus br if a brotli decoder is installed. identity if compression is False.
+    :rtype: str
+    """
+
+    if not compression:
+        return "identity"
+
+    encodings = ["gzip", "deflate"]
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+
+        encodings.append("br")
+        break
+
+    return ", ".join(encodings)
+
+
+class TransportMetrics:
+    def __init__(self, keep: int = 1000):
+        """
+        Collects the bytes on the wire, decompressed body size and time to first byte of every request.
+
+        :param keep: The amount of recent requests to keep in recent.
+        """
+
+        self.recent = collections.deque(maxlen=keep)
+        self.stats = {
+            "requests": 0,
+            "compressed": 0,
+            "wire_bytes": 0,
+            "body_bytes": 0,
+            "ttfb": 0.0
+        }
+        self._lock = threading.Lock()
+
+    def record(self, url: str, status_code: int, ttfb: float, wire_bytes: int, body_bytes: int, content_encoding: str = None):
+        """
+        Records a finished request.
+
+        :param url: The request url.
+        :param status_code: The status code of the response.
+        :param ttfb: Seconds from sending the request until the response headers arrived.
+        :param wire_bytes: The size of the body as sent over the wire, None if it is not known (chunked responses).
+        :param body_bytes: The size of the body after decompression.
+        :param content_encoding: The Content-Encoding of the response (optional).
+        :return: Nothing.
+        """
+
+        with self._lock:
+            self.recent.append(RequestMetrics(url, status_code, ttfb, wire_bytes, body_bytes, content_encoding))
+            self.stats["requests"] += 1
+            self.stats["wire_bytes"] += wire_bytes if wire_bytes is not None else body_bytes
+            self.stats["body_bytes"] += body_bytes
+            self.stats["ttfb"] += ttfb
+            if content_encoding and content_encoding != "identity":
+                self.stats["compressed"] += 1
+
+    def summary(self):
+        """
+        Summarises the recorded requests.
+
+        :return: A dictionary with the totals, the compression ratio and the mean time to first byte.
+        :rtype: dict
+        """
+
+        with self._lock:
+            summary = dict(self.stats)
+
+        requests_made = summary["requests"] or 1
+        summary["mean_wire_bytes"] = summary["wire_bytes"] / requests_made
+        summary["compression_ratio"] = summary["body_bytes"] / (summary["wire_bytes"] or 1)
+        summary["mean_ttfb"] = summary["ttfb"] / requests_made
+        return summary
+
+
+class TransportConfig:
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False, connect_timeout: float = 5, read_timeout: float = 30, compression: bool = True, http2: bool = False, metrics: TransportMetrics = None):
+        """
+        Configures how requests are sent.
+
+        :param pool_connections: The amount of hosts to keep a connection pool for.
+        :param pool_maxsize: The maximum amount of connections kept open per host.
+        :param pool_block: Wait for a free connection instead of opening one beyond pool_maxsize.
+        :param connect_timeout: Seconds to wait for a connection, None to wait forever.
+        :param read_timeout: Seconds to wait between bytes of the response, None to wait forever.
+        :param compression: Ask for gzip, deflate or brotli compressed responses.
+        :param http2: Send requests over HTTP/2 with httpx, which needs the httpx and h2 packages.
+        :param metrics: A TransportMetrics to record requests in, a new one if None.
+        """
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.compression = compression
+        self.http2 = http2
+        self.metrics = metrics if metrics is not None else TransportMetrics()
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def headers(self):
+        return {"Accept-Encoding": accept_encoding(self.compression)}
+
+    def adapter(self):
+        """
+        Creates a requests transport adapter with this configuration.
+
+        :return: An HTTPXAdapter if http2 is set, else a TransportAdapter.
+        :rtype: BaseAdapter
+        """
+
+        if self.http2:
+            return HTTPXAdapter(self)
+
+        return TransportAdapter(self)
+
+    def configure(self, s: requests.Session, adapter: BaseAdapter = None):
+        """
+        Applies this configuration to a session.
+
+        :param s: The session.
+        :param adapter: The adapter to mount, see adapter() if None.
+        :return: Nothing.
+        """
+
+        adapter = adapter if adapter is not None else self.adapter()
+
+        s.headers.update(self.headers())
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+
+    def httpx_options(self):
+        """
+        Gets the httpx.AsyncClient options of this configuration.
+
+        :return: A dictionary with timeout, http2 and headers.
+        :rtype: dict
+        """
+
+        import httpx
+
+        return {
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "http2": self.http2,
+            "headers": self.headers()
+        }
+
+
+class TransportAdapter(HTTPAdapter):
+    def __init__(self, config: TransportConfig = None, **kwargs):
+        """
+        A requests transport adapter with the pool size and default timeouts of a TransportConfig,
+        which records every request in the config's metrics.
+
+        :param config: The configuration, the defaults if None.
+        :param kwargs: Arguments for HTTPAdapter, overriding the config.
+        """
+
+        self.transport_config = config if config is not None else TransportConfig()
+
+        options = {
+            "pool_connections": self.transport_config.pool_connections,
+            "pool_maxsize": self.transport_config.pool_maxsize,
+            "pool_block": self.transport_config.pool_block
+        }
+        options.update(kwargs)
+        super().__init__(**options)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.transport_config.timeout
+
+        started = time.perf_counter()
+        r = super().send(request, timeout=timeout, **kwargs)
+        self._meter(r, time.perf_counter() - started)
+
+        return r
+
+    def _meter(self, r: requests.Response, ttfb: float):
+        # The body is streamed into the parser, so its size is only known once it has been read.
+        # requests reads every body through raw.stream(), and closes the ones it does not read.
+        raw = r.raw
+        stream = raw.stream
+        close = raw.close
+        metrics = self.transport_config.metrics
+        body_bytes = [0]
+        recorded = []
+
+        def record():
+            if not recorded:
+                recorded.append(True)
+                # urllib3 does not count the bytes of chunked responses.
+                wire_bytes = raw.tell() if not raw.chunked else None
+                metrics.record(r.url, r.status_code, ttfb, wire_bytes, body_bytes[0], r.headers.get("Content-Encoding"))
+
+        def stream_and_record(*args, **kwargs):
+            try:
+                for chunk in stream(*args, **kwargs):
+                    body_bytes[0] += len(chunk)
+                    yield chunk
+            finally:
+                record()
+
+        def close_and_record():
+            record()
+            close()
+
+        raw.stream = stream_and_record
+        raw.close = close_and_record
+
+
+class _HTTPXBody:
+    def __init__(self, response, on_close):
+        """
+        A file-like view of a streamed httpx response, used as the raw body of a requests.Response.
+        The content is already decompressed by httpx.
+
+        :param response: The httpx response.
+        :param on_close: Called once the body is read completely or closed.
+        """
+
+        self.response = response
+        self.on_close = on_close
+
+        self._chunks = response.iter_bytes()
+        self._buffer = bytearray()
+        self.body_bytes = 0
+        self._closed = False
+
+    def read(self, amt: int = None):
+        import httpx
+
+        while not self._closed and (amt is None or len(self._buffer) < amt):
+            try:
+                chunk = next(self._chunks, None)
+            except httpx.TimeoutException as e:
+                raise requests.ReadTimeout(e)
+            except httpx.TransportError as e:
+                raise requests.ConnectionError(e)
+
+            if chunk is None:
+                self.close()
+                break
+
+            self.body_bytes += len(chunk)
+            self._buffer += chunk
+
+        if amt is None or amt >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:amt])
+            del self._buffer[:amt]
+
+        return data
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.response.close()
+            self.on_close()
+
+    def release_conn(self):
+        self.close()
+
+
+def _ssl_context(verify, cert):
+    # Like requests: verify is a bool or the path of a CA bundle or directory, cert a path or a (cert, key) tuple.
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        ca = verify if isinstance(verify, str) else DEFAULT_CA_BUNDLE_PATH
+        if os.path.isdir(ca):
+            context = ssl.create_default_context(capath=ca)
+        else:
+            context = ssl.create_default_context(cafile=ca)
+
+    if cert is not None:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+
+    return context
+
+
+class HTTPXAdapter(BaseAdapter):
+    def __init__(self, config: TransportConfig = None):
+        """
+        A requests transport adapter that sends requests with httpx, over HTTP/2 if the config asks for it.
+
+        :param config: The configuration, the defaults if None.
+        """
+
+        super().__init__()
+        self.transport_config = config if config is not None else TransportConfig()
+
+        # One client per TLS and proxy setting, as httpx configures those per client and requests per request.
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, verify, cert, proxy: str):
+        import httpx
+
+        key = (verify, cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = httpx.Client(
+                    http2=self.transport_config.http2,
+                    verify=_ssl_context(verify, cert),
+                    proxy=proxy,
+                    trust_env=False,
+                    limits=httpx.Limits(max_connections=self.transport_config.pool_maxsize, max_keepalive_connections=self.transport_config.pool_maxsize),
+                    timeout=httpx.Timeout(self.transport_config.read_timeout, connect=self.transport_config.connect_timeout)
+                )
+
+            return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        if timeout is None:
+            timeout = self.transport_config.timeout
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+        # requests already resolved the proxies of the environment and no_proxy.
+        client = self._client(verify, tuple(cert) if isinstance(cert, list) else cert, select_proxy(request.url, proxies or {}))
+
+        started = time.perf_counter()
+        try:
+            hr = client.send(client.build_request(request.method, request.url, headers=dict(request.headers), content=request.body, timeout=timeout), stream=True)
+        except httpx.ConnectTimeout as e:
+            raise requests.ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+        ttfb = time.perf_counter() - started
+
+        r = requests.Response()
+        r.status_code = hr.status_code
+        r.reason = hr.reason_phrase
+        r.headers = CaseInsensitiveDict(hr.headers.items())
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.url = request.url
+        r.request = request
+        r.connection = self
+        r.raw = _HTTPXBody(hr, lambda: self.transport_config.metrics.record(r.url, r.status_code, ttfb, hr.num_bytes_downloaded, r.raw.body_bytes, r.headers.get("Content-Encoding")))
+
+        if not stream:
+            r.content
+
+        return r
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+
+        for client in clients:
+            client.close()
@@ -1,19 +1,16 @@
 import datetime
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
-from requests import Session
+from nsapi.modules.instrumentation import instrumented
+from nsapi.modules.parsing import iter_elements
+from nsapi.modules.records import Stop, TravelAdvice
+from nsapi.modules.timestamps import parse_timestamp
+from nsapi.modules.urls import endpoint_url
 
-from nsapi.modules.urls import urlmap, create_get_request, form_url
+if TYPE_CHECKING:
+    from requests import Session
 
-
-def _convert_to_datetime(iso8601_datestr: str):
-    date, time = iso8601_datestr.split("T")
-    time, timezone = time.split("+")
-    tzd, tzh, tzm, tzs = map(int, list(timezone))
-
-    dy, dm, dd = map(int, date.split("-"))
-    th, tm, ts = map(int, time.split(":"))
-    return datetime.datetime(dy, dm, dd, th, tm, ts, tzinfo=datetime.timezone(datetime.timedelta(days=tzd, hours=tzh, minutes=tzm, seconds=tzs)))
+    from nsapi.modules.parse_pool import ParsePool
 
 
 def _get_text_if_exists(tag):
@@ -26,7 +23,7 @@ def _get_attr_if_exists(tag, attr):
         return tag[attr]
 
 
-def get_travel_recommendations_f(s: Session, from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None):
+def travel_recommendations_options(from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None):
     options = {
         "fromStation": from_station,
         "toStation": to_station
@@ -60,61 +57,73 @@ def get_travel_recommendations_f(s: Session, from_station: str, to_station: str,
     if has_year_card is not None:
         options["yearCard"] = str(has_year_card).lower()
 
-    r = s.get(form_url(urlmap["travel-recommendations"], create_get_request(options)))
-    b = BeautifulSoup(r.content.decode("utf-8", "ignore"), 'xml')
+    return options
+
+
+def _build_stop(stop_o, records: bool = False):
+    track_o = stop_o.find("Spoor")
+    build = Stop if records else Stop.build_dict
+
+    return build(
+        name=stop_o.find("Naam").text,
+        arrival_time=parse_timestamp(stop_o.find("Tijd").text),
+        track=_get_text_if_exists(track_o),
+        track_changed=_get_attr_if_exists(track_o, "wijziging")
+    )
+
+
+def _build_possibility(possibility_o, records: bool = False):
+    first_part_o = possibility_o.find("ReisDeel")
+    build = TravelAdvice if records else TravelAdvice.build_dict
+
+    return build(
+        transfers=int(possibility_o.find("AantalOverstappen").text),
+        optimal=possibility_o.find("Optimaal").text == "true",
+        status=possibility_o.find("Status").text,
+        travel_time_planned=possibility_o.find("GeplandeReisTijd").text,
+        travel_time_actual=possibility_o.find("ActueleReisTijd").text,
+        departure_time_planned=parse_timestamp(possibility_o.find("GeplandeVertrekTijd").text),
+        departure_time_actual=parse_timestamp(possibility_o.find("ActueleVertrekTijd").text),
+        arrival_time_planned=parse_timestamp(possibility_o.find("GeplandeAankomstTijd").text),
+        arrival_time_actual=parse_timestamp(possibility_o.find("ActueleAankomstTijd").text),
+        type=first_part_o["reisSoort"],
+        carrier=first_part_o.find("Vervoerder").text,
+        commute_type=first_part_o.find("VervoerType").text,
+        ride_id=first_part_o.find("RitNummer").text,
+        state=first_part_o.find("Status").text,
+        details=[detail_o.text for detail_o in possibility_o.find_all("Reisdetail")],
+        parts=[[_build_stop(stop_o, records) for stop_o in part_o.find_all("ReisStop")] for part_o in possibility_o.find_all("ReisDeel")]
+    )
+
 
+def advice_key(advice):
+    """
+    Identifies a possibility by its ride and planned departure, to find the same one in overlapping responses.
+
+    :param advice: An advice dictionary or TravelAdvice record.
+    :return: A (ride id, planned departure) tuple.
+    :rtype: tuple
+    """
+
+    if isinstance(advice, TravelAdvice):
+        return advice.ride_id, advice.departure_time_planned
+
+    return advice["travel_info"]["ride_id"], advice["departure_time"]["planned"]
+
+
+def parse_travel_recommendations(r, parser: str = None, records: bool = False):
     possibilities = []
-    for possibility_o in b.find_all("ReisMogelijkheid"):
-        possibility = {
-            "transfers": int(possibility_o.find("AantalOverstappen").text),
-            "optimal": possibility_o.find("Optimaal").text == "true",
-            "status": possibility_o.find("Status").text,
-            "travel_time": {
-                "planned": possibility_o.find("GeplandeReisTijd").text,
-                "actual": possibility_o.find("ActueleReisTijd").text,
-            },
-            "departure_time": {
-                "planned": _convert_to_datetime(possibility_o.find("GeplandeVertrekTijd").text),
-                "actual": _convert_to_datetime(possibility_o.find("ActueleVertrekTijd").text),
-            },
-            "arrival_time": {
-                "planned": _convert_to_datetime(possibility_o.find("GeplandeAankomstTijd").text),
-                "actual": _convert_to_datetime(possibility_o.find("ActueleAankomstTijd").text),
-            },
-            "travel_info": {
-                "type": possibility_o.find("ReisDeel")["reisSoort"],
-                "carrier": possibility_o.find("ReisDeel").find("Vervoerder").text,
-                "commute_type": possibility_o.find("ReisDeel").find("VervoerType").text,
-                "ride_id": possibility_o.find("ReisDeel").find("RitNummer").text,
-                "state": possibility_o.find("ReisDeel").find("Status").text,
-                "details": [],
-                "parts": []
-            }
-        }
-
-        details = []
-        for detail_o in possibility_o.find_all("Reisdetail"):
-            details.append(detail_o.text)
-
-        parts = []
-        for part_o in possibility_o.find_all("ReisDeel"):
-            stops = []
-
-            for stop_o in part_o.find_all("ReisStop"):
-                stop = {
-                    "name": stop_o.find("Naam").text,
-                    "arrival_time": _convert_to_datetime(stop_o.find("Tijd").text),
-                    "track": _get_text_if_exists(stop_o.find("Spoor")),
-                    "track_changed": _get_attr_if_exists(stop_o.find("Spoor"), "wijziging")
-                }
-
-                stops.append(stop)
-
-            parts.append(stops)
-
-        possibility["travel_info"]["details"] = details
-        possibility["travel_info"]["parts"] = parts
-
-        possibilities.append(possibility)
+    for possibility_o in iter_elements(r, "ReisMogelijkheid", parser):
+        possibilities.append(_build_possibility(possibility_o, records))
 
     return possibilities
+
+
+@instrumented("travel-recommendations")
+def get_travel_recommendations_f(s: "Session", from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None, parser: str = None, records: bool = False, pool: "ParsePool" = None):
+    options = travel_recommendations_options(from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card)
+    with s.get(endpoint_url("travel-recommendations", options), stream=True) as r:
+        if pool is not None:
+            return pool.parse(parse_travel_recommendations, r, parser, records)
+
+        return parse_travel_recommendations(r, parser, records)
@@ -21,6 +21,41 @@ def form_url(*args, separate_char: str = ""):
     return separate_char.join(args)
 
 
+def endpoint_url(endpoint: str, options: dict = None):
+    """
+    Forms the full url of a request to an endpoint.
+
+    :param endpoint: The name of the endpoint in urlmap.
+    :param options: A dictionary of GET options (optional).
+    :return: The url
+    :rtype: str
+    """
+
+    if not options:
+        return urlmap[endpoint]
+
+    return form_url(urlmap[endpoint], create_get_request(options))
+
+
+def conditional_headers(etag: str = None, last_modified: str = None):
+    """
+    Creates the headers of a conditional request from the validators of an earlier response.
+
+    :param etag: The ETag header of the earlier response (optional).
+    :param last_modified: The Last-Modified header of the earlier response (optional).
+    :return: A dictionary of headers.
+    :rtype: dict
+    """
+
+    headers = {}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    if last_modified is not None:
+        headers["If-Modified-Since"] = last_modified
+
+    return headers
+
+
 __base_url = "https://webservices.ns.nl/ns-api"
 urlmap = {
     "generic": __base_url,
@@ -0,0 +1,440 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from nsapi.modules.disruptions import get_disruptions_conditional_f
+from nsapi.modules.records import Record
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple("Event", ["kind", "key", "current", "previous"])
+Event.__doc__ = """
+A change between two snapshots. kind is "added", "changed" or "resolved".
+current is None for resolved records, previous is None for added records.
+"""
+
+ADDED = "added"
+CHANGED = "changed"
+RESOLVED = "resolved"
+
+
+def _freeze(value):
+    if isinstance(value, Record):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+
+    return value
+
+
+def fingerprint(value):
+    """
+    Creates a cheap fingerprint of a (nested) result, to compare snapshots without comparing every field.
+
+    :param value: A dictionary, list, record or plain value.
+    :return: The fingerprint.
+    :rtype: int
+    """
+
+    return hash(_freeze(value))
+
+
+def diff_snapshots(previous: dict, current: dict):
+    """
+    Compares two snapshots of {key: (fingerprint, record)}.
+
+    :param previous: The old snapshot.
+    :param current: The new snapshot.
+    :return: A list of events, added and changed in the order of current, then resolved.
+    :rtype: list
+    """
+
+    events = []
+    for key, (print_, record) in current.items():
+        old = previous.get(key)
+        if old is None:
+            events.append(Event(ADDED, key, record, None))
+        elif old[0] != print_:
+            events.append(Event(CHANGED, key, record, old[1]))
+
+    for key, (_, record) in previous.items():
+        if key not in current:
+            events.append(Event(RESOLVED, key, None, record))
+
+    return events
+
+
+class AdaptiveInterval:
+    def __init__(self, interval: float, min_interval: float, max_interval: float, factor: float = 1.5):
+        """
+        A polling interval that shortens while things change and grows while they do not.
+
+        :param interval: The starting interval in seconds.
+        :param min_interval: The shortest interval.
+        :param max_interval: The longest interval.
+        :param factor: The factor to grow or shrink with.
+        """
+
+        self.value = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+
+    def update(self, changed: bool):
+        if changed:
+            self.value = max(self.min_interval, self.value / self.factor)
+        else:
+            self.value = min(self.max_interval, self.value * self.factor)
+
+        return self.value
+
+
+class DisruptionWatcher:
+    def __init__(self, api, actual: bool = True, station: str = None, unplanned: bool = None, interval: float = 30, min_interval: float = 10, max_interval: float = 300, emit_initial: bool = True):
+        """
+        Polls the disruptions and emits only what changed since the previous poll.
+
+        Every disruption is fingerprinted by its fields and kept by id, so a poll only
+        has to compare fingerprints. Polls use conditional requests, so an unchanged feed
+        costs no parsing when the server supports ETag or Last-Modified.
+        The interval adapts: it shrinks while disruptions change and grows while they do not.
+
+        :param api: The NSApi object to poll with.
+        :param actual: Only watch disruptions that are going on at this time if True.
+        :param station: Only watch disruptions that affect this station.
+        :param unplanned: Whether to watch unplanned disruptions too.
+        :param interval: The starting interval in seconds.
+        :param min_interval: The shortest interval in seconds.
+        :param max_interval: The longest interval in seconds.
+        :param emit_initial: Emit the disruptions of the first poll as added.
+        """
+
+        self.api = api
+        self.actual = actual
+        self.station = station
+        self.unplanned = unplanned
+        self.interval = AdaptiveInterval(interval, min_interval, max_interval)
+
+        self.snapshot = None
+        self._emit_initial = emit_initial
+        self._etag = None
+        self._last_modified = None
+
+        self.stats = {
+            "polls": 0,
+            "not_modified": 0,
+            "events": 0
+        }
+
+    def poll(self):
+        """
+        Polls the disruptions once.
+
+        :return: A list of Events, keyed by disruption id.
+        :rtype: list
+        """
+
+        self.api.auth.ensure(self.api.r)
+
+        disruptions, etag, last_modified = get_disruptions_conditional_f(
+            self.api.r, self.actual, self.station, self.unplanned, self._etag, self._last_modified,
+            parser=self.api.parser, records=self.api.records
+        )
+        self.stats["polls"] += 1
+        # A 304 may leave out the validators, which then stay the same.
+        self._etag = etag or self._etag
+        self._last_modified = last_modified or self._last_modified
+
+        if disruptions is None:
+            self.stats["not_modified"] += 1
+            self.interval.update(False)
+            return []
+
+        current = {}
+        for section in ("unexpected", "expected"):
+            for key, disruption in disruptions[section].items():
+                current[key] = (fingerprint((section, disruption)), disruption)
+
+        previous = self.snapshot
+        self.snapshot = current
+        if previous is None:
+            if not self._emit_initial:
+                self.interval.update(False)
+                return []
+            previous = {}
+
+        events = diff_snapshots(previous, current)
+        self.stats["events"] += len(events)
+        self.interval.update(bool(events))
+
+        return events
+
+    def __iter__(self):
+        """
+        Polls forever, sleeping the adaptive interval in between, and yields every Event.
+        Stop by breaking out of the loop.
+        """
+
+        while True:
+            yield from self.poll()
+            time.sleep(self.interval.value)
+
+    async def __aiter__(self):
+        """
+        Like __iter__, as an async iterator. The polls run in a thread so the event loop is not blocked.
+        """
+
+        while True:
+            for event in await asyncio.get_running_loop().run_in_executor(None, self.poll):
+                yield event
+
+            await asyncio.sleep(self.interval.value)
+
+
+BoardEvent = namedtuple("BoardEvent", ["kind", "station", "journey", "current", "previous", "changes"])
+BoardEvent.__doc__ = """
+A change on a departure board. kind is "added", "changed" or "departed".
+changes lists the changed fields ("delay", "platform", "tip", "comments") of changed trains.
+"""
+
+DEPARTED = "departed"
+
+# Ends the iteration of a cancelled async subscription.
+_CANCELLED = object()
+
+
+def _board_fields(train):
+    if isinstance(train, Record):
+        return {
+            "delay": (train.delay_time, train.delay_reason),
+            "platform": (train.platform, train.platform_changed),
+            "tip": train.tip,
+            "comments": tuple(train.comments),
+        }
+
+    return {
+        "delay": (train["delay"]["time"], train["delay"]["reason"]),
+        "platform": (train["departs_from"]["platform"], train["departs_from"]["changed"]),
+        "tip": train["tip"],
+        "comments": tuple(train["comments"]),
+    }
+
+
+class _Subscription:
+    def __init__(self, boards, station: str, callback):
+        self.boards = boards
+        self.station = station
+        self.callback = callback
+
+    def cancel(self):
+        self.boards._unsubscribe(self)
+
+
+class _AsyncSubscription(_Subscription):
+    def __init__(self, boards, station: str, loop):
+        super().__init__(boards, station, self._put)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def _put(self, event):
+        # Events come from the polling thread.
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def cancel(self):
+        super().cancel()
+        self._put(_CANCELLED)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is _CANCELLED:
+            # Leave it for any other waiter.
+            self.queue.put_nowait(_CANCELLED)
+            raise StopAsyncIteration
+
+        return event
+
+
+class DepartureBoards:
+    def __init__(self, api, interval: float = 30, max_concurrency: int = 8):
+        """
+        Streams per-train changes of departure boards to subscribers.
+
+        Every subscribed station is polled once per interval, no matter how many subscribers
+        it has, and all stations are polled in parallel. Subscribers first receive the current board
+        as added trains, and after that only BoardEvents for new trains, departed trains, and
+        trains whose delay, platform, tip or comments changed.
+        Call start() to poll in a background thread, or call poll() yourself.
+
+        :param api: The NSApi object to poll with.
+        :param interval: Seconds between polls.
+        :param max_concurrency: The maximum amount of stations fetched at the same time.
+        """
+
+        self.api = api
+        self.interval = interval
+        self.max_concurrency = max_concurrency
+
+        self.snapshots = {}
+        self.stats = {
+            "polls": 0,
+            "errors": 0,
+            "events": 0
+        }
+
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, station: str, callback):
+        """
+        Calls callback(event) for every BoardEvent of a station, from the polling thread.
+        Exceptions of the callback are logged and counted in stats["errors"].
+
+        :param station: The station code.
+        :param callback: A function taking a BoardEvent.
+        :return: A subscription, call its cancel() to unsubscribe.
+        """
+
+        return self._subscribe(_Subscription(self, station, callback))
+
+    def subscribe_async(self, station: str):
+        """
+        Subscribes to a station from asyncio, use as "async for event in boards.subscribe_async(station):".
+        Must be called from a running event loop.
+
+        :param station: The station code.
+        :return: An async iterator of BoardEvents, call its cancel() to unsubscribe.
+        """
+
+        return self._subscribe(_AsyncSubscription(self, station, asyncio.get_running_loop()))
+
+    def _subscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.setdefault(subscription.station, []).append(subscription)
+            snapshot = self.snapshots.get(subscription.station, {})
+
+        # A late subscriber starts with the current board.
+        for journey, (_, (train, _)) in snapshot.items():
+            subscription.callback(BoardEvent(ADDED, subscription.station, journey, train, None, ()))
+
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.station, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.station, None)
+                self.snapshots.pop(subscription.station, None)
+
+    def _diff(self, station: str, departures: dict):
+        current = {}
+        for journey, train in departures.items():
+            fields = _board_fields(train)
+            current[journey] = (hash(tuple(fields.values())), (train, fields))
+
+        with self._lock:
+            # The last subscriber may have left during the poll.
+            if station not in self._subscriptions:
+                return []
+
+            previous = self.snapshots.get(station)
+            self.snapshots[station] = current
+
+        if previous is None:
+            return [BoardEvent(ADDED, station, journey, train, None, ()) for journey, (_, (train, _)) in current.items()]
+
+        events = []
+        for event in diff_snapshots(previous, current):
+            if event.kind == ADDED:
+                events.append(BoardEvent(ADDED, station, event.key, event.current[0], None, ()))
+            elif event.kind == RESOLVED:
+                events.append(BoardEvent(DEPARTED, station, event.key, None, event.previous[0], ()))
+            else:
+                (train, fields), (old_train, old_fields) = event.current, event.previous
+                changes = tuple(name for name in fields if fields[name] != old_fields[name])
+                events.append(BoardEvent(CHANGED, station, event.key, train, old_train, changes))
+
+        return events
+
+    def poll(self):
+        """
+        Polls every subscribed station once and delivers the events.
+
+        :return: The amount of events delivered.
+        :rtype: int
+        """
+
+        with self._lock:
+            stations = list(self._subscriptions)
+
+        delivered = 0
+        for station, departures, error in self.api.get_departures_many(stations, self.max_concurrency):
+            self.stats["polls"] += 1
+            if error is not None:
+                self.stats["errors"] += 1
+                logger.warning("Polling the departures of %s failed: %r", station, error)
+                continue
+
+            events = self._diff(station, departures)
+            with self._lock:
+                subscriptions = list(self._subscriptions.get(station, []))
+
+            for event in events:
+                for subscription in subscriptions:
+                    try:
+                        subscription.callback(event)
+                    except Exception:
+                        self.stats["errors"] += 1
+                        logger.exception("A departure board subscriber of %s failed", station)
+                        continue
+
+                    delivered += 1
+
+        self.stats["events"] += delivered
+        return delivered
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception:
+                # Like a rejected login or an open circuit: keep polling, the next poll may succeed.
+                self.stats["errors"] += 1
+                logger.exception("Polling the departure boards failed")
+
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """
+        Starts polling in a background thread.
+
+        :return: Nothing.
+        """
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nsapi-departure-boards", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread after the current poll.
+
+        :return: Nothing.
+        """
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
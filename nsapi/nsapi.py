@@ -1,40 +1,152 @@
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
 import requests
 from requests.auth import HTTPBasicAuth
 
-from nsapi.modules.departures import get_departures_f
-from nsapi.modules.disruptions import get_disruptions_f
-from nsapi.modules.exceptions import IncorrectAuthException
-from nsapi.modules.login import verify_login
-from nsapi.modules.pricing import get_pricing_f
-from nsapi.modules.stations import get_stations_f
-from nsapi.modules.travel_recommendations import get_travel_recommendations_f
+from nsapi.modules.cache import Cache
+from nsapi.modules.login import AuthState
+from nsapi.modules.planner import Timetable
+from nsapi.modules.scheduler import Scheduler, SchedulingAdapter
+from nsapi.modules.singleflight import SingleFlight
+from nsapi.modules.station_cache import StationCache
+from nsapi.modules.transport import TransportConfig
+from nsapi.modules.urls import endpoint_url
+
+if TYPE_CHECKING:
+    from nsapi.modules.cassette import Cassette
+    from nsapi.modules.parse_pool import ParsePool
 
 
 class NSApi:
-    def __init__(self, username: str, password: str):
+    def __init__(self, username: str, password: str, lazy_login: bool = False, auth_ttl: float = None, parser: str = None, station_cache: str = None, cache: Cache = None, coalesce: bool = False, records: bool = False, scheduler: Scheduler = None, transport_config: TransportConfig = None, timetable: Timetable = None, parse_pool: "ParsePool" = None, cassette: "Cassette" = None):
         """
         Creates an NSApi object to handle further API processing.
 
+        The credentials are verified once and the result is cached in self.auth.
+        They are only verified again after auth_ttl seconds, or after a request was rejected.
+
         :param username: Username for the NS Api.
         :param password: Password for the NS Api.
+        :param lazy_login: Verify the credentials on first use instead of right away.
+        :param auth_ttl: Seconds a verification stays valid, None for no expiry.
+        :param parser: The XML parser backend, "lxml" (streaming) or "soup". Uses the default backend if None.
+        :param station_cache: A file to keep the station list in between runs (optional).
+        :param cache: A response cache, like MemoryCache or SQLiteCache (optional). Cached results are shared and should not be modified.
+        :param coalesce: Let identical concurrent requests share one upstream request and its result.
+            The callers then get the same result object, which should not be modified.
+        :param records: Return compact record objects (see nsapi.modules.records) instead of dictionaries.
+        :param scheduler: A Scheduler to rate limit, retry and circuit-break all requests (optional).
+        :param transport_config: The pool size, timeouts, compression and HTTP version to use, the TransportConfig defaults if None.
+        :param timetable: A Timetable to collect the received travel advice in, for plan_journey (optional).
+        :param parse_pool: A ParsePool to parse large responses in worker processes (optional).
+        :param cassette: A Cassette to record the responses to, or replay them from (optional).
         """
 
         self.r = requests.Session()
         self.r.auth = HTTPBasicAuth(username, password)
 
-        self._check_logged_in()
+        self.transport_config = transport_config if transport_config is not None else TransportConfig()
+        adapter = self.transport_config.adapter()
+
+        self.cassette = cassette
+        if cassette is not None:
+            from nsapi.modules.cassette import CassetteAdapter
+
+            adapter = CassetteAdapter(cassette, adapter)
+
+        self.scheduler = scheduler
+        if scheduler is not None:
+            adapter = SchedulingAdapter(scheduler, adapter)
+
+        self.transport_config.configure(self.r, adapter)
+
+        self.auth = AuthState(auth_ttl)
+        self.r.hooks["response"].append(self.auth.response_hook)
+
+        self.parser = parser
+        self.station_cache = StationCache(station_cache) if station_cache is not None else None
+        self.cache = cache
+        self.inflight = SingleFlight() if coalesce else None
+        self.records = records
+        self.timetable = timetable
+        self.parse_pool = parse_pool
+
+        self._station_index = None
+        self._station_index_lock = threading.Lock()
+        if timetable is not None and timetable.resolve is None:
+            timetable.resolve = self.resolve_station
+
+        if not lazy_login:
+            self._check_logged_in()
 
     def _check_logged_in(self):
         """
         Throws an exception if the object is not logged in.
+        Uses the cached verification if there is one.
 
         :return: Nothing.
         """
 
-        if not verify_login(self.r):
-            raise IncorrectAuthException("Incorrect username or password!")
+        self.auth.ensure(self.r)
+
+    def resolve_station(self, query: str):
+        """
+        Resolves a station code, name or synonym to a station code, see StationIndex.get.
+        The station list is fetched on first use.
+
+        :param query: The station code or name.
+        :return: The station code, or None if nothing matches exactly.
+        :rtype: str
+        """
+
+        with self._station_index_lock:
+            if self._station_index is None:
+                from nsapi.modules.station_index import StationIndex
+
+                self._station_index = StationIndex(self.get_stations())
+
+        return self._station_index.get(query)
+
+    def _concurrency(self, max_concurrency: int):
+        # More threads than pooled connections makes urllib3 discard the extra connections after every request.
+        return max(1, min(max_concurrency, self.transport_config.pool_maxsize))
+
+    def _fetch(self, endpoint: str, options: dict, fetch_f, *args, variant: str = None, **kwargs):
+        """
+        Calls fetch_f after checking the login, or gets its result from the cache.
+        Identical concurrent calls are coalesced into one if coalescing is on.
+
+        :param endpoint: The name of the endpoint in urlmap.
+        :param options: The options of the request, used as the cache key.
+        :param fetch_f: The module function that fetches the result.
+        :param variant: The result form if it is not the default, so different forms do not share results.
+        :return: The result of fetch_f.
+        """
+
+        if variant is None and self.records:
+            variant = "records"
+        key_options = options
+        if variant is not None:
+            key_options = dict(options or {}, result=variant)
+
+        def fetch():
+            self._check_logged_in()
+
+            return fetch_f(*args, **kwargs)
+
+        def coalesced_fetch():
+            if self.inflight is None:
+                return fetch()
+
+            return self.inflight.do(endpoint_url(endpoint, key_options), fetch)
+
+        if self.cache is None:
+            return coalesced_fetch()
+
+        return self.cache.fetch(endpoint, key_options, coalesced_fetch)
 
     def get_departures(self, station: str):
         """
@@ -66,15 +178,67 @@ class NSApi:
         :rtype: dict
         """
 
+        from nsapi.modules.departures import departures_options, get_departures_f
+
+        return self._fetch("departures", departures_options(station), get_departures_f, self.r, station, parser=self.parser, records=self.records, pool=self.parse_pool)
+
+    def get_departures_columns(self, station: str):
+        """
+        Gets the departures from a station as NumPy columns, for analytics.
+
+        The result is a DepartureColumns with one array per field: journey, departure_time
+        (UTC datetime64), delay_minutes (int), platform_changed (bool) and the categorical
+        codes destination, train_type, carrier and platform, see result.categories.
+        Use result.to_pandas() or result.to_arrow() to export, and DepartureColumns.concat to combine.
+
+        :param station: The station of which to get the departures.
+        :return: The departures as columns.
+        :rtype: DepartureColumns
+        """
+
+        from nsapi.modules.columnar import get_departures_columns_f
+        from nsapi.modules.departures import departures_options
+
+        return self._fetch("departures", departures_options(station), get_departures_columns_f, self.r, station, parser=self.parser, variant="columns")
+
+    def get_departures_many(self, stations, max_concurrency: int = 8):
+        """
+        Gets the departures from many stations in parallel.
+        Results are yielded as soon as a station is done, so in completion order.
+
+        The credentials are checked once for the whole batch. All stations are
+        requested from the same host, so max_concurrency is also the per-host limit.
+        It is capped at the connection pool size, see TransportConfig.pool_maxsize.
+        Stations that are not started yet are cancelled when the generator is closed.
+
+        :param stations: An iterable of station codes.
+        :param max_concurrency: The maximum amount of requests in flight at the same time, capped at the connection pool size.
+        :return: A generator of (station, departures, exception) tuples. Either departures or exception is None.
+        :rtype: generator
+        """
+
         self._check_logged_in()
 
-        return get_departures_f(self.r, station)
+        executor = ThreadPoolExecutor(max_workers=self._concurrency(max_concurrency))
+        try:
+            futures = {executor.submit(self.get_departures, station): station for station in stations}
 
-    def get_stations(self):
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stations(self, refresh: bool = False):
         """
         Gets all the stations as a dictionary.
         The dictionary keys are the station codes as strings.
 
+        If a station cache is configured, a read-only StationCatalogue mapping is returned instead.
+        It is only downloaded again when stale, or when refresh is True.
+
         A single station object as k = v:
         station_id = {
             "code":                         str: The station code.
@@ -91,13 +255,22 @@ class NSApi:
             "synonyms":                     list: A list of other names for the station.
         }
 
+        :param refresh: Download the station list even if the cached one is fresh.
         :return: A dictionary with station information.
         :rtype: dict
         """
 
-        self._check_logged_in()
+        if self.station_cache is not None:
+            catalogue = self.station_cache.fresh()
+            if catalogue is not None and not refresh:
+                return catalogue
+
+            self._check_logged_in()
+            return self.station_cache.get(self.r, self.parser, force=refresh)
+
+        from nsapi.modules.stations import get_stations_f
 
-        return get_stations_f(self.r)
+        return self._fetch("stations", None, get_stations_f, self.r, parser=self.parser, records=self.records, pool=self.parse_pool)
 
     def get_disruptions(self, actual: bool, station: str = None, unplanned: bool = None):
         """
@@ -120,14 +293,16 @@ class NSApi:
         :return: A dictionary with disruption information.
         """
 
-        self._check_logged_in()
+        from nsapi.modules.disruptions import disruptions_options, get_disruptions_f
 
-        return get_disruptions_f(self.r, actual, station, unplanned)
+        options = disruptions_options(actual, station, unplanned)
+        return self._fetch("disruptions", options, get_disruptions_f, self.r, actual, station, unplanned, parser=self.parser, records=self.records, pool=self.parse_pool)
 
     def get_price(self, from_station, to_station, via_station=None, date=None):
         """
         Gets all the fares for one station to another.
         The dictionary keys are the names of the carrier.
+        Fares that are not in the response are None.
 
         A single price object as k = v:
         carrier_name = {
@@ -157,9 +332,83 @@ class NSApi:
         :return: A dictionary with pricing information.
         """
 
+        from nsapi.modules.pricing import get_pricing_f, pricing_options
+
+        options = pricing_options(from_station, to_station, via_station, date)
+        return self._fetch("pricing", options, get_pricing_f, self.r, from_station, to_station, via_station, date, parser=self.parser, records=self.records, pool=self.parse_pool)
+
+    def iter_price_matrix(self, origins, destinations, via_station: str = None, date: str = None, symmetric: bool = True, max_concurrency: int = 8):
+        """
+        Gets the fares between every origin and destination in parallel, yielding them as soon as they arrive.
+        Repeated pairs and pairs of a station with itself are skipped. With symmetric, only one direction
+        of a pair is requested.
+
+        Requests are always dated, today if no date is given, so with a cache fares are cached per date.
+        Use a Scheduler to keep the requests within a rate budget.
+
+        :param origins: An iterable of station codes.
+        :param destinations: An iterable of station codes.
+        :param via_station: A station in between (optional).
+        :param date: The date of departure as ddmmyyyy, today if None.
+        :param symmetric: Assume a fare is the same in both directions.
+        :param max_concurrency: The maximum amount of requests in flight at the same time, capped at the connection pool size.
+        :return: A generator of (from station, to station, fares, exception) tuples. fares is a flat
+            array of the cheapest fare of every kind, see fare_matrix.cheapest. Either fares or exception is None.
+        :rtype: generator
+        """
+
+        from nsapi.modules.fare_matrix import cheapest, fare_requests
+        from nsapi.modules.pricing import get_pricing_f, pricing_options
+
+        if date is None:
+            date = datetime.date.today().strftime("%d%m%Y")
+
+        def fetch(from_station, to_station):
+            options = pricing_options(from_station, to_station, via_station, date)
+            fares = self._fetch("pricing", options, get_pricing_f, self.r, from_station, to_station, via_station, date, parser=self.parser, records=True, pool=self.parse_pool, variant="records")
+            return cheapest(fares)
+
         self._check_logged_in()
 
-        return get_pricing_f(self.r, from_station, to_station, via_station, date)
+        executor = ThreadPoolExecutor(max_workers=self._concurrency(max_concurrency))
+        try:
+            futures = {executor.submit(fetch, *pair): pair for pair in fare_requests(origins, destinations, symmetric)}
+
+            for future in as_completed(futures):
+                from_station, to_station = futures[future]
+                try:
+                    yield from_station, to_station, future.result(), None
+                except Exception as e:
+                    yield from_station, to_station, None, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_price_matrix(self, origins, destinations, via_station: str = None, date: str = None, symmetric: bool = True, max_concurrency: int = 8):
+        """
+        Gets the fares between every origin and destination as NumPy matrices, see iter_price_matrix.
+
+        The result is a FareMatrix with the station codes as axis labels. result.matrix("one-way",
+        "standard-class", "full") gives the (origins, destinations) matrix of one kind of fare.
+        Each fare is the cheapest of the carrier choices. Pairs that failed or have no fare are NaN.
+
+        :param origins: An iterable of station codes.
+        :param destinations: An iterable of station codes.
+        :param via_station: A station in between (optional).
+        :param date: The date of departure as ddmmyyyy, today if None.
+        :param symmetric: Assume a fare is the same in both directions.
+        :param max_concurrency: The maximum amount of requests in flight at the same time, capped at the connection pool size.
+        :return: The fares.
+        :rtype: FareMatrix
+        """
+
+        from nsapi.modules.fare_matrix import FareMatrix
+
+        matrix = FareMatrix(origins, destinations)
+        for from_station, to_station, fares, _ in self.iter_price_matrix(matrix.origins, matrix.destinations, via_station, date, symmetric, max_concurrency):
+            if fares is not None:
+                matrix.set(from_station, to_station, fares, symmetric)
+
+        return matrix
 
     def get_travel_recommendations(self, from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None):
         """
@@ -209,6 +458,132 @@ class NSApi:
         :rtype: list
         """
 
-        self._check_logged_in()
+        from nsapi.modules.travel_recommendations import get_travel_recommendations_f, travel_recommendations_options
+
+        options = travel_recommendations_options(from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card)
+        fetch_f = get_travel_recommendations_f
+        if self.timetable is not None and via_station is None:
+            # Only advice that came from upstream refreshes the timetable, not cache hits.
+            def fetch_f(*args, **kwargs):
+                advices = get_travel_recommendations_f(*args, **kwargs)
+                self.timetable.add(advices, from_station, to_station)
+
+                return advices
+
+        return self._fetch("travel-recommendations", options, fetch_f, self.r, from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card, parser=self.parser, records=self.records, pool=self.parse_pool)
+
+    def iter_travel_recommendations(self, from_station: str, to_station: str, via_station: str = None, departure_time: datetime.datetime = None, until: datetime.datetime = None, window: int = 5, highspeed_allowed: bool = None, has_year_card: bool = None, prefetch: bool = True):
+        """
+        Walks forward through the travel recommendations from one station to another, window by window.
+        Possibilities that appear in more than one window are only yielded once.
+
+        The next window is requested in the background while the current one is consumed.
+        Nothing more is requested once the generator is closed.
+
+        :param from_station: The station where the journey starts.
+        :param to_station: The station where the journey ends.
+        :param via_station: The station that has to be passed.
+        :param departure_time: The earliest departure, now if None.
+        :param until: The latest departure, the end of the day of departure_time if None.
+        :param window: The amount of future recommendations to request per window.
+        :param highspeed_allowed: Whether high-speed trains are allowed in the recommendation.
+        :param has_year_card: Whether the user has a year card.
+        :param prefetch: Request the next window while the current one is consumed.
+        :return: A generator of possibilities, see get_travel_recommendations.
+        :rtype: generator
+        """
+
+        from nsapi.modules.travel_recommendations import advice_key
+
+        if departure_time is None:
+            departure_time = datetime.datetime.now().astimezone()
+        if until is None:
+            until = departure_time.replace(hour=23, minute=59, second=59, microsecond=0)
+
+        def fetch(moment):
+            return self.get_travel_recommendations(from_station, to_station, via_station, next_advices=window, departure_time=moment, highspeed_allowed=highspeed_allowed, has_year_card=has_year_card)
+
+        def next_moment(advices):
+            # The api works in minutes, so continue after the last departure of this window.
+            last = max((advice_key(advice)[1] for advice in advices), default=None)
+            if last is None or last.timestamp() <= moment.timestamp() or last.timestamp() >= until.timestamp():
+                return None
+
+            return last + datetime.timedelta(minutes=1)
+
+        seen = set()
+        moment = departure_time
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            advices = fetch(moment)
+            while True:
+                following = next_moment(advices)
+                pending = executor.submit(fetch, following) if executor is not None and following is not None else None
+
+                for advice in advices:
+                    key = advice_key(advice)
+                    if key in seen or key[1].timestamp() < departure_time.timestamp():
+                        continue
+                    if key[1].timestamp() > until.timestamp():
+                        return
+
+                    seen.add(key)
+                    yield advice
+
+                if following is None:
+                    return
+
+                moment = following
+                advices = pending.result() if pending is not None else fetch(moment)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def plan_journey(self, from_station: str, to_station: str, departure_time: datetime.datetime = None):
+        """
+        Finds the journey that arrives first, from the timetable when it covers the query,
+        and else from a new travel advice request. Needs a timetable, see __init__.
+
+        The result is a Journey with departure and arrival (datetime) and legs,
+        a list of stop lists, one per train, like the parts of an advice.
+
+        :param from_station: The station where the journey starts.
+        :param to_station: The station where the journey ends.
+        :param departure_time: The earliest departure, now if None.
+        :return: The journey, or None if there is none.
+        :rtype: Journey
+        :raises ValueError: If a station has no connections in the timetable, even after the request.
+        """
+
+        if self.timetable is None:
+            raise ValueError("plan_journey needs an NSApi with a timetable.")
+
+        if departure_time is None:
+            departure_time = datetime.datetime.now().astimezone()
+
+        if self.timetable.covers(from_station, to_station, departure_time):
+            journey = self.timetable.earliest_arrival(from_station, to_station, departure_time)
+            if journey is not None:
+                return journey
+
+        self.get_travel_recommendations(from_station, to_station, departure_time=departure_time)
+        return self.timetable.earliest_arrival(from_station, to_station, departure_time)
+
+    def get_travel_stops_columns(self, from_station: str, to_station: str, via_station: str = None, previous_advices: int = None, next_advices: int = None, departure_time: datetime.datetime = None, arrival_time: datetime.datetime = None, highspeed_allowed: bool = None, has_year_card: bool = None):
+        """
+        Gets the stops of all travel recommendations as NumPy columns, for analytics.
+        Takes the same parameters as get_travel_recommendations.
+
+        The result is a StopColumns with one array per field: possibility and part (the index
+        of the recommendation and of the part in it), arrival_time (UTC datetime64),
+        track_changed (bool) and the categorical codes name and track, see result.categories.
+
+        :return: The stops as columns.
+        :rtype: StopColumns
+        """
+
+        from nsapi.modules.columnar import get_stops_columns_f
+        from nsapi.modules.travel_recommendations import travel_recommendations_options
 
-        return get_travel_recommendations_f(self.r, from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card)
+        options = travel_recommendations_options(from_station, to_station, via_station, previous_advices, next_advices, departure_time, arrival_time, highspeed_allowed, has_year_card)
+        return self._fetch("travel-recommendations", options, get_stops_columns_f, self.r, options, parser=self.parser, variant="columns")
@@ -22,5 +22,12 @@ setup(
         "requests",
         "bs4",
         "lxml"
-    ]
+    ],
+    extras_require={
+        "numpy": ["numpy"],
+        "async": ["httpx"],
+        "http2": ["httpx[http2]"],
+        "opentelemetry": ["opentelemetry-api"],
+        "analytics": ["numpy", "pandas", "pyarrow"]
+    }
 )
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import responses
+from nsapi.modules.urls import urlmap
+from nsapi.nsapi import NSApi
+
+
+class FixtureAdapter(BaseAdapter):
+    def __init__(self, bodies: dict = None, etag: str = None):
+        """
+        A requests transport adapter that serves a fixture body per endpoint, without a network.
+        With an etag, requests carrying it in If-None-Match get a 304.
+
+        :param bodies: A dictionary of endpoint name to body, the fixtures.responses() if None.
+        :param etag: The ETag of every response (optional).
+        """
+
+        super().__init__()
+        bodies = bodies if bodies is not None else responses()
+        self.bodies = {urlsplit(urlmap[endpoint]).path: body for endpoint, body in bodies.items()}
+        self.etag = etag
+        self.requests = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request)
+
+        r = requests.Response()
+        r.url = request.url
+        r.request = request
+        r.connection = self
+        r.headers = CaseInsensitiveDict()
+        if self.etag is not None:
+            r.headers["ETag"] = self.etag
+
+        body = self.bodies.get(urlsplit(request.url).path)
+        if body is None:
+            r.status_code, body = 404, b""
+        elif self.etag is not None and request.headers.get("If-None-Match") == self.etag:
+            r.status_code, body = 304, b""
+        else:
+            r.status_code = 200
+
+        r.raw = io.BytesIO(body)
+        return r
+
+    def close(self):
+        pass
+
+
+def mount(api: NSApi, adapter: BaseAdapter):
+    for prefix in ("https://", "http://"):
+        api.r.mount(prefix, adapter)
+
+
+@pytest.fixture
+def adapter():
+    return FixtureAdapter()
+
+
+@pytest.fixture
+def api(adapter):
+    api = NSApi("user", "password", lazy_login=True)
+    mount(api, adapter)
+
+    return api
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from benchmarks.stub_server import StubServer  # noqa: E402
+from nsapi.async_nsapi import AsyncNSApi  # noqa: E402
+from nsapi.modules.records import Station  # noqa: E402
+from nsapi.modules.station_cache import StationCatalogue  # noqa: E402
+from nsapi.nsapi import NSApi  # noqa: E402
+
+
+def _run(f, **kwargs):
+    async def main():
+        async with AsyncNSApi("user", "password", **kwargs) as api:
+            return await f(api)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_stations_with_a_station_cache(tmp_path, records):
+    path = str(tmp_path / "stations.bin")
+
+    with StubServer():
+        stations = _run(lambda api: api.get_stations(), records=records)
+        catalogue = _run(lambda api: api.get_stations(), records=records, station_cache=path)
+
+    assert isinstance(catalogue, StationCatalogue)
+    assert len(catalogue) == len(stations)
+    if records:
+        assert all(isinstance(station, Station) for station in stations.values())
+        assert catalogue["AM0"] == stations["AM0"].to_dict()
+    else:
+        assert catalogue["AM0"] == stations["AM0"]
+
+
+def test_stale_station_cache_is_revalidated(tmp_path):
+    import httpx
+
+    from benchmarks.fixtures import departures_xml, stations_xml
+    from nsapi.modules.urls import urlmap
+
+    body = stations_xml(20)
+    requests = []
+
+    def handler(request):
+        if request.url.path != httpx.URL(urlmap["stations"]).path:
+            return httpx.Response(200, content=departures_xml(1))
+
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={"ETag": '"v1"'})
+
+    async def main():
+        async with AsyncNSApi("user", "password", station_cache=str(tmp_path / "stations.bin"), transport=httpx.MockTransport(handler)) as api:
+            first = await api.get_stations()
+            fetched_at = first.fetched_at
+
+            api.station_cache.ttl = 0
+            second = await api.get_stations()
+
+            return first, fetched_at, second
+
+    first, fetched_at, second = asyncio.run(main())
+
+    assert [request.headers.get("If-None-Match") for request in requests] == [None, '"v1"']
+    assert dict(second) == dict(first)
+    assert second.etag == '"v1"'
+    assert second.fetched_at > fetched_at
+
+
+def _sync_results(records):
+    api = NSApi("user", "password", lazy_login=True, records=records)
+    return (
+        api.get_departures("UT"),
+        api.get_disruptions(True, station="UT"),
+        api.get_price("UT", "AMS"),
+        api.get_travel_recommendations("UT", "AMS"),
+    )
+
+
+def _async_results(api):
+    return asyncio.gather(
+        api.get_departures("UT"),
+        api.get_disruptions(True, station="UT"),
+        api.get_price("UT", "AMS"),
+        api.get_travel_recommendations("UT", "AMS"),
+    )
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_endpoints_match_nsapi(records):
+    with StubServer():
+        expected = _sync_results(records)
+        results = _run(_async_results, records=records)
+
+    assert list(results) == list(expected)
+    assert all(result for result in results)
+
+
+def test_identical_requests_are_coalesced():
+    async def many(api):
+        return await asyncio.gather(*(api.get_departures("UT") for _ in range(5)))
+
+    with StubServer(latency=0.1) as stub:
+        results = _run(many, coalesce=True)
+        # One verification and one shared request.
+        assert stub.requests == 2
+        assert all(result is results[0] for result in results)
+
+        stub.requests = 0
+        results = _run(many)
+        assert stub.requests == 6
+        assert all(result == results[0] for result in results)
+
+
+def test_departures_many():
+    async def many(api):
+        return [item async for item in api.get_departures_many(["UT", "AMS", "RTD"], max_concurrency=2)]
+
+    with StubServer():
+        expected = NSApi("user", "password", lazy_login=True).get_departures("UT")
+        results = _run(many)
+
+    assert sorted(station for station, _, _ in results) == ["AMS", "RTD", "UT"]
+    assert all(departures == expected and e is None for _, departures, e in results)
@@ -0,0 +1,61 @@
+import time
+
+from nsapi.modules.cache import MemoryCache, cache_key
+
+
+def test_cache_key_is_order_independent():
+    assert cache_key("pricing", {"from": "UT", "to": "ASD"}) == cache_key("pricing", {"to": "ASD", "from": "UT"})
+    assert cache_key("pricing", {"from": "UT", "to": "ASD"}) == "pricing?from=UT&to=ASD"
+
+
+def test_cache_key_stringifies_options():
+    assert cache_key("travel-recommendations", {"nextAdvices": 5}) == cache_key("travel-recommendations", {"nextAdvices": "5"})
+    assert cache_key("stations") == cache_key("stations", {}) == "stations"
+
+
+def test_fetch_caches_per_key():
+    cache = MemoryCache()
+    calls = []
+
+    def fetch(value):
+        calls.append(value)
+        return value
+
+    assert cache.fetch("departures", {"station": "UT"}, lambda: fetch(1)) == 1
+    assert cache.fetch("departures", {"station": "UT"}, lambda: fetch(2)) == 1
+    assert cache.fetch("departures", {"station": "ASD"}, lambda: fetch(3)) == 3
+    assert calls == [1, 3]
+    assert cache.stats == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_entries_expire_after_ttl():
+    cache = MemoryCache(ttls={"departures": 0.05})
+
+    assert cache.fetch("departures", None, lambda: 1) == 1
+    assert cache.fetch("departures", None, lambda: 2) == 1
+
+    time.sleep(0.1)
+    assert cache.fetch("departures", None, lambda: 3) == 3
+
+
+def test_endpoints_without_ttl_are_not_cached():
+    cache = MemoryCache(ttls={"departures": 0})
+
+    assert cache.fetch("departures", None, lambda: 1) == 1
+    assert cache.fetch("departures", None, lambda: 2) == 2
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = MemoryCache(max_entries=2)
+
+    cache.fetch("departures", {"station": "A"}, lambda: "a")
+    cache.fetch("departures", {"station": "B"}, lambda: "b")
+    # Using A makes B the least recently used.
+    cache.fetch("departures", {"station": "A"}, lambda: "unused")
+    cache.fetch("departures", {"station": "C"}, lambda: "c")
+
+    assert len(cache) == 2
+    assert cache.stats["evictions"] == 1
+    assert cache.fetch("departures", {"station": "A"}, lambda: "new a") == "a"
+    assert cache.fetch("departures", {"station": "B"}, lambda: "new b") == "new b"
@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from nsapi.modules.cassette import Cassette, cassette_key
+from nsapi.modules.exceptions import CassetteMissException
+from nsapi.nsapi import NSApi
+
+
+def _calls(api: NSApi):
+    return [
+        api.get_departures("UT"),
+        api.get_stations(),
+        api.get_disruptions(True),
+        api.get_price("UT", "ASD"),
+        api.get_travel_recommendations("UT", "ASD", departure_time=datetime.datetime(2026, 10, 18, 10, 0)),
+    ]
+
+
+def test_cassette_key_ignores_host_and_order():
+    assert cassette_key("https://example.com/ns-api-prijzen-v3?to=ASD&from=UT") == cassette_key("http://127.0.0.1:8080/ns-api-prijzen-v3?from=UT&to=ASD")
+    assert cassette_key("http://127.0.0.1:8080/ns-api-prijzen-v3?from=UT&to=ASD") == "pricing?from=UT&to=ASD"
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "cassette.db")
+
+    with StubServer(compress=True) as stub:
+        live = _calls(NSApi("user", "password"))
+        requests = stub.requests
+
+        recorded = _calls(NSApi("user", "password", cassette=Cassette(path, mode="record")))
+        assert recorded == live
+        assert stub.requests == 2 * requests
+
+    # The server is gone, so everything is replayed from the archive.
+    cassette = Cassette(path)
+    assert len(cassette) == 6
+    assert _calls(NSApi("user", "password", cassette=cassette)) == live
+    assert cassette.stats["misses"] == 0
+    assert cassette.stats["recorded"] == 0
+
+    with pytest.raises(CassetteMissException):
+        NSApi("user", "password", cassette=cassette).get_departures("ASD")
+
+
+def test_once_records_only_what_is_missing(tmp_path):
+    path = str(tmp_path / "cassette.db")
+
+    with StubServer() as stub:
+        cassette = Cassette(path, mode="once")
+        api = NSApi("user", "password", cassette=cassette)
+        first = api.get_departures("UT")
+        requests = stub.requests
+
+        assert api.get_departures("UT") == first
+        assert stub.requests == requests
+        assert cassette.stats["recorded"] == requests
@@ -0,0 +1,115 @@
+import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.fixtures import departures_xml, travel_recommendations_xml
+from nsapi.modules.columnar import DepartureColumns, StopColumns, _delay_minutes, parse_departures_columns, parse_stops_columns
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+
+
+def _utc(values):
+    return [np.datetime64(value.astimezone(datetime.timezone.utc).replace(tzinfo=None), "s") for value in values]
+
+
+def test_delay_minutes():
+    assert _delay_minutes(None) == 0
+    assert _delay_minutes("PT5M") == 5
+    assert _delay_minutes("PT1H5M") == 65
+    assert _delay_minutes("PT2H30S") == 120
+    assert _delay_minutes("5 minutes") == 0
+
+
+def test_departures_columns_match_the_dictionaries():
+    body = departures_xml(60)
+    departures = list(parse_departures([body]).values())
+    columns = parse_departures_columns([body])
+
+    assert isinstance(columns, DepartureColumns)
+    assert len(columns) == 60
+    assert columns.journey.tolist() == [departure["journey"] for departure in departures]
+    assert columns.departure_time.tolist() == [value.item() for value in _utc(departure["departure_time"] for departure in departures)]
+    assert columns.delay_minutes.tolist() == [_delay_minutes(departure["delay"]["time"]) for departure in departures]
+    assert columns.platform_changed.tolist() == [departure["departs_from"]["changed"] for departure in departures]
+    assert columns.decoded("destination").tolist() == [departure["destination"] for departure in departures]
+    assert columns.decoded("platform").tolist() == [departure["departs_from"]["platform"] for departure in departures]
+    assert columns.categories["carrier"] == ["NS", "Arriva", "Keolis"]
+    assert columns.carrier.dtype == np.int32
+
+
+def test_stops_columns_match_the_dictionaries():
+    body = travel_recommendations_xml(3)
+    stops = [
+        (possibility, part, stop)
+        for possibility, advice in enumerate(parse_travel_recommendations([body]))
+        for part, part_stops in enumerate(advice["travel_info"]["parts"])
+        for stop in part_stops
+    ]
+    columns = parse_stops_columns([body])
+
+    assert isinstance(columns, StopColumns)
+    assert len(columns) == 3 * 2 * 8
+    assert columns.possibility.tolist() == [possibility for possibility, _, _ in stops]
+    assert columns.part.tolist() == [part for _, part, _ in stops]
+    assert columns.decoded("name").tolist() == [stop["name"] for _, _, stop in stops]
+    assert columns.arrival_time.tolist() == [value.item() for value in _utc(stop["arrival_time"] for _, _, stop in stops)]
+
+    # Stops without a track have code -1.
+    assert columns.decoded("track").tolist() == [stop["track"] for _, _, stop in stops]
+    assert (columns.track == -1).any()
+    assert columns.track_changed.tolist() == [stop["track_changed"] == "true" for _, _, stop in stops]
+
+
+def test_empty_response():
+    columns = parse_departures_columns([b'<?xml version="1.0" encoding="UTF-8"?><ActueleVertrekTijden></ActueleVertrekTijden>'])
+
+    assert len(columns) == 0
+    assert columns.departure_time.dtype == np.dtype("datetime64[s]")
+    assert columns.decoded("destination").tolist() == []
+
+
+def test_concat_merges_categories():
+    first = parse_departures_columns([departures_xml(5)])
+    second = parse_departures_columns([departures_xml(40)])
+    merged = DepartureColumns.concat([first, second])
+
+    assert len(merged) == 45
+    assert merged.decoded("destination").tolist() == first.decoded("destination").tolist() + second.decoded("destination").tolist()
+    assert len(merged.categories["destination"]) == len(set(merged.categories["destination"]))
+    assert merged.delay_minutes.tolist() == first.delay_minutes.tolist() + second.delay_minutes.tolist()
+
+    # Missing values stay missing.
+    part = parse_stops_columns([travel_recommendations_xml(2)])
+    stops = StopColumns.concat([part, part])
+    assert stops.decoded("track").tolist() == part.decoded("track").tolist() * 2
+    assert stops.categories["track"] == part.categories["track"]
+
+
+def test_to_pandas():
+    pytest.importorskip("pandas")
+    columns = parse_stops_columns([travel_recommendations_xml(2)])
+    frame = columns.to_pandas()
+
+    assert list(frame.columns) == list(StopColumns.fields)
+    assert frame["name"].tolist() == columns.decoded("name").tolist()
+    assert frame["track"].isna().tolist() == (columns.track == -1).tolist()
+
+
+def test_to_arrow():
+    pytest.importorskip("pyarrow")
+    columns = parse_departures_columns([departures_xml(10)])
+    table = columns.to_arrow()
+
+    assert table.column_names == list(DepartureColumns.fields)
+    assert table.column("journey").to_pylist() == columns.journey.tolist()
+    assert table.column("destination").to_pylist() == columns.decoded("destination").tolist()
+
+
+def test_nsapi_columns(api):
+    departures = api.get_departures_columns("UT")
+    stops = api.get_travel_stops_columns("UT", "ASD")
+
+    assert len(departures) == len(api.get_departures("UT"))
+    assert len(stops) == sum(len(part) for advice in api.get_travel_recommendations("UT", "ASD") for part in advice["travel_info"]["parts"])
@@ -0,0 +1,93 @@
+import asyncio
+
+from benchmarks.fixtures import departures_xml
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.watch import ADDED, CHANGED, DEPARTED, DepartureBoards
+
+
+def _departures(trains: int):
+    return parse_departures([departures_xml(trains)])
+
+
+class _Api:
+    def __init__(self):
+        self.boards = {}
+
+    def get_departures_many(self, stations, max_concurrency: int = 8):
+        for station in stations:
+            yield station, self.boards[station], None
+
+
+def test_departure_boards_diff():
+    api = _Api()
+    api.boards["UT"] = _departures(3)
+    boards = DepartureBoards(api)
+
+    events = []
+    boards.subscribe("UT", events.append)
+    assert boards.poll() == 3
+    assert [(event.kind, event.journey) for event in events] == [(ADDED, "1000"), (ADDED, "1001"), (ADDED, "1002")]
+
+    # Unchanged boards deliver nothing.
+    events.clear()
+    api.boards["UT"] = _departures(3)
+    assert boards.poll() == 0
+
+    board = _departures(4)
+    del board["1000"]
+    board["1001"]["departs_from"] = {"platform": "5b", "changed": True}
+    board["1002"]["delay"] = {"time": "PT9M", "reason": "+9 min"}
+    api.boards["UT"] = board
+    boards.poll()
+
+    assert {(event.kind, event.journey, event.changes) for event in events} == {
+        (DEPARTED, "1000", ()),
+        (CHANGED, "1001", ("platform",)),
+        (CHANGED, "1002", ("delay",)),
+        (ADDED, "1003", ()),
+    }
+
+
+def test_departure_boards_late_subscriber_gets_the_board():
+    api = _Api()
+    api.boards["UT"] = _departures(2)
+    boards = DepartureBoards(api)
+    boards.subscribe("UT", lambda event: None)
+    boards.poll()
+
+    events = []
+    boards.subscribe("UT", events.append)
+
+    assert [(event.kind, event.journey) for event in events] == [(ADDED, "1000"), (ADDED, "1001")]
+
+
+def test_departure_boards_count_failing_callbacks():
+    api = _Api()
+    api.boards["UT"] = _departures(2)
+    boards = DepartureBoards(api)
+
+    def fail(event):
+        raise RuntimeError("subscriber failed")
+
+    events = []
+    boards.subscribe("UT", fail)
+    boards.subscribe("UT", events.append)
+
+    assert boards.poll() == 2
+    assert len(events) == 2
+    assert boards.stats["errors"] == 2
+
+
+def test_async_subscription_ends_on_cancel():
+    api = _Api()
+    api.boards["UT"] = _departures(2)
+    boards = DepartureBoards(api)
+
+    async def main():
+        subscription = boards.subscribe_async("UT")
+        await asyncio.get_running_loop().run_in_executor(None, boards.poll)
+        subscription.cancel()
+
+        return [event async for event in subscription]
+
+    assert [event.journey for event in asyncio.run(main())] == ["1000", "1001"]
@@ -0,0 +1,32 @@
+from benchmarks.fixtures import departures_xml, disruptions_xml
+from nsapi.modules.watch import ADDED, RESOLVED, DisruptionWatcher
+from tests.conftest import FixtureAdapter, mount
+
+
+def test_watcher_skips_unchanged_feeds(api):
+    adapter = FixtureAdapter({"departures": departures_xml(1), "disruptions": disruptions_xml(3, 2)}, etag='"v1"')
+    mount(api, adapter)
+    watcher = DisruptionWatcher(api)
+
+    events = watcher.poll()
+    assert sorted(event.kind for event in events) == [ADDED] * 5
+
+    for _ in range(2):
+        assert watcher.poll() == []
+
+    # Both later polls were conditional on the ETag of the first response, which a 304 does not repeat.
+    polls = [request for request in adapter.requests if "If-None-Match" in request.headers]
+    assert [request.headers["If-None-Match"] for request in polls] == ['"v1"', '"v1"']
+    assert watcher.stats == {"polls": 3, "not_modified": 2, "events": 5}
+
+
+def test_watcher_emits_changes(api):
+    mount(api, FixtureAdapter({"departures": departures_xml(1), "disruptions": disruptions_xml(3, 2)}))
+    watcher = DisruptionWatcher(api, emit_initial=False)
+
+    assert watcher.poll() == []
+
+    mount(api, FixtureAdapter({"departures": departures_xml(1), "disruptions": disruptions_xml(4, 1)}))
+    events = watcher.poll()
+
+    assert {(event.kind, event.key) for event in events} == {(ADDED, "prio-13003"), (RESOLVED, "2026001")}
@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from nsapi.modules.fare_matrix import fare_requests  # noqa: E402
+
+
+def test_fare_requests_drop_repeated_pairs():
+    assert fare_requests(["UT", "UT", "ASD"], ["ASD", "RTD", "ASD"], symmetric=False) == [("UT", "ASD"), ("UT", "RTD"), ("ASD", "RTD")]
+
+
+def test_fare_requests_drop_reversed_pairs_when_symmetric():
+    stations = ["UT", "ASD", "RTD"]
+
+    assert fare_requests(stations, stations) == [("UT", "ASD"), ("UT", "RTD"), ("ASD", "RTD")]
+    assert len(fare_requests(stations, stations, symmetric=False)) == 6
+
+
+def test_fare_requests_of_one_station():
+    assert fare_requests(["UT"], ["UT"]) == []
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.fixtures import stations_xml
+from nsapi.modules import geo
+from nsapi.modules.geo import StationLocator
+from nsapi.modules.stations import parse_stations
+
+POINTS = [(52.379, 4.900), (51.925, 4.469), (50.75, 3.35), (53.5, 7.5)]
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * geo.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _distances(stations, lat, lon):
+    return sorted((_haversine(lat, lon, float(station["lat"]), float(station["lon"])), code) for code, station in stations.items())
+
+
+@pytest.fixture
+def stations():
+    return parse_stations([stations_xml(200)])
+
+
+def test_nearest(stations):
+    locator = StationLocator(stations)
+    assert len(locator) == 200
+
+    for lat, lon in POINTS:
+        expected = _distances(stations, lat, lon)[:3]
+        found = locator.nearest(lat, lon, n=3)
+
+        assert [code for code, _ in found] == [code for _, code in expected]
+        assert [distance for _, distance in found] == pytest.approx([distance for distance, _ in expected], abs=1e-3)
+
+    # A station is at distance zero from itself.
+    assert locator.nearest(50.75, 3.35) == [("AM0", pytest.approx(0, abs=1e-3))]
+
+
+def test_nearest_many_in_blocks(stations, monkeypatch):
+    locator = StationLocator(stations)
+    lat, lon = np.array(POINTS).T
+    codes, distances = locator.nearest_many(lat, lon, n=5)
+
+    # Small blocks give the same answer as one block.
+    monkeypatch.setattr(geo, "_BLOCK_ELEMENTS", 400)
+    block_codes, block_distances = locator.nearest_many(lat, lon, n=5)
+
+    assert codes.shape == distances.shape == (len(POINTS), 5)
+    assert (codes == block_codes).all()
+    assert np.allclose(distances, block_distances)
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+    # Asking for more stations than there are returns all of them.
+    assert locator.nearest_many(lat, lon, n=500)[0].shape == (len(POINTS), 200)
+
+
+def test_within(stations, monkeypatch):
+    locator = StationLocator(stations)
+    lat, lon = np.array(POINTS).T
+
+    for radius_km in (0, 10, 40):
+        expected = [[code for distance, code in _distances(stations, *point) if distance <= radius_km] for point in POINTS]
+        found = locator.within_many(lat, lon, radius_km)
+
+        monkeypatch.setattr(geo, "_BLOCK_ELEMENTS", 400)
+        assert locator.within_many(lat, lon, radius_km) == found
+        monkeypatch.undo()
+
+        assert [[code for code, _ in row] for row in found] == expected
+        assert all(distance <= radius_km + 1e-6 for row in found for _, distance in row)
+
+    assert locator.within(*POINTS[0], 40) == locator.within_many(lat, lon, 40)[0]
+
+
+def test_records_and_missing_coordinates():
+    records = parse_stations([stations_xml(20)], records=True)
+    records["AM0"].lat = None
+    records["RO1"].lon = ""
+
+    locator = StationLocator(records)
+
+    assert len(locator) == 18
+    assert "AM0" not in locator.codes.tolist() and "RO1" not in locator.codes.tolist()
+    assert locator.nearest(50.75, 3.35)[0][0] != "AM0"
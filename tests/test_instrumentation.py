@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fixtures import departures_xml, responses
+from benchmarks.stub_server import StubServer
+from nsapi.modules import instrumentation
+from nsapi.modules.instrumentation import PHASES, MetricsRegistry, _count_records, add_sink, instrumented, measure
+from nsapi.nsapi import NSApi
+from tests.conftest import FixtureAdapter, mount
+
+
+@pytest.fixture
+def measurements():
+    measurements = []
+    sink = add_sink(measurements.append)
+    yield measurements
+    instrumentation.remove_sink(sink)
+
+
+def _broken_departures():
+    # The first train has no ride number.
+    body = departures_xml(60)
+    start = body.index(b"<RitNummer>")
+    return body[:start] + body[body.index(b"</RitNummer>", start) + len(b"</RitNummer>"):]
+
+
+def _assert_phases(m):
+    assert all(value >= 0 for value in m.phases().values())
+    assert sum(m.phases().values()) == pytest.approx(m.total, abs=1e-6)
+
+
+def test_nothing_is_measured_without_sinks():
+    calls = []
+
+    @instrumented("test")
+    def f():
+        calls.append(instrumentation.current())
+        return [1, 2]
+
+    assert f() == [1, 2]
+    assert calls == [None]
+
+    with measure("test") as m:
+        assert m is None
+
+
+def test_count_records():
+    assert _count_records({"expected": {1: 1}, "unexpected": {2: 2, 3: 3}}) == 3
+    assert _count_records(({"a": 1, "b": 2}, '"etag"', None)) == 2
+    assert _count_records(None) == 0
+    assert _count_records([1, 2, 3]) == 3
+
+
+def test_phases_of_a_call(api, measurements):
+    departures = api.get_departures("UT")
+
+    m = [m for m in measurements if m.endpoint == "departures"][-1]
+    assert instrumentation.current() is None
+    assert (m.status_code, m.error) == (200, None)
+    assert m.bytes == len(responses()["departures"])
+    assert m.elements == m.records == len(departures)
+    assert m.request > 0 and m.parse > 0
+    _assert_phases(m)
+
+
+def test_records_of_both_disruption_sections(api, measurements):
+    disruptions = api.get_disruptions(True)
+
+    m = measurements[-1]
+    assert m.endpoint == "disruptions"
+    assert m.records == len(disruptions["expected"]) + len(disruptions["unexpected"]) > len(disruptions["unexpected"])
+
+
+def test_errors_are_measured(measurements):
+    bodies = responses()
+    bodies["departures"] = _broken_departures()
+    api = NSApi("user", "password", lazy_login=True)
+    mount(api, FixtureAdapter(bodies))
+
+    with pytest.raises(AttributeError):
+        api.get_departures("UT")
+
+    m = measurements[-1]
+    assert (m.endpoint, m.error, m.records) == ("departures", "AttributeError", 0)
+    _assert_phases(m)
+
+
+def test_every_sink_gets_the_measurement(api, measurements):
+    registry = add_sink(MetricsRegistry(buckets=(0.5, 10)))
+    try:
+        api.get_departures("UT")
+    finally:
+        instrumentation.remove_sink(registry)
+
+    departures = [m for m in measurements if m.endpoint == "departures"]
+    exposed = registry.expose()
+
+    assert registry.histograms[("departures", "total")][1] == len(departures)
+    for phase in PHASES:
+        assert 'nsapi_phase_seconds_count{{endpoint="departures",phase="{}"}} {}'.format(phase, len(departures)) in exposed
+    assert 'nsapi_requests_total{{endpoint="departures",error=""}} {}'.format(len(departures)) in exposed
+    assert 'nsapi_records_total{{endpoint="departures"}} {}'.format(sum(m.records for m in departures)) in exposed
+
+    # Removed sinks get nothing.
+    api.get_departures("UT")
+    assert registry.histograms[("departures", "total")][1] == len(departures)
+
+
+def test_async_calls_are_measured(measurements):
+    pytest.importorskip("httpx")
+    from nsapi.async_nsapi import AsyncNSApi
+
+    async def main():
+        async with AsyncNSApi("user", "password") as api:
+            return await asyncio.gather(api.get_departures("UT"), api.get_disruptions(True))
+
+    with StubServer():
+        departures, disruptions = asyncio.run(main())
+
+    by_endpoint = {m.endpoint: m for m in measurements}
+    assert by_endpoint["departures"].records == by_endpoint["departures"].elements == len(departures)
+    assert by_endpoint["disruptions"].records == len(disruptions["expected"]) + len(disruptions["unexpected"])
+    assert by_endpoint["departures"].bytes == len(responses()["departures"])
+    for m in by_endpoint.values():
+        _assert_phases(m)
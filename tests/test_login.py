@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from nsapi.modules.exceptions import IncorrectAuthException
+from nsapi.modules.urls import urlmap
+from nsapi.nsapi import NSApi
+from tests.conftest import FixtureAdapter, mount
+
+
+class RejectingAdapter(FixtureAdapter):
+    def __init__(self):
+        super().__init__()
+        self.status_code = None
+        self.responses = []
+
+    def send(self, request, **kwargs):
+        r = super().send(request, **kwargs)
+        if self.status_code is not None:
+            r.status_code = self.status_code
+
+        self.responses.append(r)
+        return r
+
+
+def _verifications(adapter: FixtureAdapter):
+    return sum(request.url == urlmap["departures"] for request in adapter.requests)
+
+
+def test_credentials_are_verified_once(api, adapter):
+    for _ in range(3):
+        api.get_departures("UT")
+    api.get_stations()
+
+    assert _verifications(adapter) == 1
+    assert api.auth.stats["verifications"] == 1
+    assert api.auth.stats["skipped"] == 3
+
+
+def test_incorrect_credentials():
+    adapter = RejectingAdapter()
+    adapter.status_code = 401
+    api = NSApi("user", "wrong", lazy_login=True)
+    mount(api, adapter)
+
+    with pytest.raises(IncorrectAuthException, match="Incorrect username or password"):
+        api.get_departures("UT")
+
+    # The rejected verification is a failed verification, not a rejected request.
+    assert api.auth.stats == {"verifications": 1, "skipped": 0, "rejections": 0}
+
+
+def test_rejected_request_is_verified_again():
+    adapter = RejectingAdapter()
+    api = NSApi("user", "password", lazy_login=True)
+    mount(api, adapter)
+    api.get_departures("UT")
+
+    adapter.status_code = 403
+    with pytest.raises(IncorrectAuthException, match="403"):
+        api.get_departures("ASD")
+
+    assert not api.auth.valid
+    assert api.auth.stats["rejections"] == 1
+    # The streamed response was closed before the exception left the hook.
+    assert adapter.responses[-1].raw.closed
+
+    adapter.status_code = None
+    api.get_departures("ASD")
+    assert _verifications(adapter) == 2
+
+
+def test_verification_expires_after_ttl(adapter):
+    api = NSApi("user", "password", lazy_login=True, auth_ttl=0.05)
+    mount(api, adapter)
+
+    api.get_departures("UT")
+    api.get_departures("UT")
+    time.sleep(0.06)
+    api.get_departures("UT")
+
+    assert _verifications(adapter) == 2
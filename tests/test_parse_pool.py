@@ -0,0 +1,76 @@
+import pytest
+
+from benchmarks.fixtures import departures_xml, responses, stations_xml
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.parse_pool import ParsePool
+from nsapi.modules.parsing import CHUNK_SIZE
+from nsapi.modules.stations import parse_stations
+from nsapi.nsapi import NSApi
+from tests.conftest import FixtureAdapter, mount
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ParsePool(workers=1, min_size=4096) as pool:
+        yield pool
+
+
+def _chunks(body: bytes):
+    return [body[offset:offset + CHUNK_SIZE] for offset in range(0, len(body), CHUNK_SIZE)]
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_results_match_direct_parsing(pool, records):
+    small = departures_xml(2)
+    large = stations_xml(200)
+    assert len(small) < pool.min_size < len(large)
+
+    before = dict(pool.stats)
+    assert pool.parse(parse_departures, _chunks(small), records=records) == parse_departures([small], records=records)
+    assert pool.parse(parse_stations, _chunks(large), records=records) == parse_stations([large], records=records)
+
+    # The small body is parsed inline, the large one in a worker.
+    assert pool.stats["inline"] == before["inline"] + 1
+    assert pool.stats["pooled"] == before["pooled"] + 1
+    assert pool.stats["pooled_bytes"] == before["pooled_bytes"] + len(large)
+
+
+def test_submit(pool):
+    body = departures_xml(60)
+    future = pool.submit(parse_departures, _chunks(body))
+
+    assert future.result(timeout=30) == parse_departures([body])
+
+
+def test_parse_errors_are_raised(pool):
+    # The first train has no ride number.
+    body = departures_xml(200)
+    start = body.index(b"<RitNummer>")
+    body = body[:start] + body[body.index(b"</RitNummer>", start) + len(b"</RitNummer>"):]
+
+    with pytest.raises(AttributeError):
+        pool.parse(parse_departures, _chunks(body))
+
+
+def test_min_size_zero_pools_empty_bodies():
+    with ParsePool(workers=1, min_size=0) as pool:
+        # An empty body is a syntax error, also when it comes back from a worker.
+        with pytest.raises(SyntaxError, match="no element found"):
+            pool.parse(parse_departures, [])
+
+        assert pool.stats == {"inline": 0, "pooled": 1, "pooled_bytes": 0}
+
+    # Closing twice is fine.
+    pool.close()
+
+
+def test_nsapi_with_a_parse_pool(pool):
+    bodies = responses()
+    bodies["stations"] = stations_xml(200)
+
+    api = NSApi("user", "password", lazy_login=True, parse_pool=pool)
+    mount(api, FixtureAdapter(bodies))
+
+    pooled = pool.stats["pooled"]
+    assert api.get_stations() == parse_stations([bodies["stations"]])
+    assert pool.stats["pooled"] == pooled + 1
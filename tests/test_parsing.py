@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.fixtures import departures_xml, disruptions_xml, pricing_xml, stations_xml, travel_recommendations_xml
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.disruptions import parse_disruptions
+from nsapi.modules.pricing import parse_pricing
+from nsapi.modules.stations import parse_stations
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+
+CASES = [
+    (parse_departures, departures_xml(60)),
+    (parse_stations, stations_xml(200)),
+    (parse_disruptions, disruptions_xml(20, 40)),
+    (parse_pricing, pricing_xml(5)),
+    (parse_travel_recommendations, travel_recommendations_xml(10)),
+]
+
+
+def _chunks(body: bytes, size: int = 1000):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("parse_f, body", CASES, ids=[parse_f.__name__ for parse_f, _ in CASES])
+@pytest.mark.parametrize("records", [False, True])
+def test_backends_agree(parse_f, body, records):
+    lxml = parse_f([body], "lxml", records)
+    soup = parse_f([body], "soup", records)
+
+    assert lxml
+    assert lxml == soup
+
+
+@pytest.mark.parametrize("backend", ["lxml", "soup"])
+def test_chunk_boundaries(backend):
+    body = stations_xml(200)
+
+    assert parse_stations(_chunks(body), backend) == parse_stations([body], backend)
+
+
+def test_departures_values():
+    departures = parse_departures([departures_xml(6)])
+    departure = departures["1000"]
+
+    assert len(departures) == 6
+    assert departure["departure_time"].isoformat() == "2026-10-18T06:00:00+02:00"
+    assert departure["departs_from"] == {"platform": "1", "changed": True}
+    assert departure["delay"] == {"time": "PT1M", "reason": "+1 min"}
+    assert departure["comments"] == ["Rijdt vandaag niet"]
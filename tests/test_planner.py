@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+
+from benchmarks.fixtures import station_names, travel_recommendations_xml
+from nsapi.modules.planner import Timetable
+from nsapi.modules.travel_recommendations import parse_travel_recommendations
+
+TZ = datetime.timezone(datetime.timedelta(hours=2))
+
+
+def _at(hour: int, minute: int):
+    return datetime.datetime(2026, 10, 18, hour, minute, tzinfo=TZ)
+
+
+def _advice(*legs):
+    # Only the fields the timetable reads.
+    parts = [[{"name": name, "arrival_time": _at(*moment), "track": None, "track_changed": None} for name, moment in leg] for leg in legs]
+    return {"departure_time": {"planned": parts[0][0]["arrival_time"]}, "travel_info": {"parts": parts}}
+
+
+@pytest.fixture(params=[False, True], ids=["dicts", "records"])
+def timetable(request):
+    timetable = Timetable()
+    timetable.add(parse_travel_recommendations([travel_recommendations_xml(4)], records=request.param))
+
+    return timetable
+
+
+def test_earliest_arrival_on_one_train(timetable):
+    names = station_names(16)
+
+    journey = timetable.earliest_arrival(names[0], names[7], _at(6, 0))
+    assert (journey.departure, journey.arrival) == (_at(6, 0), _at(6, 28))
+    assert [stop.name for stop in journey.legs[0]] == names[:8]
+
+    # The first train passed at 06:08.
+    journey = timetable.earliest_arrival(names[2], names[5], _at(6, 9))
+    assert (journey.departure, journey.arrival) == (_at(6, 23), _at(6, 35))
+    assert timetable.stats["queries"] == 2
+
+
+def test_earliest_arrival_without_connection(timetable):
+    names = station_names(16)
+
+    # The parts of the fixture do not share a station, so there is no transfer between them.
+    assert timetable.earliest_arrival(names[0], names[15], _at(6, 0)) is None
+    # Nothing departs this late.
+    assert timetable.earliest_arrival(names[0], names[7], _at(23, 0)) is None
+
+
+def test_earliest_arrival_of_unknown_station(timetable):
+    with pytest.raises(ValueError):
+        timetable.earliest_arrival("Nergenshuizen", station_names(1)[0], _at(6, 0))
+
+
+def test_earliest_arrival_respects_transfer_time():
+    advices = [
+        _advice([("A", (10, 0)), ("B", (10, 10))]),
+        _advice([("B", (10, 11)), ("C", (10, 30))]),
+        _advice([("B", (10, 15)), ("C", (10, 40))]),
+    ]
+
+    timetable = Timetable(transfer_time=120)
+    timetable.add(advices)
+    journey = timetable.earliest_arrival("A", "C", _at(10, 0))
+    assert journey.arrival == _at(10, 40)
+    assert [[stop.name for stop in leg] for leg in journey.legs] == [["A", "B"], ["B", "C"]]
+
+    timetable = Timetable(transfer_time=0)
+    timetable.add(advices)
+    assert timetable.earliest_arrival("A", "C", _at(10, 0)).arrival == _at(10, 30)
+
+
+def test_covers_only_recent_queries():
+    timetable = Timetable()
+    timetable.add([_advice([("A", (10, 0)), ("B", (10, 10))]), _advice([("A", (10, 30)), ("B", (10, 40))])], "A", "B")
+
+    assert timetable.covers("A", "B", _at(10, 15))
+    assert not timetable.covers("A", "B", _at(11, 0))
+    assert not timetable.covers("B", "A", _at(10, 15))
+
+    timetable.max_age = 0
+    assert timetable.expire() == 2
+    assert not timetable.covers("A", "B", _at(10, 15))
+
+
+def test_names_are_resolved_outside_the_lock():
+    timetable = Timetable()
+
+    def resolve(name):
+        # A resolve function may block, like NSApi.resolve_station downloading the station list.
+        assert timetable._lock.acquire(blocking=False), "resolve was called with the timetable locked"
+        timetable._lock.release()
+        return name.upper()
+
+    timetable.resolve = resolve
+    timetable.add([_advice([("a", (10, 0)), ("b", (10, 10))])], "a", "b")
+
+    assert timetable.earliest_arrival("a", "b", _at(10, 0)).arrival == _at(10, 10)
+    assert timetable.covers("A", "B", _at(10, 0))
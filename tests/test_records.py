@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.fixtures import departures_xml, pricing_xml
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.pricing import parse_pricing
+from nsapi.modules.records import Departure, Record
+from tests.test_parsing import CASES
+
+
+def _as_dicts(result):
+    if isinstance(result, Record):
+        return result.to_dict()
+    if isinstance(result, dict):
+        return {key: _as_dicts(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [_as_dicts(value) for value in result]
+
+    return result
+
+
+@pytest.mark.parametrize("parse_f, body", CASES, ids=[parse_f.__name__ for parse_f, _ in CASES])
+def test_records_match_dicts(parse_f, body):
+    assert _as_dicts(parse_f([body], None, True)) == parse_f([body], None, False)
+
+
+def test_records_hash_by_value():
+    first = parse_departures([departures_xml(6)], records=True)
+    second = parse_departures([departures_xml(6)], records=True)
+
+    assert set(first.values()) == set(second.values())
+    assert isinstance(first["1000"], Departure)
+    assert len(set(first.values()) | set(second.values())) == 6
+
+
+def test_fares_compare_by_value():
+    first = parse_pricing([pricing_xml(3)], records=True)
+    second = parse_pricing([pricing_xml(3)], records=True)
+
+    assert first == second
+    assert hash(first["Carrier 0"]) == hash(second["Carrier 0"])
+    assert first["Carrier 0"] != first["Carrier 1"]
+    assert first["Carrier 0"].get("one-way", "standard-class", "20-off") == 20.0
+
+
+def test_dictionaries_do_not_share_lists_with_records():
+    departure = parse_departures([departures_xml(1)], records=True)["1000"]
+    departure.to_dict()["comments"].append("changed")
+
+    assert departure.comments == ["Rijdt vandaag niet"]
@@ -0,0 +1,220 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from nsapi.modules.exceptions import CassetteMissException, CircuitOpenException
+from nsapi.modules.scheduler import Scheduler, SchedulingAdapter, TokenBucket
+from nsapi.modules.urls import urlmap
+
+
+class ScriptedAdapter(BaseAdapter):
+    def __init__(self, *outcomes):
+        """
+        Answers with the given outcomes in turn: a status code, a (status code, headers) tuple or an exception,
+        and 200 after the last one.
+        """
+
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+        status_code, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        r = requests.Response()
+        r.status_code = status_code
+        r.headers = CaseInsensitiveDict(headers)
+        r.url = request.url
+        r.request = request
+        r.raw = io.BytesIO(b"")
+        return r
+
+    def close(self):
+        pass
+
+
+def _session(scheduler: Scheduler, adapter: BaseAdapter):
+    s = requests.Session()
+    s.mount("https://", SchedulingAdapter(scheduler, adapter))
+    return s
+
+
+def test_bucket_paces_requests():
+    bucket = TokenBucket(rate=20, burst=1)
+
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+
+    # The burst is taken at once, the other four wait 1 / rate each.
+    assert time.monotonic() - started >= 0.19
+
+
+def test_bucket_serves_waiters_by_priority():
+    bucket = TokenBucket(rate=5, burst=1)
+    bucket.acquire()
+    order = []
+
+    def acquire(priority):
+        bucket.acquire(priority)
+        order.append(priority)
+
+    threads = []
+    for priority in (5, 1, 3):
+        threads.append(threading.Thread(target=acquire, args=(priority,)))
+        threads[-1].start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == [1, 3, 5]
+
+
+def test_async_bucket_serves_waiters_by_priority():
+    bucket = TokenBucket(rate=5, burst=1)
+    bucket.acquire()
+    order = []
+
+    async def acquire(priority):
+        await bucket.acquire_async(priority)
+        order.append(priority)
+
+    async def main():
+        tasks = []
+        for priority in (5, 1, 3):
+            tasks.append(asyncio.ensure_future(acquire(priority)))
+            await asyncio.sleep(0.02)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == [1, 3, 5]
+
+
+def test_retries_server_errors_and_throttling():
+    adapter = ScriptedAdapter(503, (429, {"Retry-After": "0.2"}), requests.ConnectionError("reset"))
+    scheduler = Scheduler(rate=1000, backoff_base=0.01)
+
+    started = time.monotonic()
+    r = _session(scheduler, adapter).get(urlmap["departures"])
+
+    assert r.status_code == 200
+    assert adapter.sent == 4
+    assert time.monotonic() - started >= 0.2
+    assert scheduler.stats["retries"] == 3
+    assert scheduler.stats["throttled"] == 1
+
+
+def test_gives_up_after_max_retries():
+    adapter = ScriptedAdapter(500, 500, 500, 500)
+    r = _session(Scheduler(rate=1000, max_retries=2, backoff_base=0.001), adapter).get(urlmap["departures"])
+
+    assert r.status_code == 500
+    assert adapter.sent == 3
+
+
+def test_backoff_uses_retry_after_up_to_the_cap():
+    scheduler = Scheduler(backoff_base=1, backoff_cap=10)
+
+    assert scheduler.backoff(0, "3") == 3
+    assert scheduler.backoff(0, "120") == 10
+    assert 0 <= scheduler.backoff(2, "soon") <= 4
+
+
+def test_breaker_opens_and_recovers():
+    adapter = ScriptedAdapter(500, 500)
+    scheduler = Scheduler(rate=1000, max_retries=0, failure_threshold=2, reset_timeout=0.1)
+    s = _session(scheduler, adapter)
+
+    assert s.get(urlmap["departures"]).status_code == 500
+    assert s.get(urlmap["departures"]).status_code == 500
+    with pytest.raises(CircuitOpenException):
+        s.get(urlmap["departures"])
+    assert adapter.sent == 2
+    assert scheduler.stats["rejected"] == 1
+
+    # Other endpoints have their own breaker.
+    assert s.get(urlmap["stations"]).status_code == 200
+
+    time.sleep(0.1)
+    assert scheduler.breaker("departures").state == "half-open"
+    assert s.get(urlmap["departures"]).status_code == 200
+    assert scheduler.breaker("departures").state == "closed"
+
+
+def _half_open(scheduler: Scheduler):
+    breaker = scheduler.breaker("departures")
+    for _ in range(scheduler.failure_threshold):
+        breaker.record(False)
+    time.sleep(scheduler.reset_timeout)
+
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_trial_is_released_when_the_request_fails_otherwise():
+    scheduler = Scheduler(rate=1000, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    _half_open(scheduler)
+    s = _session(scheduler, ScriptedAdapter(CassetteMissException("not recorded")))
+
+    with pytest.raises(CassetteMissException):
+        s.get(urlmap["departures"])
+
+    # The next request is the trial, instead of being rejected forever.
+    assert s.get(urlmap["departures"]).status_code == 200
+    assert scheduler.breaker("departures").state == "closed"
+
+
+def test_trial_is_released_when_cancelled():
+    httpx = pytest.importorskip("httpx")
+    from nsapi.async_nsapi import AsyncSchedulingTransport
+
+    class Hanging(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            await asyncio.sleep(60)
+
+    class Answering(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return httpx.Response(200, request=request)
+
+    scheduler = Scheduler(rate=1000, max_retries=0, failure_threshold=1, reset_timeout=0.05)
+    breaker = _half_open(scheduler)
+
+    async def main():
+        async with httpx.AsyncClient(transport=AsyncSchedulingTransport(scheduler, Hanging())) as client:
+            task = asyncio.ensure_future(client.get(urlmap["departures"]))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        async with httpx.AsyncClient(transport=AsyncSchedulingTransport(scheduler, Answering())) as client:
+            return (await client.get(urlmap["departures"])).status_code
+
+    assert asyncio.run(main()) == 200
+    assert breaker.state == "closed"
+
+
+def test_trial_is_released_when_cancelled_waiting_for_a_token():
+    scheduler = Scheduler(rate=1, burst=1, failure_threshold=1, reset_timeout=0.05)
+    breaker = _half_open(scheduler)
+    scheduler.bucket.acquire()
+
+    async def main():
+        task = asyncio.ensure_future(scheduler.before_async(urlmap["departures"]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.before() is True
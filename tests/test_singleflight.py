@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nsapi.modules.singleflight import SingleFlight
+
+
+def _run_concurrently(flight: SingleFlight, f, callers: int):
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do("key", f)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+
+    return threads, results, errors
+
+
+def _wait_for_followers(flight: SingleFlight, followers: int):
+    for _ in range(1000):
+        if flight.stats["coalesced"] == followers:
+            return
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def f():
+        calls.append(1)
+        release.wait(5)
+        return {"result": True}
+
+    threads, results, errors = _run_concurrently(flight, f, 8)
+    _wait_for_followers(flight, 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert errors == [None] * 8
+    assert all(result is results[0] for result in results)
+    assert flight.stats == {"calls": 1, "coalesced": 7}
+
+
+def test_concurrent_calls_share_the_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def f():
+        release.wait(5)
+        raise ValueError("failed")
+
+    threads, results, errors = _run_concurrently(flight, f, 4)
+    _wait_for_followers(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats == {"calls": 2, "coalesced": 0}
+
+
+def test_async_calls_share_one_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def f():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", f) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert flight.stats == {"calls": 1, "coalesced": 4}
+
+
+def test_cancelled_async_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def f():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do_async("key", f))
+        second = asyncio.ensure_future(flight.do_async("key", f))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+import requests
+
+from benchmarks.fixtures import stations_xml
+from nsapi.modules.station_cache import StationCache, StationCatalogue, encode_catalogue
+from nsapi.modules.stations import parse_stations
+from nsapi.modules.urls import urlmap
+from tests.conftest import FixtureAdapter
+
+
+@pytest.fixture
+def stations():
+    return parse_stations([stations_xml(50)])
+
+
+def _session(adapter: FixtureAdapter):
+    s = requests.Session()
+    s.mount("https://", adapter)
+    return s
+
+
+def test_catalogue_round_trip(stations):
+    catalogue = StationCatalogue(memoryview(encode_catalogue(stations, 1000.0, '"v1"', "Sun, 18 Oct 2026 10:00:00 GMT")))
+
+    assert dict(catalogue) == stations
+    assert (catalogue.fetched_at, catalogue.etag, catalogue.last_modified) == (1000.0, '"v1"', "Sun, 18 Oct 2026 10:00:00 GMT")
+    assert "AM0" in catalogue and "XX" not in catalogue
+
+
+def test_store_replaces_the_file(tmp_path, stations):
+    path = str(tmp_path / "stations.bin")
+    cache = StationCache(path)
+
+    old = cache.store(stations)
+    new = cache.store({code: stations[code] for code in list(stations)[:10]})
+
+    # A catalogue that was loaded before stays valid, and only the catalogue file is left.
+    assert len(old) == 50 and len(new) == 10
+    assert os.listdir(str(tmp_path)) == ["stations.bin"]
+    assert len(StationCache(path).load()) == 10
+
+
+def test_failed_store_keeps_the_old_file(tmp_path, stations):
+    path = str(tmp_path / "stations.bin")
+    cache = StationCache(path)
+    cache.store(stations)
+
+    with pytest.raises(TypeError):
+        cache.store({"XX": None})
+
+    assert os.listdir(str(tmp_path)) == ["stations.bin"]
+    assert dict(StationCache(path).load()) == stations
+
+
+@pytest.mark.parametrize("content", [b"", b"not a catalogue", encode_catalogue({}, 0.0).replace(b"\x01\x00", b"\x09\x00", 1)])
+def test_invalid_files_are_not_loaded(tmp_path, content):
+    path = tmp_path / "stations.bin"
+    path.write_bytes(content)
+
+    assert StationCache(str(path)).load() is None
+
+
+def test_fresh_respects_the_ttl(tmp_path, stations):
+    cache = StationCache(str(tmp_path / "stations.bin"), ttl=60)
+    assert cache.fresh() is None
+
+    cache.store(stations)
+    assert cache.fresh() is not None
+
+    cache.ttl = 0
+    assert cache.fresh() is None
+
+
+def test_get_revalidates_a_stale_catalogue(tmp_path):
+    adapter = FixtureAdapter(etag='"v1"')
+    s = _session(adapter)
+    cache = StationCache(str(tmp_path / "stations.bin"))
+
+    first = cache.get(s)
+    assert cache.get(s) is first
+    assert len(adapter.requests) == 1
+
+    cache.ttl = 0
+    second = cache.get(s)
+    assert dict(second) == dict(first)
+    assert second.fetched_at >= first.fetched_at
+
+    cache.get(s, force=True)
+
+    assert [request.url for request in adapter.requests] == [urlmap["stations"]] * 3
+    assert [request.headers.get("If-None-Match") for request in adapter.requests] == [None, '"v1"', None]
@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.fixtures import stations_xml
+from nsapi.modules.station_index import StationIndex, normalize
+from nsapi.modules.stations import parse_stations
+
+
+@pytest.fixture(params=[False, True], ids=["dicts", "records"])
+def stations(request):
+    return parse_stations([stations_xml(50)], records=request.param)
+
+
+@pytest.fixture
+def index(stations):
+    return StationIndex(stations)
+
+
+def test_normalize():
+    assert normalize("Amstërdam") == "amsterdam"
+    assert normalize("  's-Hertogenbosch   Centraal ") == "s hertogenbosch centraal"
+    assert normalize("---") == ""
+
+
+def test_get(index):
+    assert len(index) == 50
+
+    # Codes, UIC codes, names and synonyms, ignoring case and diacritics.
+    for query in ("AM0", "am0", "8400000", "Amstërdam", "amsterdam", "AMSTËRDAM", " Amsterdam! "):
+        assert index.get(query) == "AM0"
+
+    assert index.get("Amsterdam Centraal") is None
+
+
+def test_station(index, stations):
+    assert index.station("rotterdam") is stations["RO1"]
+    assert index.station("nowhere") is None
+
+
+def test_prefix(index):
+    assert index.prefix("Amster") == ["AM0", "AM30"]
+    assert index.prefix("amster", limit=1) == ["AM0"]
+    assert index.prefix("Xyz") == []
+
+
+def test_fuzzy(index):
+    matches = index.fuzzy("Amsterdm")
+
+    assert matches[0][0] == "AM0"
+    assert all(0.3 <= score <= 1 for _, score in matches)
+    assert [score for _, score in matches] == sorted((score for _, score in matches), reverse=True)
+    assert index.fuzzy("Amsterdam", cutoff=1.0) == [("AM0", 1.0)]
+    assert index.fuzzy("qqqq") == []
+
+
+def test_search(index):
+    # The exact match comes first, then the prefix matches, then the fuzzy matches.
+    assert index.search("RO1")[0] == "RO1"
+    assert index.search("Rotte")[:2] == ["RO1", "RO31"]
+    assert index.search("Roterdam")[0] == "RO1"
+    assert len(index.search("dam", limit=3)) == 3
@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from benchmarks.fixtures import departures_xml, responses
+from benchmarks.stub_server import StubServer
+from nsapi.modules.transport import TransportConfig
+from nsapi.nsapi import NSApi
+
+
+def _broken_departures():
+    # The first train has no ride number, the rest of the body is never read.
+    body = departures_xml(2000)
+    start = body.index(b"<RitNummer>")
+    return body[:start] + body[body.index(b"</RitNummer>", start) + len(b"</RitNummer>"):]
+
+
+def _in_thread(f, timeout: float = 5):
+    errors = []
+
+    def run():
+        try:
+            f()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "the call did not return"
+
+    return errors
+
+
+@pytest.mark.parametrize("records", [False, True])
+def test_parse_error_releases_the_connection(records):
+    bodies = responses()
+    bodies["departures"] = _broken_departures()
+
+    with StubServer(bodies):
+        api = NSApi("user", "password", lazy_login=True, records=records, transport_config=TransportConfig(pool_maxsize=1, pool_block=True))
+
+        # With a pool of one blocking connection, a leaked response makes the next request wait forever.
+        for _ in range(3):
+            errors = _in_thread(lambda: api.get_departures("UT"))
+            assert len(errors) == 1 and isinstance(errors[0], AttributeError)
+
+        assert len(_in_thread(api.get_stations)) == 0
@@ -0,0 +1,53 @@
+import datetime
+import warnings
+
+import pytest
+
+from nsapi.modules.timestamps import parse_timestamp, parse_timestamps
+
+CASES = [
+    ("2026-10-18T10:00:00+0200", datetime.timedelta(hours=2), 0),
+    ("2026-10-18T10:00:30-0130", datetime.timedelta(hours=-1, minutes=-30), 30),
+    ("2026-10-18T10:00:30-0000", datetime.timedelta(0), 30),
+    ("2026-10-18T10:00:00+02:00", datetime.timedelta(hours=2), 0),
+    ("2026-10-18T10:00:00-05:45", datetime.timedelta(hours=-5, minutes=-45), 0),
+    ("2026-10-18T10:00:00Z", datetime.timedelta(0), 0),
+    ("2026-10-18T10:00+0200", datetime.timedelta(hours=2), 0),
+    ("2026-10-18T10:00-0300", datetime.timedelta(hours=-3), 0),
+    ("2026-10-18T10:00Z", datetime.timedelta(0), 0),
+]
+
+
+@pytest.mark.parametrize("value, offset, seconds", CASES, ids=[value for value, _, _ in CASES])
+def test_parse_timestamp(value, offset, seconds):
+    parsed = parse_timestamp(value)
+
+    assert parsed == datetime.datetime(2026, 10, 18, 10, 0, seconds, tzinfo=datetime.timezone(offset))
+    assert parsed.utcoffset() == offset
+
+
+@pytest.mark.parametrize("value", ["2026-10-18T10:00:00+2", "2026-10-18T10:00:00 0200", "2026-10-18T10:00:00+02:0x"])
+def test_invalid_offsets(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+def test_parse_timestamps_shares_repeated_values():
+    parsed = parse_timestamps(["2026-10-18T10:00:00+0200", "2026-10-18T11:00:00+0200", "2026-10-18T10:00:00+0200"])
+
+    assert parsed[0] is parsed[2]
+    assert parsed[1] - parsed[0] == datetime.timedelta(hours=1)
+
+
+def test_to_datetime64_matches_parse_timestamp():
+    np = pytest.importorskip("numpy")
+    from nsapi.modules.timestamps import to_datetime64
+
+    values = [value for value, _, _ in CASES]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        converted = to_datetime64(values)
+
+    expected = [np.datetime64(parse_timestamp(value).astimezone(datetime.timezone.utc).replace(tzinfo=None), "s") for value in values]
+    assert list(converted) == expected
+    assert len(to_datetime64([])) == 0
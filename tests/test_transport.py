@@ -0,0 +1,126 @@
+import socket
+
+import pytest
+import requests
+
+from benchmarks.fixtures import responses
+from benchmarks.stub_server import StubServer
+from nsapi.modules.departures import parse_departures
+from nsapi.modules.transport import HTTPXAdapter, TransportAdapter, TransportConfig, TransportMetrics, accept_encoding
+from nsapi.modules.urls import urlmap
+from nsapi.nsapi import NSApi
+from tests.conftest import mount
+
+
+def _api(config: TransportConfig, httpx: bool = False):
+    api = NSApi("user", "password", lazy_login=True, transport_config=config)
+    if httpx:
+        mount(api, HTTPXAdapter(config))
+
+    return api
+
+
+def _listening_socket():
+    # Connections are accepted by the kernel, but never answered.
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    s.listen()
+    return s
+
+
+def test_accept_encoding():
+    assert accept_encoding(False) == "identity"
+    assert accept_encoding().startswith("gzip, deflate")
+    assert TransportConfig(compression=False).headers() == {"Accept-Encoding": "identity"}
+
+
+def test_metrics_summary():
+    metrics = TransportMetrics(keep=2)
+    metrics.record("a", 200, 0.1, 100, 400, "gzip")
+    metrics.record("b", 200, 0.3, None, 200)
+    metrics.record("c", 304, 0.2, 0, 0, "identity")
+
+    assert [m.url for m in metrics.recent] == ["b", "c"]
+
+    summary = metrics.summary()
+    assert (summary["requests"], summary["compressed"], summary["wire_bytes"], summary["body_bytes"]) == (3, 1, 300, 600)
+    assert summary["compression_ratio"] == 2
+    assert summary["mean_ttfb"] == pytest.approx(0.2)
+    assert TransportMetrics().summary()["mean_ttfb"] == 0
+
+
+def test_config_adapter():
+    config = TransportConfig(pool_maxsize=3)
+    assert isinstance(config.adapter(), TransportAdapter)
+    assert isinstance(TransportConfig(http2=True).adapter(), HTTPXAdapter)
+
+    s = requests.Session()
+    config.configure(s)
+    assert s.headers["Accept-Encoding"] == accept_encoding()
+    assert s.get_adapter("http://example.com").transport_config is config
+
+
+@pytest.mark.parametrize("httpx", [False, pytest.param(True, id="httpx")])
+@pytest.mark.parametrize("compression", [False, True])
+def test_metrics_are_recorded(httpx, compression):
+    if httpx:
+        pytest.importorskip("httpx")
+
+    body = responses()["departures"]
+    config = TransportConfig(compression=compression)
+
+    with StubServer(compress=True):
+        departures = _api(config, httpx).get_departures("UT")
+
+    assert departures == parse_departures([body])
+
+    # The verification and the departures.
+    assert [m.status_code for m in config.metrics.recent] == [200, 200]
+    m = config.metrics.recent[-1]
+    assert m.body_bytes == len(body)
+    assert m.ttfb > 0
+    if compression:
+        assert m.content_encoding == "gzip"
+        assert m.wire_bytes < m.body_bytes
+    else:
+        assert m.content_encoding is None
+        assert m.wire_bytes == m.body_bytes
+
+    assert config.metrics.summary()["compressed"] == (2 if compression else 0)
+
+
+def test_httpx_adapter_streams():
+    pytest.importorskip("httpx")
+    body = responses()["stations"]
+    adapter = HTTPXAdapter()
+
+    s = requests.Session()
+    s.mount("http://", adapter)
+    with StubServer():
+        with s.get(urlmap["stations"], stream=True) as r:
+            assert adapter.transport_config.metrics.stats["requests"] == 0
+            assert b"".join(r.iter_content(1000)) == body
+
+        # The request is recorded once the body has been read.
+        assert adapter.transport_config.metrics.stats["body_bytes"] == len(body)
+
+        # Requests with other TLS settings get their own client.
+        s.get(urlmap["stations"], verify=False)
+        assert len(adapter._clients) == 2
+
+    adapter.close()
+    assert adapter._clients == {}
+
+
+def test_httpx_adapter_errors():
+    pytest.importorskip("httpx")
+    s = requests.Session()
+    s.mount("http://", HTTPXAdapter(TransportConfig(read_timeout=0.05)))
+
+    with _listening_socket() as server:
+        port = server.getsockname()[1]
+        with pytest.raises(requests.ReadTimeout):
+            s.get("http://127.0.0.1:{}/".format(port))
+
+    with pytest.raises(requests.ConnectionError):
+        s.get("http://127.0.0.1:{}/".format(port))
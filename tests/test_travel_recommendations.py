@@ -0,0 +1,42 @@
+import datetime
+
+import pytest
+
+from benchmarks.fixtures import travel_recommendations_xml
+from nsapi.modules.travel_recommendations import advice_key, parse_travel_recommendations
+from nsapi.modules.urls import urlmap
+
+TZ = datetime.timezone(datetime.timedelta(hours=2))
+
+
+def test_advice_key_of_dicts_and_records():
+    body = travel_recommendations_xml(3)
+    dicts = parse_travel_recommendations([body])
+    records = parse_travel_recommendations([body], records=True)
+
+    assert [advice_key(advice) for advice in dicts] == [advice_key(advice) for advice in records]
+    assert advice_key(dicts[0]) == ("3000", datetime.datetime(2026, 10, 18, 6, 0, tzinfo=TZ))
+    assert len({advice_key(advice) for advice in dicts}) == 3
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_overlapping_windows_are_yielded_once(api, adapter, prefetch):
+    # Every window gets the same response, so all of them overlap completely.
+    advices = list(api.iter_travel_recommendations("UT", "ASD", departure_time=datetime.datetime(2026, 10, 18, 6, 0, tzinfo=TZ), prefetch=prefetch))
+
+    assert len(advices) == 15
+    assert len({advice_key(advice) for advice in advices}) == 15
+    assert [advice_key(advice)[1] for advice in advices] == sorted(advice_key(advice)[1] for advice in advices)
+
+    windows = [request for request in adapter.requests if request.url.startswith(urlmap["travel-recommendations"])]
+    assert len(windows) == 2
+
+
+def test_windows_skip_earlier_and_later_departures(api):
+    advices = list(api.iter_travel_recommendations(
+        "UT", "ASD",
+        departure_time=datetime.datetime(2026, 10, 18, 7, 0, tzinfo=TZ),
+        until=datetime.datetime(2026, 10, 18, 8, 0, tzinfo=TZ)
+    ))
+
+    assert [advice_key(advice)[1].strftime("%H:%M") for advice in advices] == ["07:00", "07:15", "07:30", "07:45", "08:00"]